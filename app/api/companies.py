@@ -1,53 +1,243 @@
 """Companies API"""
 
-from api.deps import DBSession
-from api.schema import ProcessCompanyRequest
-from core.exceptions import TelescopeValidationException
+import json
+import uuid
+from typing import Annotated, Any, Dict, Tuple
+
+from api.deps import DBSession, ReadDBSession
+from api.ndjson import accepts_ndjson, ndjson_session_response
+from api.schema import ImportMode, ProcessCompanyRequest
 from core.logging import get_logger
-from fastapi import APIRouter, UploadFile
-from service.companies import get_processed_companies, import_company, process_companies
+from fastapi import APIRouter, Header, Query, Request, Response, UploadFile, status
+from service.companies import (
+    check_companies_found,
+    get_processed_companies,
+    import_company,
+    iter_companies,
+    iter_processed_companies,
+    iter_selected_companies,
+    process_companies,
+    process_selected_companies,
+)
+from service.features import count_features
+from service.import_jobs import cancel_import_job, create_import_job, get_import_job
+from service.processing_jobs import create_processing_job, get_processing_job
+from service.rule_sets import get_rule_set_plan
+from service.rules import compile_rules
 
 
 logger = get_logger(__name__)
 router = APIRouter(tags=["companies"])
 
+# Response header giving the rule set the processed features are stored under
+RULE_SET_HEADER = "X-Rule-Set-Id"
+# Response header giving the number of companies left unchanged when processing URLs
+SKIPPED_RECORDS_HEADER = "X-Skipped-Records"
+
 
 @router.post("/import_company_data")
-async def import_company_data(db_session: DBSession, file: UploadFile):
+async def import_company_data(
+    db_session: DBSession,
+    file: UploadFile,
+    response: Response,
+    mode: ImportMode = ImportMode.upsert,
+    background: bool = False,
+):
     """Import company data from a file.
 
+    CSV, JSON arrays and NDJSON are supported, optionally gzip compressed (a
+    `Content-Encoding: gzip` part header, a gzip content type or a `.gz` name).
+
     Args:
         file: The file to import.
         db_session: Database session.
+        mode: Insert every row, or upsert the companies on their URL.
+        background: Spool the file and import it in a background job, returning
+            the job right away.
+    """
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await create_import_job(file, mode, db_session)
+
+    return await import_company(file, db_session, mode)
+
+
+@router.get("/import_jobs/{job_id}")
+async def import_job(job_id: uuid.UUID, db_session: DBSession):
+    """Get the progress of a background import job.
+
+    Args:
+        job_id: The import job id.
+        db_session: Database session.
     """
-    SUPPORTED_FILE_TYPES = ["text/csv", "application/json"]
-    assert file.content_type in SUPPORTED_FILE_TYPES, f"Unsupported file type: {file.content_type}"
-    if file.content_type not in SUPPORTED_FILE_TYPES:
-        raise TelescopeValidationException(msg="Unsupported file type")
+    return await get_import_job(job_id, db_session)
 
-    imported_count = await import_company(file, db_session)
-    return {"imported_records": imported_count}
+
+@router.post("/import_jobs/{job_id}/cancel")
+async def cancel_import(job_id: uuid.UUID, db_session: DBSession):
+    """Cancel a background import job.
+
+    Args:
+        job_id: The import job id.
+        db_session: Database session.
+    """
+    return await cancel_import_job(job_id, db_session)
 
 
 @router.post("/process_company")
-async def process_company(process_request: ProcessCompanyRequest, db_session: DBSession):
+async def process_company(
+    process_request: ProcessCompanyRequest,
+    db_session: DBSession,
+    response: Response,
+    background: bool = False,
+    accept: Annotated[str | None, Header()] = None,
+):
     """Process the company for a given rule.
 
+    Companies are given either as a list of URLs, returning their processed data,
+    or as a selector, returning the number of companies processed. Rules are
+    given inline or as the id of a registered rule set. With
+    `Accept: application/x-ndjson` the processed data of every company is
+    streamed instead, one JSON object per line, as companies are processed.
+    The `X-Rule-Set-Id` response header gives the rule set the features are
+    stored under in the feature store.
+
+    Companies already processed with the same rules since their last import are
+    skipped, unless `force` is set: their stored data is returned as it is and
+    they are counted in `skipped_records`, or the `X-Skipped-Records` header
+    when processing URLs without streaming them.
+
+    With `?background=true` the processing is queued instead, split into chunks
+    drained by the workers (`python -m worker`), and the job is returned right away.
+
     Args:
         request: The request to process the company.
+        background: Queue the processing for the workers, returning the job.
+        accept: The media types accepted for the response.
     """
-    processed_data = await process_companies(
-        process_request.urls, process_request.rules, db_session
-    )
+    selector, mode, force = process_request.selector, process_request.mode, process_request.force
+    if process_request.rule_set_id is not None:
+        plan = await get_rule_set_plan(process_request.rule_set_id, db_session)
+    else:
+        plan = compile_rules(process_request.rules)
+    rule_set_headers = {RULE_SET_HEADER: plan.rules_hash}
+    response.headers.update(rule_set_headers)
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await create_processing_job(
+            plan,
+            db_session,
+            process_request.rules,
+            process_request.rule_set_id,
+            process_request.urls,
+            selector,
+            mode,
+            force,
+        )
+    if selector is not None:
+        if accepts_ndjson(accept):
+            streaming_response = ndjson_session_response(
+                lambda session: iter_selected_companies(selector, plan, session, mode, force)
+            )
+            streaming_response.headers.update(rule_set_headers)
+            return streaming_response
+        return await process_selected_companies(selector, plan, db_session, mode, force)
+
+    urls = process_request.urls
+    if accepts_ndjson(accept):
+        # Checked before the response starts, the stream can't turn into an error
+        await check_companies_found(urls, db_session)
+        streaming_response = ndjson_session_response(
+            lambda session: iter_companies(urls, plan, session, mode, force)
+        )
+        streaming_response.headers.update(rule_set_headers)
+        return streaming_response
+
+    processed_data, skipped_records = await process_companies(urls, plan, db_session, mode, force)
+    response.headers.update({**rule_set_headers, SKIPPED_RECORDS_HEADER: str(skipped_records)})
     return processed_data
 
 
+@router.get("/processing_jobs/{job_id}")
+async def processing_job(job_id: uuid.UUID, db_session: DBSession):
+    """Get the progress of a queued processing job.
+
+    Args:
+        job_id: The processing job id.
+        db_session: Database session.
+    """
+    return await get_processing_job(job_id, db_session)
+
+
 @router.get("/get_companies")
-async def get_companies(db_session: DBSession):
-    """Get all companies.
+async def get_companies(
+    request: Request,
+    db_session: ReadDBSession,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: int | None = None,
+    rule_set_id: str | None = None,
+    accept: Annotated[str | None, Header()] = None,
+):
+    """Get the processed companies, a page at a time.
+
+    Any other query parameter filters the companies on a feature value, e.g.
+    `?is_saas_feature=1`; values are read as JSON when they parse as such. With
+    a `rule_set_id` the features computed with that rule set are read from the
+    feature store, rather than the latest processed data of each company. With
+    `Accept: application/x-ndjson` every matching company is streamed from the
+    database, one JSON object per line, without pagination.
 
     Args:
         db_session: Database session.
+        limit: The maximum number of companies in the page.
+        cursor: The `next_cursor` of the previous page.
+        rule_set_id: The rule set to read the features of.
+        accept: The media types accepted for the response.
     """
-    companies = await get_processed_companies(db_session)
+    filters = _query_filters(request, ("limit", "cursor", "rule_set_id"))
+    if accepts_ndjson(accept):
+        return ndjson_session_response(
+            lambda session: iter_processed_companies(session, filters, rule_set_id), read_only=True
+        )
+
+    companies = await get_processed_companies(db_session, limit, cursor, filters, rule_set_id)
     return companies
+
+
+@router.get("/feature_counts")
+async def feature_counts(
+    request: Request,
+    db_session: ReadDBSession,
+    rule_set_id: str,
+    group_by: str,
+):
+    """Count the companies processed with a rule set by value of a feature.
+
+    Any other query parameter filters the companies on a feature value, e.g.
+    `?group_by=usa_based_feature&is_saas_feature=1` counts the SaaS companies
+    by `usa_based_feature`.
+
+    Args:
+        db_session: Database session.
+        rule_set_id: The rule set the features were computed with.
+        group_by: The feature to group the companies by.
+    """
+    filters = _query_filters(request, ("rule_set_id", "group_by"))
+    return await count_features(db_session, rule_set_id, group_by, filters)
+
+
+def _query_filters(request: Request, parameters: Tuple[str, ...]) -> Dict[str, Any]:
+    """Get the feature filters of a request, every query parameter but the endpoint's own."""
+    return {
+        name: _filter_value(value)
+        for name, value in request.query_params.items()
+        if name not in parameters
+    }
+
+
+def _filter_value(value: str) -> Any:
+    """Read a filter query parameter as JSON, or as a plain string when it is not JSON."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
@@ -1,9 +1,12 @@
 from typing import Annotated
 
-from db.session import get_session
+from db.session import get_read_session, get_session
 from fastapi import Depends
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 # Type alias for easier injection in FastAPI endpoints
 DBSession = Annotated[AsyncSession, Depends(get_session)]
+
+# Session for read-only endpoints, on the read replica when it is usable
+ReadDBSession = Annotated[AsyncSession, Depends(get_read_session)]
@@ -2,7 +2,11 @@
 
 from api.deps import DBSession
 from core.config import settings
+from core.metrics import render
+from db.session import get_pool_stats
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlmodel import select, text
 
 
@@ -20,3 +24,15 @@ async def health(db_session: DBSession):
         "status": "ok",
         "version": settings.VERSION,
     }
+
+
+@router.get("/health/db_pool")
+async def db_pool():
+    """Get the state of the database connection pools, the read replica's when there is one."""
+    return {**get_pool_stats(), "replica": get_pool_stats(read=True)}
+
+
+@router.get("/metrics")
+async def metrics():
+    """Get the metrics in the Prometheus text format, of every process in multiprocess mode."""
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
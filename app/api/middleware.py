@@ -0,0 +1,133 @@
+"""Request middlewares"""
+
+import asyncio
+import cProfile
+import datetime
+import hmac
+import os
+import re
+import time
+import uuid
+
+from core.config import settings
+from core.logging import get_logger
+from db.query_stats import QueryStats, track_queries
+from starlette.datastructures import Headers, MutableHeaders
+
+
+logger = get_logger(__name__)
+
+# Request header enabling the profiling of a request, set to `PROFILE_TOKEN`
+PROFILE_HEADER = "X-Profile-Token"
+# Response header naming the file the profile of the request was saved to
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+# Whether a request is being profiled, only one profiler can be active at a time
+_profiling = False
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware counting the SQL queries of each request and the time spent in them.
+
+    They are returned in the `Server-Timing` header, counted until the response
+    starts, and a warning is logged when a request runs more than
+    `SLOW_REQUEST_QUERY_COUNT` queries or spends more than `SLOW_REQUEST_DB_TIME`
+    seconds in the database. A request with the `X-Profile-Token` header set to
+    `PROFILE_TOKEN` is profiled with cProfile, the profile is saved in `PROFILE_DIR`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        profile_path = _profile_path(scope)
+        with track_queries() as stats:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", _server_timing(stats, start))
+                    if profile_path is not None:
+                        headers.append(PROFILE_FILE_HEADER, os.path.basename(profile_path))
+                await send(message)
+
+            if profile_path is None:
+                try:
+                    await self.app(scope, receive, send_with_timing)
+                finally:
+                    _check_thresholds(scope, stats, start)
+                return
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                profiler.disable()
+                _check_thresholds(scope, stats, start)
+                await _save_profile(profiler, profile_path)
+
+
+def _profile_path(scope) -> str | None:
+    """Get where to save the profile of a request, None when it is not to be profiled.
+
+    Only requests carrying the profile token are profiled, one at a time: the
+    profiler records every task of the event loop while it is enabled, the
+    other requests' included.
+    """
+    global _profiling
+    if not settings.PROFILE_TOKEN or _profiling:
+        return None
+    token = Headers(scope=scope).get(PROFILE_HEADER)
+    # Compared as bytes, `compare_digest` rejects strings with non-ASCII characters. Header
+    # values are decoded as latin-1, encoding them back gives the bytes that were sent
+    if token is None or not hmac.compare_digest(
+        token.encode("latin-1"), settings.PROFILE_TOKEN.encode()
+    ):
+        return None
+
+    _profiling = True
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    filename = f"{timestamp}-{scope['method']}-{path}-{uuid.uuid4().hex[:8]}.prof"
+    return os.path.join(settings.PROFILE_DIR, filename)
+
+
+async def _save_profile(profiler: cProfile.Profile, path: str) -> None:
+    """Write a profile in the pstats format, readable by `python -m pstats` or snakeviz."""
+    global _profiling
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await asyncio.to_thread(profiler.dump_stats, path)
+        logger.info(f"Request profile saved to {path}")
+    except Exception as e:
+        logger.error(f"Saving the request profile to {path} failed: {e}")
+    finally:
+        _profiling = False
+
+
+def _server_timing(stats: QueryStats, start: float) -> str:
+    """Format the database and total durations of a request, in milliseconds."""
+    total = time.perf_counter() - start
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"total;dur={total * 1000:.1f}"
+    )
+
+
+def _check_thresholds(scope, stats: QueryStats, start: float) -> None:
+    """Log a warning when a request ran too many queries or spent too long in the database."""
+    too_many = 0 < settings.SLOW_REQUEST_QUERY_COUNT < stats.count
+    too_long = 0 < settings.SLOW_REQUEST_DB_TIME < stats.duration
+    if too_many or too_long:
+        route = scope.get("route")
+        logger.warning(
+            f"{scope['method']} {getattr(route, 'path', scope['path'])} ran {stats.count} "
+            f"queries in {stats.duration:.3f}s, "
+            f"{time.perf_counter() - start:.3f}s in total"
+        )
@@ -0,0 +1,45 @@
+"""Newline delimited JSON streaming responses"""
+
+import json
+from typing import Any, AsyncIterator, Callable, Dict
+
+from db.session import get_read_session_maker, get_session_maker
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def accepts_ndjson(accept: str | None) -> bool:
+    """Tell whether an `Accept` header asks for NDJSON."""
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+def ndjson_session_response(
+    stream: Callable[[AsyncSession], AsyncIterator[Dict[str, Any]]], read_only: bool = False
+) -> StreamingResponse:
+    """Stream items as they are produced from the database, one JSON object per line.
+
+    The response body is sent after the request dependencies are closed, so the
+    stream gets a database session of its own, open for as long as the body.
+
+    Args:
+        stream: Produces the items to stream from a database session.
+        read_only: Whether the stream only reads, and can use the read replica.
+
+    Returns:
+        The streaming response.
+    """
+
+    async def lines() -> AsyncIterator[bytes]:
+        session_maker = await get_read_session_maker() if read_only else get_session_maker()
+        async with session_maker() as db_session:
+            async for item in stream(db_session):
+                yield _ndjson_line(item)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _ndjson_line(item: Dict[str, Any]) -> bytes:
+    return (json.dumps(item) + "\n").encode("utf-8")
@@ -1,7 +1,8 @@
-from api import companies, health
+from api import companies, health, rule_sets
 from fastapi import FastAPI
 
 
 def register_routes(app: FastAPI) -> None:
     app.include_router(companies.router)
     app.include_router(health.router)
+    app.include_router(rule_sets.router)
@@ -0,0 +1,37 @@
+"""Rule sets API"""
+
+import uuid
+
+from api.deps import DBSession
+from api.schema import RuleSetRequest
+from fastapi import APIRouter, status
+from service.rule_sets import get_rule_set, register_rule_set
+
+
+router = APIRouter(tags=["rule_sets"])
+
+
+@router.post("/rule_sets", status_code=status.HTTP_201_CREATED)
+async def create_rule_set(rule_set_request: RuleSetRequest, db_session: DBSession):
+    """Register rules as the next version of a named rule set.
+
+    The returned `rule_set_id` identifies the version; companies are then
+    processed with `{"rule_set_id": ...}` instead of the whole rule list, and
+    their features stored under the `rules_hash`, the content hash of the rules.
+
+    Args:
+        rule_set_request: The name of the rule set and its rules.
+        db_session: Database session.
+    """
+    return await register_rule_set(rule_set_request, db_session)
+
+
+@router.get("/rule_sets/{rule_set_id}")
+async def rule_set(rule_set_id: uuid.UUID, db_session: DBSession):
+    """Get a registered rule set version.
+
+    Args:
+        rule_set_id: The rule set id.
+        db_session: Database session.
+    """
+    return await get_rule_set(rule_set_id, db_session)
@@ -1,10 +1,32 @@
 """API Pydantic schemas"""
 
+import datetime
+import enum
+import uuid
 from typing import Any, Dict, List
 
 import pydantic
 
 
+class ImportMode(str, enum.Enum):
+    """How imported companies are written"""
+
+    # Insert every row, rows with an already imported URL fail
+    insert = "insert"
+    # Insert new URLs and update the existing ones whose content changed
+    upsert = "upsert"
+
+
+class ProcessMode(str, enum.Enum):
+    """Where company features are computed"""
+
+    # Load the companies and evaluate the rules in Python
+    python = "python"
+    # Evaluate the rules and store the features in a single SQL statement,
+    # falling back to Python when some rule can't be translated to SQL
+    database = "database"
+
+
 class RuleOperation(pydantic.BaseModel):
     """Schema for rule operation"""
 
@@ -23,14 +45,139 @@ class Rule(pydantic.BaseModel):
     default: int
 
 
+class CompanySelector(pydantic.BaseModel):
+    """Schema for selecting companies by their data, an empty selector selects every company"""
+
+    industry: str | None = None
+    # Inclusive range of founding years
+    founded_year_from: int | None = None
+    founded_year_to: int | None = None
+    imported_since: datetime.datetime | None = None
+
+
 class ProcessCompanyRequest(pydantic.BaseModel):
-    """Request schema for processing companies"""
+    """Request schema for processing companies, either a list of URLs or a selector,
+    with either inline rules or a registered rule set"""
+
+    urls: List[str] | None = None
+    selector: CompanySelector | None = None
+    rules: List[Rule] | None = None
+    rule_set_id: uuid.UUID | None = None
+    mode: ProcessMode = ProcessMode.python
+    # Process the companies again even when neither they nor the rules changed
+    force: bool = False
+
+    @pydantic.model_validator(mode="after")
+    def check_companies(self) -> "ProcessCompanyRequest":
+        if (self.urls is None) == (self.selector is None):
+            raise ValueError("Exactly one of urls and selector is required")
+        if (self.rules is None) == (self.rule_set_id is None):
+            raise ValueError("Exactly one of rules and rule_set_id is required")
+        return self
 
-    urls: List[str]
+
+class RuleSetRequest(pydantic.BaseModel):
+    """Request schema for registering a version of a rule set"""
+
+    name: str
     rules: List[Rule]
 
 
+class FailedRecord(pydantic.BaseModel):
+    """Schema for a record that could not be imported"""
+
+    row: int
+    error: str
+
+
+class ImportCompanyOutput(pydantic.BaseModel):
+    """Output schema for imported companies"""
+
+    imported_records: int = 0
+    unchanged_records: int = 0
+    failed_count: int = 0
+    # The first failed rows, all of them unless the import keeps a limited number
+    failed_records: List[FailedRecord] = []
+
+
+class ImportJobOutput(pydantic.BaseModel):
+    """Output schema for a background import job"""
+
+    job_id: uuid.UUID
+    status: str
+    rows_parsed: int
+    rows_imported: int
+    rows_unchanged: int
+    rows_failed: int
+    rows_per_second: float | None = None
+    failed_records: List[FailedRecord] = []
+    error: str | None = None
+    created_at: datetime.datetime
+    started_at: datetime.datetime | None = None
+    finished_at: datetime.datetime | None = None
+
+
+class ProcessCompaniesSummary(pydantic.BaseModel):
+    """Output schema for companies processed by selector"""
+
+    processed_records: int
+    # Companies left as they are, already processed with the same rules since their last change
+    skipped_records: int = 0
+    # Rule set the features are stored under in the feature store
+    rule_set_id: str | None = None
+
+
+class ProcessingJobOutput(pydantic.BaseModel):
+    """Output schema for a queued processing job"""
+
+    job_id: uuid.UUID
+    status: str
+    rule_set_id: str
+    chunks_total: int
+    chunks_completed: int
+    chunks_failed: int
+    processed_records: int
+    skipped_records: int
+    created_at: datetime.datetime
+    started_at: datetime.datetime | None = None
+    finished_at: datetime.datetime | None = None
+
+
 class ProcessedCompaniesOutput(pydantic.RootModel):
     """Output schema for processed companies"""
 
     root: List[Dict[str, Any]]
+
+
+class ProcessedCompaniesPage(pydantic.BaseModel):
+    """Output schema for a page of processed companies"""
+
+    data: List[Dict[str, Any]]
+    # Cursor of the next page, None on the last page
+    next_cursor: int | None = None
+
+
+class RuleSetOutput(pydantic.BaseModel):
+    """Output schema for a registered rule set version"""
+
+    # The id of the version, to process companies by
+    rule_set_id: uuid.UUID
+    # Content hash of the rules, the rule set the features are stored under
+    rules_hash: str
+    name: str
+    version: int
+    rules: List[Rule]
+    created_at: datetime.datetime
+
+
+class FeatureCount(pydantic.BaseModel):
+    """Output schema for the number of companies with a feature value"""
+
+    value: int
+    companies: int
+
+
+class FeatureCountsOutput(pydantic.RootModel):
+    """Output schema for the number of companies by feature value"""
+
+    root: List[FeatureCount]
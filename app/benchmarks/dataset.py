@@ -0,0 +1,183 @@
+"""Generate a synthetic company dataset, in the schema of `resources/company-dataset.*`.
+
+The same rows, seed and format always give the same file, so runs of the
+benchmarks are comparable across releases. Run from the app directory:
+
+    python -m benchmarks.dataset --rows 100000 [--format csv|json|ndjson] [--seed 0] -o companies.csv
+"""
+
+import argparse
+import csv
+import json
+import random
+from typing import Any, Dict, Iterable, Iterator, TextIO
+
+
+FORMATS = ("csv", "json", "ndjson")
+
+CSV_COLUMNS = [
+    "company_name",
+    "url",
+    "founded_year",
+    "total_employees",
+    "headquarters_city",
+    "employee_locations",
+    "employee_growth_2Y",
+    "employee_growth_1Y",
+    "employee_growth_6M",
+    "description",
+    "industry",
+]
+
+# fmt: off
+_NAME_PREFIXES = [
+    "Cloud", "Data", "Agile", "Quantum", "Nova", "Bright", "Smart", "Green", "Blue", "Rapid",
+    "Secure", "Health", "Fin", "Edu", "Agro", "Urban", "Deep", "Open", "Core", "Peak",
+]
+_NAME_SUFFIXES = [
+    "Logic", "Sync", "Works", "Labs", "Stack", "Flow", "Vision", "Ops", "Hub", "Scale",
+    "Bridge", "Forge", "Pulse", "Grid", "Path", "Wave", "Mind", "Sense", "Point", "Shift",
+]
+_COMPANY_TYPES = ["Technologies", "Labs", "Inc", "Systems", "Solutions", "Group", "AI", ""]
+_TLDS = ["com", "io", "ai", "tech", "cloud", "app", "co"]
+_INDUSTRIES = [
+    "Software", "Data Integration", "Cybersecurity", "Healthcare", "Fintech", "Education",
+    "Agriculture", "Logistics", "Manufacturing", "Retail", "Energy", "Marketing",
+]
+_CITIES = [
+    "San Francisco (USA)", "New York (USA)", "Boston (USA)", "Austin (USA)", "Seattle (USA)",
+    "Toronto (Canada)", "London (UK)", "Berlin (Germany)", "Paris (France)", "Lisbon (Portugal)",
+    "Bangalore (India)", "Singapore (Singapore)", "Sydney (Australia)", "Sao Paulo (Brazil)",
+]
+_COUNTRIES = [
+    "USA", "Canada", "UK", "Germany", "France", "Portugal", "India", "Singapore", "Australia",
+    "Brazil",
+]
+_PRODUCTS = [
+    "Project management platform", "Enterprise data integration platform",
+    "Threat detection service", "Patient scheduling software", "Payments infrastructure",
+    "Online learning marketplace", "Crop monitoring sensors", "Fleet routing engine",
+    "Predictive maintenance toolkit", "Point of sale hardware", "Energy trading desk",
+    "Campaign analytics suite",
+]
+_FEATURES = [
+    "with integrated resource allocation", "enabling real-time synchronization across systems",
+    "for mid-sized enterprises", "built on machine learning models",
+    "with on-premise deployment", "serving hospitals and clinics", "for logistics operators",
+    "with a mobile companion app", "for regulated industries", "with open APIs",
+]
+# About half of the descriptions mention a pricing model the SaaS classifier looks for
+_PRICING = [
+    "subscription-based pricing with tiered plans", "monthly subscription with usage-based fees",
+    "per-seat annual licensing", "cloud-based software as a service",
+    "one-time purchase with paid support", "project-based consulting fees",
+    "hardware sales through resellers", "commission on transactions",
+]
+# fmt: on
+
+
+def generate_companies(rows: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Generate companies in the JSON schema of the sample dataset.
+
+    Args:
+        rows: The number of companies.
+        seed: The seed of the generator, the same seed gives the same companies.
+
+    Yields:
+        Each company, with a URL unique in the dataset.
+    """
+    rng = random.Random(seed)
+    for index in range(rows):
+        prefix, suffix = rng.choice(_NAME_PREFIXES), rng.choice(_NAME_SUFFIXES)
+        company_type = rng.choice(_COMPANY_TYPES)
+        total_employees = int(rng.lognormvariate(4, 1.5)) + 1
+        locations = _employee_locations(rng, total_employees)
+        yield {
+            "company_name": f"{prefix}{suffix} {company_type}".strip(),
+            "url": f"https://www.{prefix.lower()}{suffix.lower()}{index}.{rng.choice(_TLDS)}",
+            "founded_year": rng.randint(1950, 2024),
+            "total_employees": total_employees,
+            "headquarters_city": rng.choice(_CITIES),
+            "employee_locations": locations,
+            "employee_growth": {
+                "2Y": round(rng.uniform(-20, 150), 1),
+                "1Y": round(rng.uniform(-10, 80), 1),
+                "6M": round(rng.uniform(-5, 40), 1),
+            },
+            "description": (
+                f"{rng.choice(_PRODUCTS)} {rng.choice(_FEATURES)}, {rng.choice(_PRICING)}"
+            ),
+            "industry": rng.choice(_INDUSTRIES),
+        }
+
+
+def write_dataset(output: TextIO, rows: int, seed: int = 0, file_format: str = "csv") -> None:
+    """Write a generated dataset, one company at a time so any size fits in memory.
+
+    Args:
+        output: The text file to write to, opened with `newline=""` for CSV.
+        rows: The number of companies.
+        seed: The seed of the generator.
+        file_format: "csv", "json" (an array) or "ndjson".
+    """
+    write_companies(output, generate_companies(rows, seed), file_format)
+
+
+def write_companies(
+    output: TextIO, companies: Iterable[Dict[str, Any]], file_format: str = "csv"
+) -> None:
+    """Write generated companies in a dataset format, see `write_dataset`."""
+    if file_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for company in companies:
+            writer.writerow(to_csv_row(company))
+    elif file_format == "json":
+        output.write("[")
+        for index, company in enumerate(companies):
+            output.write(",\n" if index else "\n")
+            output.write(json.dumps(company))
+        output.write("\n]\n")
+    elif file_format == "ndjson":
+        for company in companies:
+            output.write(json.dumps(company) + "\n")
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def to_csv_row(company: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a generated company into the columns of the CSV dataset."""
+    row = {key: value for key, value in company.items() if key != "employee_growth"}
+    row["employee_locations"] = json.dumps(company["employee_locations"])
+    for period, growth in company["employee_growth"].items():
+        row[f"employee_growth_{period}"] = growth
+    return row
+
+
+def _employee_locations(rng: random.Random, total_employees: int) -> Dict[str, int]:
+    """Split the employees over up to four countries, the first one holding the most."""
+    countries = rng.sample(_COUNTRIES, rng.randint(1, 4))
+    locations = {}
+    remaining = total_employees
+    for country in countries[:-1]:
+        employees = remaining * rng.randint(50, 90) // 100
+        locations[country] = employees
+        remaining -= employees
+    locations[countries[-1]] = remaining
+    return locations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    with open(args.output, "w", newline="") as f:
+        write_dataset(f, args.rows, args.seed, args.format)
+
+
+if __name__ == "__main__":
+    main()
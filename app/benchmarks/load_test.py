@@ -0,0 +1,389 @@
+"""End-to-end load test of the import, processing and read endpoints.
+
+Starts the app locally with uvicorn, on a fresh SQLite database by default or
+on the database given with `--database-url` (use a scratch one), imports a
+generated dataset and drives the endpoints at the given concurrency. The report
+is written as JSON: rows/s, latency percentiles and peak RSS of each scenario.
+Run from the app directory:
+
+    python -m benchmarks.load_test --rows 10000 [--concurrency 4] [--database-url URL]
+        [--in-process] [-o report.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, redirect_stdout
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+from benchmarks.dataset import generate_companies, write_companies
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy.engine import make_url
+
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+RULES_PATH = os.path.join(APP_DIR, "tests", "rules.json")
+SCENARIOS = ("import", "process", "get")
+
+# Seconds to wait for the started app to answer /health
+_STARTUP_TIMEOUT = 60.0
+
+# A request of a scenario, returning the number of rows it handled and of rows that failed
+Request = Callable[[httpx.AsyncClient], Awaitable[Tuple[int, int]]]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, requests: List[Request], concurrency: int
+) -> Dict[str, Any]:
+    """Send requests with at most `concurrency` of them in flight.
+
+    Args:
+        client: The client of the app.
+        requests: The requests to send.
+        concurrency: The number of requests in flight at once.
+
+    Returns:
+        The number of requests, failed requests, rows and failed rows, the rows
+        handled per second and the latency percentiles of the requests, in milliseconds.
+    """
+    pending = iter(requests)
+    latencies: List[float] = []
+    totals = {"rows": 0, "failed_rows": 0, "errors": 0}
+
+    async def send() -> None:
+        for request in pending:
+            started = time.perf_counter()
+            try:
+                # Awaited first, += would read the total before awaiting
+                rows, failed_rows = await request(client)
+                totals["rows"] += rows
+                totals["failed_rows"] += failed_rows
+            except httpx.HTTPError as e:
+                totals["errors"] += 1
+                print(f"Request failed: {e}", file=sys.stderr)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    return {
+        "requests": len(requests),
+        "errors": totals["errors"],
+        "rows": totals["rows"],
+        "failed_rows": totals["failed_rows"],
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(totals["rows"] / seconds, 1) if seconds else None,
+        "latency_ms": _latency_percentiles(latencies),
+    }
+
+
+def import_requests(directory: str, rows: int, files: int, seed: int) -> List[Request]:
+    """Write the generated dataset as CSV files of about equal size, one import request per file."""
+    datasets = []
+    rows_per_file = math.ceil(rows / files)
+    companies = generate_companies(rows, seed)
+    for index in range(files):
+        path = os.path.join(directory, f"companies-{index}.csv")
+        with open(path, "w", newline="") as f:
+            write_companies(f, itertools.islice(companies, rows_per_file), "csv")
+        datasets.append(path)
+
+    def request(path: str) -> Request:
+        async def send(client: httpx.AsyncClient) -> Tuple[int, int]:
+            with open(path, "rb") as f:
+                response = await client.post(
+                    "/import_company_data", files={"file": (os.path.basename(path), f, "text/csv")}
+                )
+            response.raise_for_status()
+            result = response.json()
+            return result["imported_records"], len(result["failed_records"])
+
+        return send
+
+    return [request(path) for path in datasets]
+
+
+def process_requests(
+    rows: int, seed: int, batch_size: int, mode: str, force: bool
+) -> List[Request]:
+    """Process every generated company, `batch_size` URLs per request."""
+    with open(RULES_PATH) as f:
+        rules = json.load(f)["rules"]
+    urls = [company["url"] for company in generate_companies(rows, seed)]
+
+    def request(batch: List[str]) -> Request:
+        async def send(client: httpx.AsyncClient) -> Tuple[int, int]:
+            response = await client.post(
+                "/process_company",
+                json={"urls": batch, "rules": rules, "mode": mode, "force": force},
+            )
+            response.raise_for_status()
+            return len(response.json()), 0
+
+        return send
+
+    return [request(urls[i : i + batch_size]) for i in range(0, len(urls), batch_size)]
+
+
+def get_requests(rows: int, seed: int, count: int, page_size: int) -> List[Request]:
+    """Read `count` pages of processed companies, starting at random cursors."""
+    rng = random.Random(seed)
+
+    def request(cursor: int) -> Request:
+        async def send(client: httpx.AsyncClient) -> Tuple[int, int]:
+            response = await client.get(
+                "/get_companies", params={"limit": page_size, "cursor": cursor}
+            )
+            response.raise_for_status()
+            return len(response.json()["data"]), 0
+
+        return send
+
+    return [request(rng.randint(0, max(rows - page_size, 0))) for _ in range(count)]
+
+
+@asynccontextmanager
+async def started_app(
+    database_url: str, in_process: bool
+) -> AsyncIterator[Tuple[httpx.AsyncClient, int | None]]:
+    """Migrate the database and start the app, yielding a client of it.
+
+    Args:
+        database_url: The URL the app connects to.
+        in_process: Run the app in this process through an ASGI transport rather
+            than in a uvicorn process, without any network overhead.
+
+    Yields:
+        A client sending requests to the app, and the pid of the uvicorn process.
+    """
+    migrate_url = make_url(database_url)
+    migrate_url = migrate_url.set(drivername=migrate_url.get_backend_name())
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=APP_DIR,
+        env={**os.environ, "POSTGRES_URL": migrate_url.render_as_string(hide_password=False)},
+        check=True,
+        capture_output=True,
+    )
+
+    timeout = httpx.Timeout(None)
+    if in_process:
+        from core.config import settings
+        from main import app
+
+        settings.POSTGRES_URL = database_url
+        async with AsyncExitStack() as stack:
+            # The app logs to the stdout it finds when starting, keep stdout for the report
+            with redirect_stdout(sys.stderr):
+                await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout)
+            )
+            yield client, None
+        return
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=APP_DIR,
+        env={**os.environ, "POSTGRES_URL": database_url},
+        stdout=sys.stderr,
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=timeout
+        ) as client:
+            await _wait_until_healthy(client, server)
+            yield client, server.pid
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the scenarios and build the report."""
+    with tempfile.TemporaryDirectory(prefix="telescope-load-test-") as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{directory}/load_test.db"
+        scenarios: Dict[str, Any] = {}
+        async with started_app(database_url, args.in_process) as (client, server_pid):
+            if "import" in args.scenarios:
+                requests = import_requests(directory, args.rows, args.import_files, args.seed)
+                scenarios["import"] = await run_scenario(client, requests, args.concurrency)
+            if "process" in args.scenarios:
+                requests = process_requests(
+                    args.rows, args.seed, args.process_batch, args.process_mode, args.force
+                )
+                evaluated_before = await _rules_evaluated(client)
+                scenarios["process"] = await run_scenario(client, requests, args.concurrency)
+                scenarios["process"]["rules_evaluated"] = _check_rules_evaluated(
+                    evaluated_before, await _rules_evaluated(client), args.process_mode
+                )
+            if "get" in args.scenarios:
+                requests = get_requests(args.rows, args.seed, args.get_requests, args.page_size)
+                scenarios["get"] = await run_scenario(client, requests, args.concurrency)
+            # Read before the app stops, the app is this process when run in process
+            server_rss = _peak_rss_mb(server_pid)
+
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": make_url(database_url).get_backend_name(),
+        },
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "database_url")
+        },
+        "scenarios": scenarios,
+        "peak_rss_mb": {"server": server_rss, "client": _peak_rss_mb()},
+    }
+
+
+async def _rules_evaluated(client: httpx.AsyncClient) -> Dict[str, float]:
+    """Read the rule evaluations the app counted so far, by mode, from its metrics."""
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return {
+        sample.labels["mode"]: sample.value
+        for family in text_string_to_metric_families(response.text)
+        if family.name == "telescope_rules_evaluated"
+        for sample in family.samples
+        if sample.name == "telescope_rules_evaluated_total"
+    }
+
+
+def _check_rules_evaluated(
+    before: Dict[str, float], after: Dict[str, float], mode: str
+) -> Dict[str, float]:
+    """Get the rule evaluations of a scenario by mode, checking they all ran in the mode asked for.
+
+    Raises:
+        RuntimeError: If rules were evaluated in another mode.
+    """
+    evaluated = {name: value - before.get(name, 0) for name, value in after.items()}
+    other_modes = [name for name, value in evaluated.items() if name != mode and value]
+    if other_modes:
+        raise RuntimeError(f"Rules were evaluated in {', '.join(other_modes)} mode, not {mode}")
+    return evaluated
+
+
+async def _wait_until_healthy(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    """Wait for the started app to answer /health."""
+    deadline = time.monotonic() + _STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The app exited with code {server.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"The app did not start within {_STARTUP_TIMEOUT:.0f}s")
+
+
+def _latency_percentiles(latencies: List[float]) -> Dict[str, float | None]:
+    """Get the nearest-rank p50, p95 and p99 and the maximum of latencies, in milliseconds."""
+    ordered = sorted(latencies)
+    percentiles: Dict[str, float | None] = {}
+    for name, percentile in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)):
+        if not ordered:
+            percentiles[name] = None
+            continue
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        percentiles[name] = round(ordered[rank - 1] * 1000, 2)
+    return percentiles
+
+
+def _peak_rss_mb(pid: int | None = None) -> float | None:
+    """Get the peak resident memory of a process, this one by default, in MiB.
+
+    The peak of another process is read from /proc, None where there is none.
+    """
+    if pid is None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=10_000, help="companies to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument(
+        "--import-files", type=int, default=10, help="files the import is split into"
+    )
+    parser.add_argument("--process-batch", type=int, default=100, help="URLs per process request")
+    parser.add_argument("--process-mode", choices=("python", "database"), default="python")
+    parser.add_argument("--force", action="store_true", help="process unchanged companies too")
+    parser.add_argument("--get-requests", type=int, default=200, help="pages to read")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--database-url", help="a scratch database, a new SQLite file by default")
+    parser.add_argument("--in-process", action="store_true", help="run the app in this process")
+    parser.add_argument("-o", "--output", help="the JSON report file, stdout by default")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
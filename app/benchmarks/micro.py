@@ -0,0 +1,264 @@
+"""Microbenchmarks of the functions run for every row, checked against stored baselines.
+
+Each function runs on generated companies, see `benchmarks.dataset`. Timings
+are compared relative to a fixed calibration workload timed alongside, so that
+baselines saved on one machine can be checked on another and a noisy machine
+does not fail the check. Run from the app directory:
+
+    python -m benchmarks.micro [--tolerance 25]   # exits with 1 on a regression
+    python -m benchmarks.micro --save             # stores the timings as the baselines
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import timeit
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from api.schema import ProcessedCompaniesOutput, Rule
+from benchmarks.dataset import generate_companies, write_companies
+from core.config import settings
+from models.companies import CompanyData
+from service.companies import (
+    _build_company_record,
+    _parse_csv,
+    _parse_json,
+    is_saas_company,
+)
+from service.rules import compile_rules, get_feature_value
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "rules.json")
+
+# A benchmark builds its inputs for a number of rows, and returns the function to time
+Benchmark = Callable[[int], Callable[[], Any]]
+
+# Seconds a timed sample lasts at least, shorter benchmarks are run several times per sample
+_MIN_SAMPLE_TIME = 0.05
+
+
+def bench_is_saas_company(rows: int) -> Callable[[], Any]:
+    companies = list(generate_companies(rows))
+
+    def run():
+        for company in companies:
+            is_saas_company(company["industry"], company["description"])
+
+    return run
+
+
+def bench_get_feature_value(rows: int) -> Callable[[], Any]:
+    companies, rules = _companies(rows), _rules()
+
+    def run():
+        for company in companies:
+            for rule in rules:
+                get_feature_value(company, rule)
+
+    return run
+
+
+def bench_rule_plan_evaluate(rows: int) -> Callable[[], Any]:
+    companies, plan = _companies(rows), compile_rules(_rules())
+
+    def run():
+        for company in companies:
+            plan.evaluate(company)
+
+    return run
+
+
+def bench_rule_plan_evaluate_batch(rows: int) -> Callable[[], Any]:
+    companies, plan = _companies(rows), compile_rules(_rules())
+    return lambda: plan.evaluate_batch(companies)
+
+
+def bench_parse_csv(rows: int) -> Callable[[], Any]:
+    output = io.StringIO(newline="")
+    write_companies(output, generate_companies(rows), "csv")
+    return _parse(_parse_csv, output.getvalue().encode())
+
+
+def bench_parse_json(rows: int) -> Callable[[], Any]:
+    output = io.StringIO()
+    write_companies(output, generate_companies(rows), "json")
+    return _parse(_parse_json, output.getvalue().encode())
+
+
+def bench_processed_companies_output(rows: int) -> Callable[[], Any]:
+    companies, plan = _companies(rows), compile_rules(_rules())
+    data = [
+        {"company_name": company.name, **features}
+        for company, features in zip(companies, plan.evaluate_batch(companies))
+    ]
+    return lambda: ProcessedCompaniesOutput(root=data).model_dump_json()
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "is_saas_company": bench_is_saas_company,
+    "get_feature_value": bench_get_feature_value,
+    "rule_plan_evaluate": bench_rule_plan_evaluate,
+    "rule_plan_evaluate_batch": bench_rule_plan_evaluate_batch,
+    "parse_csv": bench_parse_csv,
+    "parse_json": bench_parse_json,
+    "processed_companies_output": bench_processed_companies_output,
+}
+
+
+def run_benchmarks(names: List[str], rows: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time benchmarks against the calibration workload.
+
+    Every run of a benchmark is bracketed by two runs of the calibration
+    workload, and the median of the `repeat` ratios is kept. The machine slowing
+    down or speeding up during a run then changes both sides of the ratio alike.
+
+    Args:
+        names: The benchmarks to run.
+        rows: The number of rows each benchmark runs on.
+        repeat: The number of timed runs of each benchmark.
+
+    Returns:
+        For each benchmark, its median time per row in nanoseconds and its
+        median time relative to the calibration workload, per 1000 rows.
+    """
+    results = {}
+    for name in names:
+        run = BENCHMARKS[name](rows)
+        # Warm up caches and lazily compiled matchers before timing
+        number = math.ceil(_MIN_SAMPLE_TIME / timeit.timeit(run, number=1))
+        calibration_number = math.ceil(
+            _MIN_SAMPLE_TIME / timeit.timeit(_calibration_workload, number=1)
+        )
+        durations, ratios = [], []
+        for _ in range(repeat):
+            before = timeit.timeit(_calibration_workload, number=calibration_number)
+            duration = timeit.timeit(run, number=number) / number
+            after = timeit.timeit(_calibration_workload, number=calibration_number)
+            durations.append(duration)
+            ratios.append(duration / ((before + after) / 2 / calibration_number))
+        results[name] = {
+            "ns_per_row": round(statistics.median(durations) / rows * 1e9),
+            "relative": round(statistics.median(ratios) / rows * 1000, 4),
+        }
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baselines: Dict[str, Any], tolerance: float
+) -> Tuple[List[str], List[str]]:
+    """Compare the relative timings with the baselines.
+
+    Args:
+        results: The timings of each benchmark, see `run_benchmarks`.
+        baselines: The stored baselines.
+        tolerance: The percentage a benchmark may be slower than its baseline by.
+
+    Returns:
+        A report line per benchmark, and the names of the benchmarks that regressed.
+    """
+    lines, regressions = [], []
+    for name, result in results.items():
+        timing = f"{name:>28}: {result['ns_per_row']:10,} ns/row"
+        baseline = baselines["benchmarks"].get(name)
+        if baseline is None:
+            lines.append(f"{timing}  (no baseline)")
+            continue
+        change = (result["relative"] / baseline["relative"] - 1) * 100
+        status = ""
+        if change > tolerance:
+            regressions.append(name)
+            status = "  REGRESSION"
+        lines.append(
+            f"{timing}  baseline {baseline['ns_per_row']:10,}  {change:+6.1f}% relative{status}"
+        )
+    return lines, regressions
+
+
+def _calibration_workload() -> List[str]:
+    """A fixed pure Python workload, dictionary and string operations like the benchmarks'."""
+    values = {}
+    for index in range(10_000):
+        values[f"key{index}"] = str(index * 7).lower() in "0123456789"
+    return sorted(values)
+
+
+def _companies(rows: int) -> List[CompanyData]:
+    """Build the companies an import of the generated rows would store."""
+    companies = []
+    for row in generate_companies(rows):
+        record = _build_company_record({**row, **_growth_columns(row)})
+        companies.append(CompanyData(**record))
+    return companies
+
+
+def _growth_columns(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {f"employee_growth_{period}": value for period, value in row["employee_growth"].items()}
+
+
+def _rules() -> List[Rule]:
+    with open(RULES_PATH) as f:
+        return [Rule.model_validate(rule) for rule in json.load(f)["rules"]]
+
+
+def _parse(
+    parser: Callable[[AsyncIterator[bytes]], AsyncIterator[Dict[str, Any]]], content: bytes
+) -> Callable[[], Any]:
+    """Time a parser on a file, fed in chunks of `IMPORT_CHUNK_SIZE` bytes like an upload."""
+    loop = asyncio.new_event_loop()
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(content), chunk_size):
+            yield content[start : start + chunk_size]
+
+    async def parse():
+        return [row async for row in parser(chunks())]
+
+    return lambda: loop.run_until_complete(parse())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument(
+        "--tolerance", type=float, default=25.0, help="percentage slower than the baseline allowed"
+    )
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--save", action="store_true", help="store the timings as the baselines")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.rows, args.repeat)
+
+    if args.save:
+        baselines: Dict[str, Any] = {"rows": args.rows, "benchmarks": {}}
+        if os.path.exists(BASELINES_PATH):
+            with open(BASELINES_PATH) as f:
+                baselines["benchmarks"] = json.load(f)["benchmarks"]
+        baselines["benchmarks"].update(results)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        for name, result in results.items():
+            print(f"{name:>28}: {result['ns_per_row']:10,} ns/row  saved")
+        return
+
+    with open(BASELINES_PATH) as f:
+        baselines = json.load(f)
+    lines, regressions = compare(results, baselines, args.tolerance)
+    print("\n".join(lines))
+    if regressions:
+        print(f"Regressed more than {args.tolerance:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
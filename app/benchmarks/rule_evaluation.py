@@ -0,0 +1,79 @@
+"""Benchmark the vectorized batch rule evaluation against the per company path.
+
+Run from the app directory:
+
+    python -m benchmarks.rule_evaluation [--rows 500000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import timeit
+from typing import List
+
+from api.schema import Rule
+from models.companies import CompanyData
+from service.rules import compile_rules
+
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "rules.json")
+
+
+def make_companies(rows: int) -> List[CompanyData]:
+    """Build companies with the inputs the sample rules reference."""
+    return [
+        CompanyData(
+            name=f"Company {index}",
+            url=f"https://www.company{index}.com",
+            founded_year=1950 + index % 75,
+            total_employees=index % 5000,
+            extras={
+                "company_age": 75 - index % 75,
+                "is_usa_based": index % 3 == 0,
+                "is_saas": index % 7 == 0,
+            },
+        )
+        for index in range(rows)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(RULES_PATH) as f:
+        rules = [Rule.model_validate(rule) for rule in json.load(f)["rules"]]
+    plan = compile_rules(rules)
+    companies = make_companies(args.rows)
+
+    per_company = [plan.evaluate(company) for company in companies]
+    batch = plan.evaluate_batch(companies)
+    differences = sum(1 for a, b in zip(per_company, batch) if a != b)
+
+    timings = {
+        "per_company": min(
+            timeit.repeat(
+                lambda: [plan.evaluate(company) for company in companies],
+                number=1,
+                repeat=args.repeat,
+            )
+        ),
+        "batch": min(
+            timeit.repeat(lambda: plan.evaluate_batch(companies), number=1, repeat=args.repeat)
+        ),
+    }
+
+    print(f"{len(companies)} companies, {len(rules)} rules")
+    for name, seconds in timings.items():
+        print(
+            f"{name:>15}: {seconds * 1000:8.1f} ms  "
+            f"{len(companies) / seconds:12,.0f} rows/s  "
+            f"x{timings['per_company'] / seconds:.2f}"
+        )
+    print(f"output differences: {differences}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the compiled SaaS classifier against the previous implementation.
+
+Run from the app directory:
+
+    python -m benchmarks.saas_classifier [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import csv
+import os
+import timeit
+from typing import Iterable, List
+
+from core.config import settings
+from service.saas import SaasClassifier
+
+
+DATASET_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "resources", "company-dataset.csv"
+)
+
+
+def legacy_is_saas_company(description: str, keywords: Iterable[str]) -> bool:
+    """The previous implementation: one substring scan per keyword."""
+    if not description:
+        return False
+    description_lower = description.lower()
+    keyword_matches = sum(1 for keyword in keywords if keyword in description_lower)
+    return keyword_matches >= 1
+
+
+def load_descriptions(rows: int) -> List[str]:
+    """Load the dataset descriptions, repeated up to the requested number of rows."""
+    with open(DATASET_PATH, newline="") as f:
+        descriptions = [row["description"] for row in csv.DictReader(f)]
+    return (descriptions * (rows // len(descriptions) + 1))[:rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    descriptions = load_descriptions(args.rows)
+    keywords = set(settings.SAAS_KEYWORDS)
+    classifier = SaasClassifier(keywords, settings.SAAS_MIN_KEYWORD_MATCHES)
+
+    legacy = [legacy_is_saas_company(description, keywords) for description in descriptions]
+    compiled = [match.is_saas for match in classifier.classify_many(descriptions)]
+    disagreements = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    disagreements += sum(1 for a, d in zip(legacy, descriptions) if a != classifier.is_saas(d))
+
+    timings = {
+        "legacy": min(
+            timeit.repeat(
+                lambda: [legacy_is_saas_company(d, keywords) for d in descriptions],
+                number=1,
+                repeat=args.repeat,
+            )
+        ),
+        "is_saas": min(
+            timeit.repeat(
+                lambda: [classifier.is_saas(d) for d in descriptions],
+                number=1,
+                repeat=args.repeat,
+            )
+        ),
+        "classify": min(
+            timeit.repeat(
+                lambda: [classifier.classify(d) for d in descriptions],
+                number=1,
+                repeat=args.repeat,
+            )
+        ),
+        "classify_many": min(
+            timeit.repeat(
+                lambda: classifier.classify_many(descriptions), number=1, repeat=args.repeat
+            )
+        ),
+    }
+
+    print(f"{len(descriptions)} descriptions, {len(keywords)} keywords")
+    for name, seconds in timings.items():
+        print(
+            f"{name:>15}: {seconds * 1000:8.1f} ms  "
+            f"{len(descriptions) / seconds:12,.0f} rows/s  "
+            f"x{timings['legacy'] / seconds:.2f}"
+        )
+    print(f"classification differences: {disagreements}")
+
+
+if __name__ == "__main__":
+    main()
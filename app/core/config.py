@@ -1,4 +1,6 @@
 import logging
+import os
+import tempfile
 from functools import lru_cache
 
 from pydantic import AnyHttpUrl, Field
@@ -20,9 +22,92 @@ class Settings(BaseSettings):
 
     # 60 minutes * 24 hours * 8 days = 8 days
     LOG_LEVEL: int = Field(default=logging.INFO)
+    # "text" or "json", one JSON object per line
+    LOG_FORMAT: str = Field(default="text")
+    # Warnings and errors of the import and processing loggers let through per interval of
+    # seconds, by logger and level, 0 for no limit
+    LOG_RATE_LIMIT: int = Field(default=50)
+    LOG_RATE_LIMIT_INTERVAL: float = Field(default=1.0)
 
     # Database settings
     POSTGRES_URL: str = Field(default="")
+    # Read replica used by read-only endpoints, the primary when empty. Reads fall back
+    # to the primary when the replica is unreachable or more than READ_REPLICA_MAX_LAG
+    # seconds behind, the replica is checked every READ_REPLICA_CHECK_INTERVAL seconds
+    # and counts as unreachable when the check takes over READ_REPLICA_CHECK_TIMEOUT
+    POSTGRES_READ_URL: str = Field(default="")
+    READ_REPLICA_MAX_LAG: float = Field(default=30.0)
+    READ_REPLICA_CHECK_INTERVAL: float = Field(default=5.0)
+    READ_REPLICA_CHECK_TIMEOUT: float = Field(default=1.0)
+    # Connection pool shared by the process: connections kept open, extra ones opened
+    # under load, seconds to wait for a free connection, seconds before a connection
+    # is replaced, and whether connections are checked before being used
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    # Prepared statements cached per asyncpg connection, 0 behind pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+
+    # Request diagnostics: a warning is logged for requests running more queries or
+    # spending more seconds in the database than this, 0 to disable
+    SLOW_REQUEST_QUERY_COUNT: int = Field(default=100)
+    SLOW_REQUEST_DB_TIME: float = Field(default=1.0)
+    # Requests with the X-Profile-Token header set to this token are profiled and their
+    # profile saved in PROFILE_DIR, profiling is disabled when empty
+    PROFILE_TOKEN: str = Field(default="")
+    PROFILE_DIR: str = Field(default=os.path.join(tempfile.gettempdir(), "telescope-profiles"))
+
+    # Import settings
+    IMPORT_BATCH_SIZE: int = Field(default=1000)
+    IMPORT_CHUNK_SIZE: int = Field(default=64 * 1024)
+    # Directory where uploads of background import jobs are spooled
+    IMPORT_SPOOL_DIR: str = Field(default=os.path.join(tempfile.gettempdir(), "telescope-imports"))
+    # Seconds a pending or running import job may go without a checkpoint before it is
+    # considered left behind by a stopped process, and resumed or failed
+    IMPORT_JOB_STALE_AFTER: float = Field(default=300.0)
+    # Failed rows an import job keeps the error of, the others are only counted
+    IMPORT_JOB_MAX_FAILED_RECORDS: int = Field(default=1000)
+
+    # Processing settings: companies selected by a filter are loaded, evaluated and
+    # stored this many at a time
+    PROCESS_CHUNK_SIZE: int = Field(default=1000)
+    # Processing job queue: seconds a worker holds a claimed chunk before another
+    # worker may claim it again, claims before a failing chunk is given up, and
+    # seconds an idle worker waits before looking for chunks again
+    PROCESSING_CHUNK_LEASE: float = Field(default=300.0)
+    PROCESSING_MAX_ATTEMPTS: int = Field(default=3)
+    PROCESSING_POLL_INTERVAL: float = Field(default=1.0)
+    # Compiled plans of registered rule sets kept in memory
+    RULE_SET_CACHE_SIZE: int = Field(default=128)
+
+    # SaaS classification: keywords looked for in company descriptions, and how
+    # many distinct ones a description needs to be considered SaaS
+    SAAS_KEYWORDS: list[str] = Field(
+        default=[
+            "subscription",
+            "monthly",
+            "annual",
+            "per-user",
+            "per user",
+            "per-seat",
+            "per seat",
+            "usage based",
+            "usage-based",
+            "tier",
+            "tiered",
+            "cloud",
+            "cloud-based",
+            "cloud platform",
+            "saas",
+            "software as a service",
+            "license",
+            "licensing",
+            "recurring",
+        ]
+    )
+    SAAS_MIN_KEYWORD_MATCHES: int = Field(default=1)
 
 
 @lru_cache
@@ -1,43 +1,154 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Tuple
 
 from core.config import settings
 
 
+# Attributes every log record has, anything else was passed with `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+# Loggers configured by uvicorn with handlers of their own, that also go through the queue
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.access")
+
+# Loggers reporting errors per imported row or processed chunk, which a bad file or rule
+# can repeat thousands of times, see `RateLimitFilter`
+_RATE_LIMITED_LOGGERS = ("service.companies", "service.processing_jobs")
+
+# Background thread writing the records of the process, see `configure_logging`
+_listener: QueueListener | None = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as a JSON object per line, with the fields passed with `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `rate` records of each logger and level through per `interval` seconds.
+
+    The number of records dropped is logged once the interval is over, with the
+    next record of the same logger and level. Only records of `level` and above
+    are limited, critical records are never dropped.
+    """
+
+    def __init__(self, rate: int, interval: float, level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self.level = level
+        # Per logger and level: when the interval started, records let through and dropped
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level or record.levelno >= logging.CRITICAL:
+            return True
+
+        key = (record.name, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if dropped:
+                    record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _LocalQueueHandler(QueueHandler):
+    """Put records on a queue of the process as they are, the listener formats them.
+
+    The base handler formats records before queueing them so they can be
+    pickled, records queued for a thread of the same process don't need to be.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 def configure_logging() -> None:
     """
     Configure logging for the application.
 
-    This function sets up logging to ensure logs appear in the uvicorn console
-    when running in Docker.
+    Records are put on a queue by the thread logging them and formatted and
+    written to stdout by a background thread, so that logging never blocks the
+    event loop. They are formatted as text, or as JSON when `LOG_FORMAT` is
+    "json". Past `LOG_RATE_LIMIT` records per `LOG_RATE_LIMIT_INTERVAL` seconds,
+    the warnings and errors of the import and processing loggers are dropped,
+    e.g. the errors of a file full of invalid rows. Other records, such as the
+    access log, are never dropped.
+
+    Calling it again replaces the previous configuration.
     """
+    global _listener
+    stop_logging()
+
     # Get the root logger
     root_logger = logging.getLogger()
 
     # Set the log level from settings
     root_logger.setLevel(settings.LOG_LEVEL)
 
-    # Create a console handler
+    # Create a console handler, run by the listener thread
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(settings.LOG_LEVEL)
-
-    # Create a formatter
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-    # Set the formatter for the console handler
-    console_handler.setFormatter(formatter)
-
-    # Add the console handler to the root logger if it doesn't already have it
-    if not any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers):
-        root_logger.addHandler(console_handler)
-
-    # Configure uvicorn access logger
-    uvicorn_access_logger = logging.getLogger("uvicorn.access")
-    uvicorn_access_logger.setLevel(settings.LOG_LEVEL)
-
-    # Configure uvicorn error logger
-    uvicorn_error_logger = logging.getLogger("uvicorn.error")
-    uvicorn_error_logger.setLevel(settings.LOG_LEVEL)
+    if settings.LOG_FORMAT == "json":
+        console_handler.setFormatter(JSONFormatter())
+    else:
+        console_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+
+    # Every record goes through the queue handler, replacing any previous handler
+    queue_handler = _LocalQueueHandler(queue.SimpleQueue())
+    root_logger.handlers = [queue_handler]
+
+    # Filters of the loggers themselves, the records of any other logger are left alone
+    rate_limit = RateLimitFilter(settings.LOG_RATE_LIMIT, settings.LOG_RATE_LIMIT_INTERVAL)
+    for name in _RATE_LIMITED_LOGGERS:
+        rate_limited_logger = logging.getLogger(name)
+        for previous in list(rate_limited_logger.filters):
+            if isinstance(previous, RateLimitFilter):
+                rate_limited_logger.removeFilter(previous)
+        if settings.LOG_RATE_LIMIT > 0:
+            rate_limited_logger.addFilter(rate_limit)
+
+    _listener = QueueListener(queue_handler.queue, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    # Configure uvicorn loggers, logging through the root logger's queue
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").setLevel(settings.LOG_LEVEL)
+    logging.getLogger("uvicorn.error").setLevel(settings.LOG_LEVEL)
 
     # Configure fastapi logger
     fastapi_logger = logging.getLogger("fastapi")
@@ -47,6 +158,18 @@ def configure_logging() -> None:
     logging.info("Logging configured with level: %s", settings.LOG_LEVEL)
 
 
+def stop_logging() -> None:
+    """Write the records still queued and stop the listener thread, if it runs."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Records still queued when the process exits are written
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the specified name.
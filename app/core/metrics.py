@@ -0,0 +1,144 @@
+"""Application metrics, exposed in the Prometheus text format.
+
+Metrics are recorded with `prometheus_client`. With several processes, API
+workers or `python -m worker --processes N`, set the `PROMETHEUS_MULTIPROC_DIR`
+environment variable to an empty directory shared by the processes of a host:
+each process then writes its values to files in it, and `/metrics` reports the
+metrics of all of them rather than those of the process serving the scrape.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Request and stage durations, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def is_multiprocess() -> bool:
+    """Tell whether the processes share their metrics through `PROMETHEUS_MULTIPROC_DIR`."""
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def render() -> bytes:
+    """Format the metrics in the Prometheus text format, of every process in multiprocess mode."""
+    if not is_multiprocess():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop the gauges of this process from the shared metrics, when it stops."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class StageTimer:
+    """Time spent in each stage of an operation, summed over many short steps.
+
+    Stages interleaved row by row, such as parsing and building the rows of an
+    import, are timed with `perf_counter` alone and only observed in
+    `STAGE_DURATION` once per batch, when `observe` is called.
+    """
+
+    __slots__ = ("operation", "_durations")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._durations: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self._durations[stage] = self._durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def observe(self) -> None:
+        """Observe the time summed for each stage since the last call."""
+        for stage, seconds in self._durations.items():
+            STAGE_DURATION.labels(operation=self.operation, stage=stage).observe(seconds)
+        self._durations.clear()
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing the latency of every HTTP request, by route template.
+
+    The latency covers the whole response, streamed bodies included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            ).observe(time.perf_counter() - start)
+
+
+REQUEST_LATENCY = Histogram(
+    "telescope_http_request_duration_seconds",
+    "Latency of the HTTP requests, by route template.",
+    ["method", "route", "status"],
+    buckets=DEFAULT_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "telescope_stage_duration_seconds",
+    "Time spent in each stage of imports, processing and reads, per batch or call.",
+    ["operation", "stage"],
+    buckets=DEFAULT_BUCKETS,
+)
+IMPORT_ROWS = Counter(
+    "telescope_import_rows_total",
+    "Imported rows: written, unchanged or failed.",
+    ["result"],
+)
+RULES_EVALUATED = Counter(
+    "telescope_rules_evaluated_total",
+    "Rule evaluations, one per rule and company, by where they are evaluated.",
+    ["mode"],
+)
+# Set on every checkout and checkin, summed over the live processes in multiprocess mode
+DB_POOL_CONNECTIONS = Gauge(
+    "telescope_db_pool_connections",
+    "Connections of the database pools: checked out (in use) and over the pool size.",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
@@ -0,0 +1,164 @@
+"""Bulk write helpers"""
+
+import json
+from typing import Any, Dict, List, Type
+
+from db.session import get_dialect_name
+from sqlalchemy import JSON, CursorResult, Select, insert, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+# Dialects supporting INSERT ... ON CONFLICT
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+async def bulk_insert(
+    db_session: AsyncSession, model: Type[SQLModel], records: List[Dict[str, Any]]
+) -> int:
+    """Insert many records in a single round trip.
+
+    On Postgres (asyncpg) the records are written with the COPY protocol, other
+    dialects fall back to a multi-row INSERT executed with executemany.
+
+    Args:
+        db_session: The database session.
+        model: The table model to insert into.
+        records: The column values of each row, all with the same keys.
+
+    Returns:
+        The number of rows inserted.
+    """
+    if not records:
+        return 0
+
+    if db_session.bind.dialect.driver == "asyncpg":
+        await _copy_records(db_session, model, records)
+    else:
+        await db_session.exec(insert(model), params=records)
+    return len(records)
+
+
+async def bulk_upsert(
+    db_session: AsyncSession,
+    model: Type[SQLModel],
+    records: List[Dict[str, Any]],
+    index_elements: List[str],
+    fingerprint_column: str | None = None,
+) -> int:
+    """Insert many records, updating the existing rows that conflict on a unique index.
+
+    Records sharing the same index values are collapsed, the last one wins.
+
+    Args:
+        db_session: The database session.
+        model: The table model to upsert into.
+        records: The column values of each row, all with the same keys.
+        index_elements: The columns of the unique index to match existing rows on.
+        fingerprint_column: When set, existing rows whose value in this column equals
+            the incoming one are left untouched.
+
+    Returns:
+        The number of rows inserted or updated.
+    """
+    if not records:
+        return 0
+
+    unique_records = list(
+        {tuple(record[name] for name in index_elements): record for record in records}.values()
+    )
+
+    table = model.__table__
+    statement = _UPSERT_INSERTS[get_dialect_name(db_session)](table)
+    update_columns = [
+        name for name in records[0] if name not in index_elements and name != "ref_id"
+    ]
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={name: statement.excluded[name] for name in update_columns},
+        where=(
+            table.c[fingerprint_column].is_distinct_from(statement.excluded[fingerprint_column])
+            if fingerprint_column
+            else None
+        ),
+    ).returning(*table.primary_key.columns)
+
+    result = await db_session.exec(statement, params=unique_records)
+    return len(result.all())
+
+
+async def upsert_from_select(
+    db_session: AsyncSession,
+    model: Type[SQLModel],
+    columns: List[str],
+    select_statement: Select,
+    index_elements: List[str],
+    returning: List[ColumnElement] | None = None,
+) -> CursorResult:
+    """Insert the rows of a SELECT, updating the existing rows that conflict on a unique index.
+
+    The rows are computed and written by the database in a single statement.
+
+    Args:
+        db_session: The database session.
+        model: The table model to upsert into.
+        columns: The columns the selected values are written to, in the same order.
+        select_statement: The statement selecting the rows to write.
+        index_elements: The columns of the unique index to match existing rows on.
+        returning: The columns of the written rows to return, if any.
+
+    Returns:
+        The result of the statement, with the returned columns of every row inserted
+        or updated.
+    """
+    table = model.__table__
+    # SQLite needs a WHERE clause to tell the upsert's ON CONFLICT from a join constraint
+    statement = _UPSERT_INSERTS[get_dialect_name(db_session)](table).from_select(
+        columns, select_statement.where(true())
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            name: statement.excluded[name]
+            for name in columns
+            if name not in index_elements and name != "ref_id"
+        },
+    )
+    if returning:
+        statement = statement.returning(*returning)
+
+    return await db_session.exec(statement)
+
+
+async def _copy_records(
+    db_session: AsyncSession, model: Type[SQLModel], records: List[Dict[str, Any]]
+) -> None:
+    """Write the records with asyncpg's `copy_records_to_table`.
+
+    Args:
+        db_session: The database session.
+        model: The table model to insert into.
+        records: The column values of each row, all with the same keys.
+    """
+    table = model.__table__
+    columns = list(records[0].keys())
+    json_columns = {name for name in columns if isinstance(table.c[name].type, JSON)}
+
+    connection = await db_session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        table.name,
+        columns=columns,
+        records=[
+            tuple(
+                json.dumps(record[name]) if name in json_columns else record[name]
+                for name in columns
+            )
+            for record in records
+        ],
+    )
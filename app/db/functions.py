@@ -0,0 +1,86 @@
+"""Dialect specific SQL functions"""
+
+import json
+from typing import Any, Dict, List
+
+from sqlalchemy import JSON, and_, any_, bindparam, cast, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def json_object(dialect_name: str, values: Dict[str, Any]) -> ColumnElement:
+    """Build a JSON object in SQL, a JSONB one on Postgres.
+
+    Args:
+        dialect_name: The name of the database dialect.
+        values: The SQL expression of each key.
+
+    Returns:
+        The JSON object expression.
+    """
+    build = func.jsonb_build_object if dialect_name == "postgresql" else func.json_object
+    arguments = [argument for key, value in values.items() for argument in (key, value)]
+    return build(*arguments, type_=JSON)
+
+
+def random_uuid(dialect_name: str) -> ColumnElement:
+    """Generate a random UUID in SQL, in the format the `Uuid` type stores.
+
+    Args:
+        dialect_name: The name of the database dialect.
+
+    Returns:
+        The UUID expression.
+    """
+    if dialect_name == "postgresql":
+        return func.gen_random_uuid()
+    # Without a native UUID type, UUIDs are stored as 32 hexadecimal characters
+    return func.lower(func.hex(func.randomblob(16)))
+
+
+def any_of(dialect_name: str, column: ColumnElement, values: List[Any]) -> ColumnElement:
+    """Match a column against a list of values.
+
+    On Postgres the values are bound as a single array, `column = ANY(:values)`,
+    so the statement stays the same whatever the number of values. Other dialects
+    use `column IN (...)`.
+
+    Args:
+        dialect_name: The name of the database dialect.
+        column: The column to match.
+        values: The values to match.
+
+    Returns:
+        The condition expression.
+    """
+    if dialect_name == "postgresql":
+        return column == any_(bindparam(None, list(values), type_=ARRAY(column.type)))
+    return column.in_(values)
+
+
+def json_contains(
+    dialect_name: str, column: ColumnElement, values: Dict[str, Any]
+) -> ColumnElement:
+    """Match the rows whose JSON object column has the given top level values.
+
+    On Postgres this is a JSONB containment, `column @> :values`, other dialects
+    compare each extracted value.
+
+    Args:
+        dialect_name: The name of the database dialect.
+        column: The JSON column.
+        values: The values the objects must have, by key.
+
+    Returns:
+        The condition expression.
+    """
+    if dialect_name == "postgresql":
+        # The cast gives the JSONB operators, Postgres drops it on JSONB columns so
+        # that their GIN index still applies
+        return cast(column, JSONB).contains(values)
+    return and_(
+        *(
+            func.json_extract(column, "$." + json.dumps(key)) == literal(value)
+            for key, value in values.items()
+        )
+    )
@@ -0,0 +1,66 @@
+"""Count the SQL queries run on behalf of a request, and the time spent in them."""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryStats:
+    """The queries run while tracking: how many, and their total duration in seconds"""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Stats of the queries run in the current context, None when they are not tracked
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the queries run in the current context, and the tasks it starts, while in the block.
+
+    Yields:
+        The stats, updated as queries run.
+    """
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record the queries run on an engine in the stats of the context running them.
+
+    Every round trip to the database counts as a query, e.g. each statement of
+    a batched insert.
+
+    Args:
+        engine: The engine to instrument.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
@@ -1,21 +1,111 @@
+import asyncio
+import time
+from typing import Any, Dict
+
 from core.config import settings
+from core.logging import get_logger
+from core.metrics import DB_POOL_CONNECTIONS
+from db.query_stats import instrument_engine
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (  # type: ignore
+    AsyncEngine,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-def get_engine():
+logger = get_logger(__name__)
+
+# Engines and session factories shared by the whole process, see `init_engine`
+_engine: AsyncEngine | None = None
+_session_maker: async_sessionmaker | None = None
+_read_engine: AsyncEngine | None = None
+_read_session_maker: async_sessionmaker | None = None
+
+# Last replica check: when it ran (monotonic seconds) and whether the replica was usable
+_replica_status: Dict[str, Any] = {"checked_at": None, "usable": False}
+# Held by the request checking the replica, the others keep the last decision meanwhile
+_replica_check_lock = asyncio.Lock()
+
+# Seconds the replica is behind the primary, 0 when it has replayed everything it received
+_REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def create_engine(url: str | None = None) -> AsyncEngine:
+    """Create an engine with the connection pool configured in the settings.
+
+    Args:
+        url: The database URL, `POSTGRES_URL` by default.
+    """
+    url = url or settings.POSTGRES_URL
+    connect_args: Dict[str, Any] = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+
     engine = create_async_engine(
-        settings.POSTGRES_URL,
+        url,
         echo=settings.DEBUG,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
     )
+    # Per-request query counts, see `api.middleware.QueryStatsMiddleware`
+    instrument_engine(engine)
     return engine
 
 
-def get_session_maker():
-    engine = get_engine()
+def init_engine() -> AsyncEngine:
+    """Create the process-wide engines, if they do not exist yet.
+
+    Called when the application starts, every session of the process then
+    shares the engine's connection pool. When `POSTGRES_READ_URL` is set, a
+    second engine connects to the read replica.
+    """
+    global _engine, _session_maker, _read_engine, _read_session_maker
+    if _engine is None:
+        _engine = create_engine()
+        _session_maker = _create_session_maker(_engine)
+        _observe_pool(_engine, "primary")
+        if settings.POSTGRES_READ_URL:
+            _read_engine = create_engine(settings.POSTGRES_READ_URL)
+            _read_session_maker = _create_session_maker(_read_engine)
+            _observe_pool(_read_engine, "replica")
+    return _engine
+
+
+async def dispose_engine() -> None:
+    """Close the connections of the process-wide engines, when the application shuts down."""
+    global _engine, _session_maker, _read_engine, _read_session_maker
+    for engine in (_engine, _read_engine):
+        if engine is not None:
+            await engine.dispose()
+    _engine = _session_maker = _read_engine = _read_session_maker = None
+    _replica_status.update(checked_at=None, usable=False)
+
+
+def _observe_pool(engine: AsyncEngine, pool_name: str) -> None:
+    """Keep the connections of a pool in `DB_POOL_CONNECTIONS`, as they are checked out and in."""
+    pool = engine.pool
+
+    def update(*args) -> None:
+        DB_POOL_CONNECTIONS.labels(pool=pool_name, state="checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(pool=pool_name, state="overflow").set(pool.overflow())
+
+    event.listen(engine.sync_engine, "checkout", update)
+    event.listen(engine.sync_engine, "checkin", update)
+
+
+def _create_session_maker(engine: AsyncEngine) -> async_sessionmaker:
     return async_sessionmaker(
         bind=engine,
         class_=AsyncSession,
@@ -25,6 +115,97 @@ def get_session_maker():
     )
 
 
+def get_engine() -> AsyncEngine:
+    return init_engine()
+
+
+def get_session_maker() -> async_sessionmaker:
+    init_engine()
+    return _session_maker
+
+
+async def get_read_session_maker() -> async_sessionmaker:
+    """Get the session factory for read-only work.
+
+    Sessions go to the read replica, unless there is none, it can't be reached
+    or it lags more than `READ_REPLICA_MAX_LAG` seconds behind the primary, in
+    which case they go to the primary. The replica is checked at most every
+    `READ_REPLICA_CHECK_INTERVAL` seconds, by one request at a time: the
+    requests arriving during a check do not wait for it and use the last
+    decision, the primary until a first check is done.
+    """
+    init_engine()
+    if _read_session_maker is None:
+        return _session_maker
+
+    checked_at = _replica_status["checked_at"]
+    now = time.monotonic()
+    due = checked_at is None or now - checked_at >= settings.READ_REPLICA_CHECK_INTERVAL
+    if due and not _replica_check_lock.locked():
+        async with _replica_check_lock:
+            usable = await _is_replica_usable()
+            _replica_status.update(checked_at=time.monotonic(), usable=usable)
+    return _read_session_maker if _replica_status["usable"] else _session_maker
+
+
+async def _is_replica_usable() -> bool:
+    """Tell whether the read replica is reachable and close enough to the primary."""
+    try:
+        lag = await asyncio.wait_for(_get_replica_lag(), settings.READ_REPLICA_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Read replica did not answer within {settings.READ_REPLICA_CHECK_TIMEOUT}s, "
+            "reading from the primary"
+        )
+        return False
+    except Exception as e:
+        logger.warning(f"Read replica unavailable, reading from the primary: {e}")
+        return False
+
+    if lag > settings.READ_REPLICA_MAX_LAG:
+        logger.warning(f"Read replica {lag:.1f}s behind, reading from the primary")
+        return False
+    return True
+
+
+async def _get_replica_lag() -> float:
+    """Get how many seconds the read replica is behind the primary."""
+    async with _read_engine.connect() as connection:
+        if connection.dialect.name != "postgresql":
+            await connection.execute(text("SELECT 1"))
+            return 0.0
+        result = await connection.execute(_REPLICA_LAG_QUERY)
+        return float(result.scalar_one())
+
+
+def get_pool_stats(read: bool = False) -> Dict[str, Any] | None:
+    """Get the state of a process-wide connection pool.
+
+    Args:
+        read: Whether to get the read replica's pool rather than the primary's.
+
+    Returns:
+        The pool's configured size, its idle and checked out connections, and the
+        connections opened over the size. None for the replica when there is none.
+    """
+    engine = get_engine() if not read else _read_engine
+    if engine is None:
+        return None
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
+def get_dialect_name(db_session: AsyncSession) -> str:
+    """Get the name of the database dialect a session is bound to, e.g. "postgresql"."""
+    return db_session.bind.dialect.name
+
+
 async def get_session():
     session_maker = get_session_maker()
     async with session_maker() as session:
@@ -35,3 +216,12 @@ async def get_session():
             raise
         finally:
             await session.close()
+
+
+async def get_read_session():
+    session_maker = await get_read_session_maker()
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -1,17 +1,26 @@
+import asyncio
+import contextlib
 import logging
 from contextlib import asynccontextmanager
 
 from api import routes
+from api.middleware import QueryStatsMiddleware
 from core.config import settings
 from core.exceptions import (
     ObjectNotFound,
     TelescopeException,
     TelescopeValidationException,
 )
+from core.logging import configure_logging, stop_logging
+from core.metrics import MetricsMiddleware, mark_process_dead
+from db.session import dispose_engine, init_engine
 from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from service.import_jobs import stop_import_jobs, watch_import_jobs
+from service.saas import get_saas_classifier
 
 
 # Configure logging
@@ -22,8 +31,23 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Startup and shutdown events for the FastAPI application."""
     # Startup
+    configure_logging()
     logger.info("Starting up...")
+    # One engine, and connection pool, for every request of the process
+    init_engine()
+    # Compile the SaaS keyword matcher once, before the first import
+    get_saas_classifier()
+    # Resume the import jobs a previous run was stopped in the middle of, or crashed in
+    import_jobs_watcher = asyncio.create_task(watch_import_jobs())
     yield
+    # Shutdown
+    import_jobs_watcher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await import_jobs_watcher
+    await stop_import_jobs()
+    await dispose_engine()
+    mark_process_dead()
+    stop_logging()
 
 
 def create_service() -> FastAPI:
@@ -55,13 +79,19 @@ def create_service() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request latencies, by route template, for /metrics
+    app.add_middleware(MetricsMiddleware)
+    # SQL queries of each request, in the Server-Timing header
+    app.add_middleware(QueryStatsMiddleware)
+
     routes.register_routes(app)
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
         logger.error(f"Validation error: {exc.errors()}")
         return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, content={"detail": exc.errors()}
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": jsonable_encoder(exc.errors())},
         )
 
     @app.exception_handler(TelescopeValidationException)
@@ -0,0 +1,34 @@
+"""Unique processed company
+
+Revision ID: 588faebce7b2
+Revises: 6dfbf2bbf921
+Create Date: 2026-10-18 15:30:10.198006
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '588faebce7b2'
+down_revision: Union[str, None] = '6dfbf2bbf921'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the most recently processed row of each company before enforcing uniqueness
+    op.execute(
+        "DELETE FROM processed_companies WHERE id NOT IN "
+        "(SELECT MAX(id) FROM processed_companies GROUP BY company_id)"
+    )
+
+    op.create_index(op.f('ix_processed_companies_company_id'), 'processed_companies', ['company_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_processed_companies_company_id'), table_name='processed_companies')
@@ -0,0 +1,50 @@
+"""JSONB documents
+
+Revision ID: 62bff9806212
+Revises: 588faebce7b2
+Create Date: 2026-10-18 15:36:53.605727
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '62bff9806212'
+down_revision: Union[str, None] = '588faebce7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# JSON columns stored as JSONB on Postgres, other dialects keep JSON
+JSON_COLUMNS = [
+    ('companies', 'employee_locations'),
+    ('companies', 'employee_growth'),
+    ('companies', 'extras'),
+    ('processed_companies', 'data'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table_name, column_name in JSON_COLUMNS:
+        op.alter_column(table_name, column_name, existing_type=sa.JSON(), type_=postgresql.JSONB(), postgresql_using=f'{column_name}::jsonb')
+
+    op.create_index('ix_processed_companies_data', 'processed_companies', ['data'], unique=False, postgresql_using='gin', postgresql_ops={'data': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_processed_companies_data', table_name='processed_companies')
+
+    for table_name, column_name in JSON_COLUMNS:
+        op.alter_column(table_name, column_name, existing_type=postgresql.JSONB(), type_=sa.JSON(), postgresql_using=f'{column_name}::json')
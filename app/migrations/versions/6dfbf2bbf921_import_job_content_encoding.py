@@ -0,0 +1,28 @@
+"""Import job content encoding
+
+Revision ID: 6dfbf2bbf921
+Revises: 877f236b00b3
+Create Date: 2026-10-18 15:18:13.683791
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6dfbf2bbf921'
+down_revision: Union[str, None] = '877f236b00b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('import_jobs', sa.Column('content_encoding', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('import_jobs', 'content_encoding')
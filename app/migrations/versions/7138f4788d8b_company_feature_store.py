@@ -0,0 +1,66 @@
+"""Company feature store
+
+Revision ID: 7138f4788d8b
+Revises: 62bff9806212
+Create Date: 2026-10-18 15:40:39.077095
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7138f4788d8b'
+down_revision: Union[str, None] = '62bff9806212'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rule set of the features processed before the feature store, whose rules are unknown
+LEGACY_RULE_SET_ID = 'legacy'
+
+# Integer feature values of the processed data, by dialect
+FEATURES_BY_DIALECT = {
+    'postgresql': (
+        "SELECT p.company_id, f.key AS key, f.value::text::bigint AS value "
+        "FROM processed_companies p, jsonb_each(p.data) f "
+        "WHERE jsonb_typeof(f.value) = 'number' AND f.value::text ~ '^-?[0-9]{1,18}$'"
+    ),
+    'sqlite': (
+        "SELECT p.company_id, f.key AS key, f.value AS value "
+        "FROM processed_companies p, json_each(p.data) f "
+        "WHERE f.type = 'integer'"
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('company_features',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('rule_set_id', sa.String(), nullable=False),
+    sa.Column('feature_name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id', 'rule_set_id', 'feature_name')
+    )
+    op.create_index('ix_company_features_rule_set_feature_value', 'company_features', ['rule_set_id', 'feature_name', 'value', 'company_id'], unique=False)
+    op.add_column('processed_companies', sa.Column('rule_set_id', sa.String(), nullable=True))
+
+    # Move the integer features already processed to the feature store
+    features = FEATURES_BY_DIALECT.get(op.get_bind().dialect.name)
+    if features is not None:
+        op.execute(
+            "INSERT INTO company_features (company_id, rule_set_id, feature_name, value) "
+            f"SELECT company_id, '{LEGACY_RULE_SET_ID}', key, value FROM ({features}) AS features"
+        )
+        op.execute(f"UPDATE processed_companies SET rule_set_id = '{LEGACY_RULE_SET_ID}'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('processed_companies', 'rule_set_id')
+    op.drop_index('ix_company_features_rule_set_feature_value', table_name='company_features')
+    op.drop_table('company_features')
@@ -0,0 +1,37 @@
+"""Unique company url and content fingerprint
+
+Revision ID: a1c3c2c45c49
+Revises: 99ba9bd9159e
+Create Date: 2026-10-18 15:14:26.415020
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3c2c45c49'
+down_revision: Union[str, None] = '99ba9bd9159e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the most recently imported row of each URL before enforcing uniqueness
+    op.execute(
+        "DELETE FROM processed_companies WHERE company_id NOT IN "
+        "(SELECT MAX(id) FROM companies GROUP BY url)"
+    )
+    op.execute("DELETE FROM companies WHERE id NOT IN (SELECT MAX(id) FROM companies GROUP BY url)")
+
+    op.add_column('companies', sa.Column('fingerprint', sa.String(), nullable=True))
+    op.create_index(op.f('ix_companies_url'), 'companies', ['url'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_companies_url'), table_name='companies')
+    op.drop_column('companies', 'fingerprint')
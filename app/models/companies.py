@@ -2,9 +2,16 @@ import datetime
 import uuid
 from typing import List
 
+from sqlalchemy import BigInteger, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 
 
+# JSON documents, stored as JSONB on Postgres so that they can be indexed and
+# are not parsed again on every access
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
 class UUIDModel(SQLModel):
     """Base class with integer primary key and uuid field"""
 
@@ -16,16 +23,17 @@ class CompanyData(UUIDModel, table=True):
     __tablename__: str = "companies"
 
     name: str = Field(nullable=False)
-    url: str = Field(nullable=False)
+    url: str = Field(nullable=False, unique=True, index=True)
     description: str = Field(nullable=True)
     industry: str = Field(nullable=True)
     founded_year: int = Field(nullable=False)
     total_employees: int = Field(nullable=False)
     headquarters_city: str = Field(nullable=False)
-    employee_locations: dict = Field(sa_column=Column(JSON))
-    employee_growth: dict = Field(sa_column=Column(JSON))
-    extras: dict = Field(sa_column=Column(JSON))
+    employee_locations: dict = Field(sa_column=Column(JSONDocument))
+    employee_growth: dict = Field(sa_column=Column(JSONDocument))
+    extras: dict = Field(sa_column=Column(JSONDocument))
     imported_at: datetime.datetime = Field(nullable=False)
+    fingerprint: str = Field(nullable=True)
 
     # Relationships
     processed_data: List["ProcessedCompany"] = Relationship(back_populates="company")
@@ -33,10 +41,44 @@ class CompanyData(UUIDModel, table=True):
 
 class ProcessedCompany(UUIDModel, table=True):
     __tablename__: str = "processed_companies"
+    __table_args__ = (
+        # Serves the feature filters of `/get_companies`, `data @> :filters` on Postgres
+        Index(
+            "ix_processed_companies_data",
+            "data",
+            postgresql_using="gin",
+            postgresql_ops={"data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
-    company_id: int = Field(foreign_key="companies.id")
-    data: dict = Field(sa_column=Column(JSON))
+    company_id: int = Field(foreign_key="companies.id", unique=True, index=True)
+    data: dict = Field(sa_column=Column(JSONDocument))
     processed_at: datetime.datetime = Field(nullable=False)
+    # Content hash of the rules the data was computed with
+    rule_set_id: str = Field(nullable=True)
+    # Fingerprint of the company the data was computed from
+    source_fingerprint: str = Field(nullable=True)
 
     # Relationships
     company: CompanyData = Relationship(back_populates="processed_data")
+
+
+class CompanyFeature(SQLModel, table=True):
+    """A feature value of a company, one row per company, rule set and feature"""
+
+    __tablename__: str = "company_features"
+    __table_args__ = (
+        # Covers filtering and grouping on feature values without reading the table
+        Index(
+            "ix_company_features_rule_set_feature_value",
+            "rule_set_id",
+            "feature_name",
+            "value",
+            "company_id",
+        ),
+    )
+
+    company_id: int = Field(foreign_key="companies.id", primary_key=True)
+    rule_set_id: str = Field(primary_key=True)
+    feature_name: str = Field(primary_key=True)
+    value: int = Field(sa_type=BigInteger, nullable=False)
@@ -0,0 +1,38 @@
+import datetime
+import enum
+import uuid
+
+from models.companies import UUIDModel
+from sqlmodel import JSON, Column, Field
+
+
+class ImportJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+    cancelled = "cancelled"
+    # Stopped by a shutdown, resumed when the app starts again
+    interrupted = "interrupted"
+
+
+class ImportJob(UUIDModel, table=True):
+    __tablename__: str = "import_jobs"
+
+    ref_id: uuid.UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
+    status: str = Field(nullable=False, default=ImportJobStatus.pending)
+    mode: str = Field(nullable=False)
+    content_type: str = Field(nullable=False)
+    content_encoding: str = Field(nullable=True)
+    filename: str = Field(nullable=True)
+    file_path: str = Field(nullable=False)
+    rows_parsed: int = Field(nullable=False, default=0)
+    rows_imported: int = Field(nullable=False, default=0)
+    rows_unchanged: int = Field(nullable=False, default=0)
+    rows_failed: int = Field(nullable=False, default=0)
+    failed_records: list = Field(sa_column=Column(JSON))
+    error: str = Field(nullable=True)
+    created_at: datetime.datetime = Field(nullable=False)
+    started_at: datetime.datetime = Field(nullable=True)
+    checkpoint_at: datetime.datetime = Field(nullable=True)
+    finished_at: datetime.datetime = Field(nullable=True)
@@ -0,0 +1,60 @@
+import datetime
+import enum
+import uuid
+
+from models.companies import UUIDModel
+from sqlalchemy import Index
+from sqlmodel import JSON, Column, Field, SQLModel
+
+
+class ProcessingStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ProcessingJob(UUIDModel, table=True):
+    """A queued processing run, split into chunks of companies drained by workers"""
+
+    __tablename__: str = "processing_jobs"
+
+    ref_id: uuid.UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
+    status: str = Field(nullable=False, default=ProcessingStatus.pending)
+    # Content hash of the rules, the rules themselves are only kept for inline rules
+    rule_set_id: str = Field(nullable=False)
+    rules: list = Field(sa_column=Column(JSON))
+    # The registered rule set version processed, None for inline rules
+    rule_set_ref_id: uuid.UUID = Field(nullable=True)
+    mode: str = Field(nullable=False)
+    force: bool = Field(nullable=False, default=False)
+    chunks_total: int = Field(nullable=False, default=0)
+    chunks_completed: int = Field(nullable=False, default=0)
+    chunks_failed: int = Field(nullable=False, default=0)
+    processed_records: int = Field(nullable=False, default=0)
+    skipped_records: int = Field(nullable=False, default=0)
+    created_at: datetime.datetime = Field(nullable=False)
+    started_at: datetime.datetime = Field(nullable=True)
+    finished_at: datetime.datetime = Field(nullable=True)
+
+
+class ProcessingChunk(SQLModel, table=True):
+    """A chunk of the companies of a processing job, claimed by one worker at a time"""
+
+    __tablename__: str = "processing_chunks"
+    __table_args__ = (
+        # Finds the claimable chunks, pending or with an expired lease, in queue order
+        Index("ix_processing_chunks_status_id", "status", "id"),
+    )
+
+    id: int = Field(default=None, primary_key=True)
+    job_id: int = Field(foreign_key="processing_jobs.id", index=True)
+    company_ids: list = Field(sa_column=Column(JSON))
+    status: str = Field(nullable=False, default=ProcessingStatus.pending)
+    # Number of times the chunk was claimed, a chunk failing this many times is given up
+    attempts: int = Field(nullable=False, default=0)
+    worker_id: str = Field(nullable=True)
+    # A running chunk whose lease expired belongs to a crashed worker and is claimed again
+    lease_expires_at: datetime.datetime = Field(nullable=True)
+    error: str = Field(nullable=True)
+    finished_at: datetime.datetime = Field(nullable=True)
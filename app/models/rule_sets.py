@@ -0,0 +1,25 @@
+import datetime
+import uuid
+
+from models.companies import UUIDModel
+from sqlalchemy import UniqueConstraint
+from sqlmodel import JSON, Column, Field
+
+
+class RuleSet(UUIDModel, table=True):
+    """A registered version of a named rule set, never changed once registered"""
+
+    __tablename__: str = "rule_sets"
+    __table_args__ = (
+        UniqueConstraint("name", "version"),
+        UniqueConstraint("name", "rules_hash"),
+    )
+
+    # The id of the version, the same rules registered under two names are two versions
+    ref_id: uuid.UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
+    name: str = Field(nullable=False)
+    version: int = Field(nullable=False)
+    # Content hash of the rules, the id the features are stored under
+    rules_hash: str = Field(nullable=False)
+    rules: list = Field(sa_column=Column(JSON))
+    created_at: datetime.datetime = Field(nullable=False)
@@ -1,46 +1,81 @@
 """Import companies from a file."""
 
+import asyncio
+import codecs
+import collections
 import csv
 import datetime
-import io
+import functools
+import hashlib
 import json
-from typing import Any, Dict, List
+import os
+import time
+import uuid
+import zlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
 
-from api.schema import ProcessedCompaniesOutput, Rule
+from api.schema import (
+    CompanySelector,
+    FailedRecord,
+    ImportCompanyOutput,
+    ImportMode,
+    ProcessCompaniesSummary,
+    ProcessedCompaniesOutput,
+    ProcessedCompaniesPage,
+    ProcessMode,
+)
+from core.config import settings
 from core.exceptions import TelescopeValidationException
 from core.logging import get_logger
+from core.metrics import IMPORT_ROWS, RULES_EVALUATED, STAGE_DURATION, StageTimer
+from db.bulk import bulk_insert, bulk_upsert, upsert_from_select
+from db.functions import any_of, json_contains, json_object, random_uuid
+from db.session import get_dialect_name
 from fastapi import UploadFile
 from models.companies import CompanyData, ProcessedCompany
-from service.rules import get_feature_value
+from service.features import (
+    get_feature_page,
+    iter_feature_store,
+    store_features,
+    store_features_from_select,
+)
+from service.rules import RulePlan, compile_rules_sql
+from service.saas import get_saas_classifier
+from sqlalchemy import CursorResult, DateTime, exists, func, literal
+from sqlalchemy.sql.elements import ColumnElement
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 logger = get_logger(__name__)
 
-# Common SaaS keywords in descriptions - simplified to match more variations
-SAAS_KEYWORDS = {
-    "subscription",
-    "monthly",
-    "annual",
-    "per-user",
-    "per user",
-    "per-seat",
-    "per seat",
-    "usage based",
-    "usage-based",
-    "tier",
-    "tiered",
-    "cloud",
-    "cloud-based",
-    "cloud platform",
-    "saas",
-    "software as a service",
-    "license",
-    "licensing",
-    "recurring",
+_JSON_WHITESPACE = " \t\n\r"
+# Gzip header and trailer around a deflate stream
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+_GZIP_CONTENT_TYPES = {"application/gzip", "application/x-gzip"}
+_CONTENT_TYPES_BY_EXTENSION = {
+    ".csv": "text/csv",
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".jsonl": "application/x-ndjson",
 }
 
+# Receives the number of rows parsed so far and the import result up to that row
+ImportProgressCallback = Callable[[int, ImportCompanyOutput], Awaitable[None]]
+# Receives the error of a row a parser could not read, the file is rejected without one
+ParseErrorCallback = Callable[[Exception], None]
+
 
 def is_saas_company(industry: str, description: str) -> bool:
     """Determine if a company is a SaaS company based on description keywords.
@@ -50,60 +85,255 @@ def is_saas_company(industry: str, description: str) -> bool:
         description: The company's description
 
     Returns:
-        bool: True if the company appears to be a SaaS company based on keywords
+        bool: True if the description has at least `SAAS_MIN_KEYWORD_MATCHES` SaaS keywords
     """
-    if not description:
-        return False
+    return get_saas_classifier().is_saas(description)
+
+
+async def import_company(
+    file: UploadFile, db_session: AsyncSession, mode: ImportMode = ImportMode.upsert
+) -> ImportCompanyOutput:
+    """Import companies from a file.
 
-    # Convert to lowercase for case-insensitive matching
-    description_lower = description.lower()
+    Args:
+        file: The file to import.
+        db_session: The database session.
+        mode: Whether to insert or upsert the companies.
 
-    # Count how many SaaS keywords appear in the description
-    keyword_matches = sum(1 for keyword in SAAS_KEYWORDS if keyword in description_lower)
+    Returns:
+        The number of imported companies and the rows that failed.
+    """
+    content_type, content_encoding = resolve_import_format(
+        file.content_type, file.filename, file.headers.get("content-encoding")
+    )
+    return await import_company_stream(
+        _read_upload(file), content_type, db_session, mode, content_encoding=content_encoding
+    )
 
-    # Consider it a SaaS company if it has 2 or more SaaS keywords
-    return keyword_matches >= 1
 
+def resolve_import_format(
+    content_type: str | None, filename: str | None, content_encoding: str | None
+) -> Tuple[str, str | None]:
+    """Resolve the format of an uploaded file.
 
-async def import_company(file: UploadFile, db_session: AsyncSession) -> int:
-    """Import companies from a file.
+    Gzip compression is detected from the part's `Content-Encoding` header, a
+    gzip content type or a `.gz` file name. When the content type does not name
+    the format, it is inferred from the file name extension.
 
     Args:
-        file: The file to import.
+        content_type: The content type of the upload.
+        filename: The name of the uploaded file.
+        content_encoding: The `Content-Encoding` header of the upload.
+
+    Returns:
+        The content type of the data and its encoding, "gzip" or None.
+    """
+    encoding = content_encoding.lower() if content_encoding else None
+    if encoding == "identity":
+        encoding = None
+    name = (filename or "").lower()
+    if name.endswith(".gz"):
+        encoding = "gzip"
+        name = name[: -len(".gz")]
+    if content_type in _GZIP_CONTENT_TYPES:
+        encoding = "gzip"
+        content_type = None
+
+    if content_type in (None, "application/octet-stream"):
+        content_type = _CONTENT_TYPES_BY_EXTENSION.get(os.path.splitext(name)[1], content_type)
+
+    if content_type not in _PARSERS:
+        raise TelescopeValidationException(f"Unsupported file type: {content_type}")
+    if encoding not in (None, "gzip"):
+        raise TelescopeValidationException(f"Unsupported content encoding: {encoding}")
+    return content_type, encoding
+
+
+async def import_company_stream(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    db_session: AsyncSession,
+    mode: ImportMode = ImportMode.upsert,
+    on_progress: ImportProgressCallback | None = None,
+    content_encoding: str | None = None,
+    max_failed_records: int | None = None,
+) -> ImportCompanyOutput:
+    """Import companies from a stream of file chunks.
+
+    The stream is parsed incrementally: rows are grouped in batches of
+    `IMPORT_BATCH_SIZE` and each batch is written with a single bulk insert and
+    committed once, while the rest of the file is still being parsed.
+
+    In upsert mode companies are matched on their URL, and rows whose content
+    fingerprint did not change since the last import are not written at all.
+
+    Args:
+        chunks: The raw chunks of the file.
+        content_type: The content type of the file.
         db_session: The database session.
+        mode: Whether to insert or upsert the companies.
+        on_progress: Called after each committed batch with the number of rows
+            parsed so far and the current result.
+        content_encoding: "gzip" when the chunks are gzip compressed.
+        max_failed_records: The number of failed rows to keep the error of, the
+            others are only counted. All of them when None.
 
     Returns:
-        The imported company data.
+        The number of imported companies and the rows that failed.
     """
-    if file.content_type == "text/csv":
-        company_data = await _parse_csv(file)
-    elif file.content_type == "application/json":
-        company_data = await _parse_json(file)
-    else:
-        raise TelescopeValidationException(f"Unsupported file type: {file.content_type}")
+    if content_type not in _PARSERS:
+        raise TelescopeValidationException(f"Unsupported file type: {content_type}")
+    if content_encoding == "gzip":
+        chunks = _gunzip(chunks)
+
+    result = ImportCompanyOutput()
+    fail_row = functools.partial(_fail_row, result, max_failed_records=max_failed_records)
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    row = 0
 
-    processed_data = 0
-    for company in company_data:
+    def on_parse_error(error: Exception) -> None:
+        nonlocal row
+        row += 1
+        fail_row(row, error)
+
+    company_data = _PARSERS[content_type](chunks, on_parse_error)
+    # Parsing and building interleave row by row, their time is summed per batch
+    timer = StageTimer("import_company")
+    started = time.perf_counter()
+    async for company in company_data:
+        parsed = time.perf_counter()
+        timer.add("parse", parsed - started)
+        row += 1
         try:
-            await import_company_data(company, db_session)
-            processed_data += 1
+            batch.append((row, _build_company_record(company, timer)))
         except Exception as e:
-            logger.error(f"Error importing company: {e}")
+            fail_row(row, e)
+            continue
+        finally:
+            started = time.perf_counter()
+            timer.add("build", started - parsed)
+
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            await _import_batch(batch, db_session, mode, fail_row, result, timer)
+            timer.observe()
+            batch = []
+            if on_progress is not None:
+                await on_progress(row, result)
+            started = time.perf_counter()
 
-    return processed_data
+    await _import_batch(batch, db_session, mode, fail_row, result, timer)
+    timer.observe()
+    if on_progress is not None:
+        await on_progress(row, result)
+    return result
 
 
-async def import_company_data(
-    company_data: Dict[str, Any], db_session: AsyncSession
-) -> CompanyData:
-    """Import company data.
+async def _import_batch(
+    batch: List[Tuple[int, Dict[str, Any]]],
+    db_session: AsyncSession,
+    mode: ImportMode,
+    fail_row: Callable[[int, Exception], None],
+    result: ImportCompanyOutput,
+    timer: StageTimer,
+) -> None:
+    """Write a batch of company records in one transaction.
+
+    Rows repeating the URL of another row of the batch are reported as failed,
+    they would be collapsed into a single write: in upsert mode the last row is
+    written, in insert mode the first one, as if they were in separate batches.
+
+    When the batch is rejected by the database, its rows are retried one by one
+    so that only the offending rows are reported as failed.
 
     Args:
-        company_data: The company data to import.
+        batch: The row numbers and records to write.
         db_session: The database session.
+        mode: Whether to insert or upsert the companies.
+        fail_row: Reports a row that could not be imported.
+        result: The import result to update.
+        timer: The import's stage timer, adding the write and commit times.
+    """
+    if len(batch) > 1:
+        batch = _dedupe_batch(batch, mode, fail_row)
+    if not batch:
+        return
+
+    records = [record for _, record in batch]
+    try:
+        with timer.time("write"):
+            if mode == ImportMode.upsert:
+                written = await bulk_upsert(
+                    db_session, CompanyData, records, ["url"], fingerprint_column="fingerprint"
+                )
+            else:
+                written = await bulk_insert(db_session, CompanyData, records)
+        with timer.time("commit"):
+            await db_session.commit()
+        result.imported_records += len(batch)
+        result.unchanged_records += len(batch) - written
+        IMPORT_ROWS.labels(result="written").inc(written)
+        IMPORT_ROWS.labels(result="unchanged").inc(len(batch) - written)
+        return
+    except Exception as e:
+        await db_session.rollback()
+        if len(batch) == 1:
+            fail_row(batch[0][0], e)
+            return
+        logger.warning(f"Batch of {len(batch)} companies failed, retrying row by row: {e}")
+
+    for row, record in batch:
+        await _import_batch([(row, record)], db_session, mode, fail_row, result, timer)
+
+
+def _dedupe_batch(
+    batch: List[Tuple[int, Dict[str, Any]]],
+    mode: ImportMode,
+    fail_row: Callable[[int, Exception], None],
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """Keep a single row per URL in a batch, reporting the others as failed."""
+    rows_by_url: Dict[str, int] = {}
+    duplicates = 0
+    for row, record in batch:
+        kept = rows_by_url.setdefault(record["url"], row)
+        if kept == row:
+            continue
+        duplicates += 1
+        if mode == ImportMode.upsert:
+            rows_by_url[record["url"]] = row
+            fail_row(kept, ValueError(f"Duplicate URL, replaced by row {row}"))
+        else:
+            fail_row(row, ValueError(f"Duplicate URL of row {kept}"))
+    if not duplicates:
+        return batch
+    kept_rows = set(rows_by_url.values())
+    return [(row, record) for row, record in batch if row in kept_rows]
+
+
+def _fail_row(
+    result: ImportCompanyOutput,
+    row: int,
+    error: Exception,
+    max_failed_records: int | None = None,
+) -> None:
+    """Report a row that could not be imported, the import goes on with the next one."""
+    logger.error(f"Error importing company at row {row}: {error}")
+    result.failed_count += 1
+    if max_failed_records is None or len(result.failed_records) < max_failed_records:
+        result.failed_records.append(FailedRecord(row=row, error=str(error)))
+    IMPORT_ROWS.labels(result="failed").inc()
+
+
+def _build_company_record(
+    company_data: Dict[str, Any], timer: StageTimer | None = None
+) -> Dict[str, Any]:
+    """Build the `companies` column values for a parsed row.
+
+    Args:
+        company_data: The company data to import.
+        timer: A stage timer to add the SaaS classification time to.
 
     Returns:
-        The imported company data.
+        The column values of the company record.
     """
     growth = {
         "2Y": company_data.get("employee_growth_2Y", ""),
@@ -111,154 +341,991 @@ async def import_company_data(
         "6M": company_data.get("employee_growth_6M", ""),
     }
 
-    company = CompanyData(
-        name=company_data["company_name"],
-        url=company_data["url"],
-        description=company_data["description"],
-        industry=company_data["industry"],
-        founded_year=int(company_data["founded_year"]),
-        total_employees=int(company_data["total_employees"]),
-        headquarters_city=company_data["headquarters_city"],
-        employee_locations=company_data["employee_locations"],
-        employee_growth=growth,
-        imported_at=datetime.datetime.now(),
-        extras={},
-    )
-
+    now = datetime.datetime.now()
+    founded_year = int(company_data["founded_year"])
+    headquarters_city = company_data["headquarters_city"]
+    classified = time.perf_counter()
+    is_saas = is_saas_company(company_data["industry"], company_data["description"])
+    if timer is not None:
+        timer.add("classify", time.perf_counter() - classified)
     extras = {
-        "company_age": datetime.datetime.now().year - company.founded_year,
-        "is_usa_based": "(USA)" in company.headquarters_city,
-        "is_saas": is_saas_company(company.industry, company.description),
+        "company_age": now.year - founded_year,
+        "is_usa_based": "(USA)" in headquarters_city,
+        "is_saas": is_saas,
+    }
+
+    content = {
+        "name": company_data["company_name"],
+        "url": company_data["url"],
+        "description": company_data["description"],
+        "industry": company_data["industry"],
+        "founded_year": founded_year,
+        "total_employees": int(company_data["total_employees"]),
+        "headquarters_city": headquarters_city,
+        "employee_locations": company_data["employee_locations"],
+        "employee_growth": growth,
+        "extras": extras,
     }
-    company.extras = extras
-    db_session.add(company)
-    await db_session.commit()
-    return company
 
+    return {
+        **content,
+        "ref_id": uuid.uuid4(),
+        "fingerprint": _fingerprint(content),
+        "imported_at": now,
+    }
 
-async def _parse_csv(file: UploadFile) -> List[Dict[str, Any]]:
-    """Import companies from a CSV file asynchronously.
+
+def _fingerprint(content: Dict[str, Any]) -> str:
+    """Hash the content of a company record to detect unchanged re-imports."""
+    serialized = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+async def _read_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Read an uploaded file in chunks of `IMPORT_CHUNK_SIZE` bytes.
 
     Args:
-        file: The file to import.
+        file: The uploaded file.
 
-    Returns:
-        A list of dictionaries containing the company data.
+    Yields:
+        The raw chunks of the file.
     """
-    content = await file.read()
-    csv_file = io.StringIO(content.decode("utf-8"))
-    return list(csv.DictReader(csv_file))
+    while chunk := await file.read(settings.IMPORT_CHUNK_SIZE):
+        yield chunk
 
 
-async def _parse_json(file: UploadFile) -> List[Dict[str, Any]]:
-    """Import companies from a JSON file asynchronously.
+async def _gunzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Decompress a gzip stream, including files made of several gzip members.
 
     Args:
-        file: The file to import.
+        chunks: The compressed chunks of the file.
+
+    Yields:
+        The decompressed data, in chunks of at most `IMPORT_CHUNK_SIZE` bytes.
+    """
+    decompressor = zlib.decompressobj(wbits=_GZIP_WBITS)
+    in_member = False
+    try:
+        async for chunk in chunks:
+            data = chunk
+            while True:
+                in_member = in_member or bool(data)
+                output = decompressor.decompress(data, settings.IMPORT_CHUNK_SIZE)
+                if output:
+                    yield output
+                if decompressor.eof:
+                    # Another gzip member may follow the one that just ended
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=_GZIP_WBITS)
+                    in_member = False
+                    if not data:
+                        break
+                    continue
+                data = decompressor.unconsumed_tail
+                # A full output chunk may leave decompressed data buffered, keep draining
+                if not data and len(output) < settings.IMPORT_CHUNK_SIZE:
+                    break
+    except zlib.error as e:
+        raise TelescopeValidationException(f"Invalid gzip file: {e}")
+
+    if in_member:
+        raise TelescopeValidationException("Invalid gzip file: unexpected end of data")
+
+
+async def _parse_csv(
+    chunks: AsyncIterator[bytes], on_error: ParseErrorCallback | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Parse companies from a CSV stream incrementally.
+
+    A single CSV reader parses the whole file, so a row's quoting state carries
+    over from one chunk to the next. The reader runs in a worker thread and
+    fetches the lines of each chunk from the event loop as it needs them.
+
+    Args:
+        chunks: The raw chunks of the file.
+        on_error: Called with the error of a row the CSV reader rejects, such as a
+            field over the size limit, the file is rejected when it is None.
+
+    Yields:
+        A dictionary per company row, keyed by the header fields.
+    """
+    lines = _CSVLines(chunks, asyncio.get_running_loop())
+    reader = csv.reader(lines)
+    fieldnames: List[str] | None = None
+
+    while True:
+        rows, error = await asyncio.to_thread(_read_csv_rows, reader, lines)
+        if not rows and error is None:
+            break
+        for values in rows:
+            # Blank lines are skipped, like `csv.DictReader` does
+            if not values:
+                continue
+            if fieldnames is None:
+                fieldnames = values
+                continue
+            yield {
+                name: values[index] if index < len(values) else None
+                for index, name in enumerate(fieldnames)
+            }
+        if error is not None:
+            if on_error is None:
+                raise TelescopeValidationException(f"Invalid CSV file: {error}")
+            on_error(error)
+
+
+class _CSVLines:
+    """The lines of a CSV stream, iterated by a CSV reader in a worker thread.
+
+    The chunks are read and decoded on the event loop, one at a time once the
+    lines of the previous one have all been read.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = _decode_lines(chunks)
+        self._loop = loop
+        self._lines: Deque[str] = collections.deque()
+        self._finished = False
+
+    def __iter__(self) -> "_CSVLines":
+        return self
+
+    def __next__(self) -> str:
+        while not self._lines:
+            if self._finished:
+                raise StopIteration
+            future = asyncio.run_coroutine_threadsafe(self._next_lines(), self._loop)
+            lines = future.result()
+            if lines is None:
+                self._finished = True
+            else:
+                self._lines.extend(lines)
+        return self._lines.popleft()
+
+    async def _next_lines(self) -> List[str] | None:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    @property
+    def buffered(self) -> bool:
+        """Whether lines of the chunks read so far are left."""
+        return bool(self._lines)
+
+
+def _read_csv_rows(
+    reader: Iterator[List[str]], lines: _CSVLines
+) -> Tuple[List[List[str]], csv.Error | None]:
+    """Read the rows of the lines buffered, or of the next chunk when none are.
+
+    A row may span several chunks, its quoted fields holding newlines. Reading
+    stops at a row the reader rejects, the reader goes on from the next line.
 
     Returns:
-        A list of dictionaries containing the company data.
+        The rows read, empty at the end of the file, and the error of the row
+        that stopped the reading.
+    """
+    rows = []
+    try:
+        for values in reader:
+            rows.append(values)
+            if not lines.buffered:
+                break
+    except csv.Error as e:
+        return rows, e
+    return rows, None
+
+
+async def _decode_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Decode a stream and split it in lines ending with their newline, a list per chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        *lines, buffer = (buffer + decoder.decode(chunk)).split("\n")
+        if lines:
+            yield [line + "\n" for line in lines]
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield [buffer]
+
+
+async def _until_end(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes | None]:
+    """Yield the chunks followed by `None` to mark the end of the stream."""
+    async for chunk in chunks:
+        yield chunk
+    yield None
+
+
+async def _parse_json(
+    chunks: AsyncIterator[bytes], on_error: ParseErrorCallback | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Parse companies from a JSON array stream one element at a time.
+
+    Args:
+        chunks: The raw chunks of the file.
+        on_error: Unused, a file that is not a valid JSON array is rejected as a whole.
+
+    Yields:
+        A dictionary per company in the array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    json_decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    # One of: "start", "first", "value", "separator", "end"
+    state = "start"
+    finished = False
+
+    async for chunk in _until_end(chunks):
+        if chunk is None:
+            finished = True
+            text = decoder.decode(b"", final=True)
+        else:
+            text = decoder.decode(chunk)
+        buffer = buffer[position:] + text
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in _JSON_WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+
+            char = buffer[position]
+            if state == "start":
+                if char != "[":
+                    raise TelescopeValidationException("Invalid JSON file: expected an array")
+                state = "first"
+                position += 1
+            elif state == "separator" or (state == "first" and char == "]"):
+                if char == "]":
+                    state = "end"
+                elif char == "," and state == "separator":
+                    state = "value"
+                else:
+                    raise TelescopeValidationException("Invalid JSON file: expected ',' or ']'")
+                position += 1
+            elif state == "end":
+                raise TelescopeValidationException("Invalid JSON file: data after the array")
+            else:
+                try:
+                    company, end = json_decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if finished:
+                        raise TelescopeValidationException(f"Invalid JSON file: {e}")
+                    break
+                # A scalar at the end of the buffer may be cut in the middle
+                if end == len(buffer) and not finished and not isinstance(company, (dict, list)):
+                    break
+                yield company
+                state = "separator"
+                position = end
+
+    if state != "end":
+        raise TelescopeValidationException("Invalid JSON file: unexpected end of data")
+
+
+async def _parse_ndjson(
+    chunks: AsyncIterator[bytes], on_error: ParseErrorCallback | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Parse companies from a newline delimited JSON stream.
+
+    Args:
+        chunks: The raw chunks of the file.
+        on_error: Called with the error of a line that is not valid JSON, so that
+            it is reported as a failed row without stopping the import. The file
+            is rejected when it is None.
+
+    Yields:
+        A dictionary per non-blank line.
     """
-    content = await file.read()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+
+    async for chunk in _until_end(chunks):
+        if chunk is None:
+            buffer += decoder.decode(b"", final=True) + "\n"
+        else:
+            buffer += decoder.decode(chunk)
+
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                company = json.loads(line)
+            except json.JSONDecodeError as e:
+                if on_error is None:
+                    raise TelescopeValidationException(f"Invalid NDJSON file: {e}")
+                on_error(ValueError(f"Invalid JSON line: {e}"))
+                continue
+            yield company
+
 
-    return json.loads(content)
+_PARSERS: Dict[
+    str, Callable[[AsyncIterator[bytes], ParseErrorCallback | None], AsyncIterator[Dict[str, Any]]]
+] = {
+    "text/csv": _parse_csv,
+    "application/json": _parse_json,
+    "application/x-ndjson": _parse_ndjson,
+}
 
 
 async def process_companies(
-    urls: list[str], rules: list[Rule], db_session: AsyncSession
-) -> ProcessedCompaniesOutput:
+    urls: list[str],
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> Tuple[ProcessedCompaniesOutput, int]:
     """Process the companies for a given rule.
 
+    Companies already processed with the same rules since their last change are
+    skipped, their stored data is returned as it is.
+
     Args:
         urls: The URLs to process.
-        rules: The rules to process.
+        plan: The compiled rules to process.
         db_session: The database session.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
     Returns:
-        A list of dictionaries containing the processed company data.
+        A list of dictionaries containing the processed company data, and the
+        number of companies skipped.
     """
-    processed_data = []
-    for url in urls:
-        company = await get_company_by_url(url, db_session)
-        if company is None:
-            raise TelescopeValidationException(f"Company not found: {url}")
-
-        processed_company = await process_company(company, rules, db_session)
-        processed_data.append(
-            {
-                **processed_company.data,
-            }
+    if mode == ProcessMode.database:
+        expressions = compile_rules_sql(plan)
+        if expressions is not None:
+            return await _process_companies_in_database(
+                urls, expressions, plan.rules_hash, db_session, force
+            )
+        logger.info("Rules can't be translated to SQL, processing the companies in Python")
+
+    with STAGE_DURATION.labels(operation="process_companies", stage="load").time():
+        companies = await get_companies_by_url(urls, db_session)
+        unchanged_data = (
+            {} if force else await _unchanged_data(companies.values(), plan, db_session)
         )
-    await db_session.commit()
+    processed_data = await _process_chunk(
+        [company for company in companies.values() if company.id not in unchanged_data],
+        plan,
+        db_session,
+    )
+    with STAGE_DURATION.labels(operation="process_companies", stage="commit").time():
+        await db_session.commit()
+
+    processed_data.update(unchanged_data)
+    output = ProcessedCompaniesOutput(root=[processed_data[companies[url].id] for url in urls])
+    return output, len(unchanged_data)
 
-    return ProcessedCompaniesOutput(root=processed_data)
 
+async def iter_companies(
+    urls: list[str],
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Process the companies for a given rule, yielding each company as it is processed.
 
-async def get_company_by_url(url: str, db_session: AsyncSession) -> CompanyData:
-    """Get the company by URL.
+    The URLs are processed `PROCESS_CHUNK_SIZE` at a time with `process_companies`,
+    each chunk is committed before its companies are yielded in the order of the
+    URLs. The stored data of the companies skipped because they are unchanged is
+    yielded too. Check the URLs with `check_companies_found` first, a missing one
+    fails the chunk it is in.
 
     Args:
-        url: The URL to get the company by.
+        urls: The URLs to process.
+        plan: The compiled rules to process.
+        db_session: The database session.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
+
+    Yields:
+        The processed data of each company.
+    """
+    chunk_size = settings.PROCESS_CHUNK_SIZE
+    for start in range(0, len(urls), chunk_size):
+        processed_data, _ = await process_companies(
+            urls[start : start + chunk_size], plan, db_session, mode, force
+        )
+        for data in processed_data.root:
+            yield data
+
+
+async def process_selected_companies(
+    selector: CompanySelector,
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> ProcessCompaniesSummary:
+    """Process every company matching a selector.
+
+    In Python mode the companies are evaluated and stored `PROCESS_CHUNK_SIZE`
+    at a time, so memory stays bounded whatever the number of companies. In
+    database mode a single statement processes all of them. Companies already
+    processed with the same rules since their last change are not read at all.
+
+    Args:
+        selector: The filter the companies to process match.
+        plan: The compiled rules to process.
+        db_session: The database session.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
 
     Returns:
-        The company data.
+        The number of companies processed and skipped.
     """
-    company = await db_session.exec(select(CompanyData).where(CompanyData.url == url))
-    return company.first()
+    return await _process_matching_companies(
+        _selector_conditions(selector), plan, db_session, mode, force
+    )
 
 
-async def process_company(
-    company: CompanyData, rules: list[Rule], db_session: AsyncSession
-) -> ProcessedCompany:
-    """Process the company for a given rule.
+async def process_company_ids(
+    company_ids: List[int],
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> ProcessCompaniesSummary:
+    """Process the companies with the given ids, the way `process_selected_companies` does.
 
     Args:
-        company: The company to process.
-        rules: The rules to process.
+        company_ids: The ids of the companies to process.
+        plan: The compiled rules to process.
         db_session: The database session.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
 
     Returns:
-        A dictionary containing the processed company data.
+        The number of companies processed and skipped.
     """
-    company_processed_data = {
-        "company_name": company.name,
-    }
-    for rule in rules:
-        feature_value = get_feature_value(company, rule)
-        company_processed_data.update(feature_value)
+    conditions = [any_of(get_dialect_name(db_session), CompanyData.id, company_ids)]
+    return await _process_matching_companies(conditions, plan, db_session, mode, force)
 
-    existing_processed = await db_session.exec(
-        select(ProcessedCompany).where(ProcessedCompany.company_id == company.id)
-    )
-    existing = existing_processed.first()
 
-    if existing:
-        existing.data = company_processed_data
-        existing.processed_at = datetime.datetime.now()
-        processed_company = existing
+async def _process_matching_companies(
+    conditions: List[ColumnElement],
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode,
+    force: bool,
+) -> ProcessCompaniesSummary:
+    """Process every company matching conditions, see `process_selected_companies`."""
+    skipped_records = 0
+    if not force:
+        unchanged = _unchanged_condition(plan.rules_hash)
+        result = await db_session.exec(
+            select(func.count()).select_from(CompanyData).where(*conditions, unchanged)
+        )
+        skipped_records = result.one()
+        conditions = [*conditions, ~unchanged]
+
+    summary = {"rule_set_id": plan.rules_hash, "skipped_records": skipped_records}
+    if mode == ProcessMode.database:
+        expressions = compile_rules_sql(plan)
+        if expressions is not None:
+            with STAGE_DURATION.labels(operation="process_companies", stage="evaluate_sql").time():
+                result = await _upsert_features(
+                    conditions, expressions, plan.rules_hash, db_session
+                )
+            RULES_EVALUATED.labels(mode="database").inc(result.rowcount * len(expressions))
+            with STAGE_DURATION.labels(operation="process_companies", stage="commit").time():
+                await db_session.commit()
+            return ProcessCompaniesSummary(processed_records=result.rowcount, **summary)
+        logger.info("Rules can't be translated to SQL, processing the companies in Python")
+
+    processed_records = 0
+    async for processed_data in _process_selected_chunks(conditions, plan, db_session):
+        processed_records += len(processed_data)
+
+    return ProcessCompaniesSummary(processed_records=processed_records, **summary)
+
+
+async def iter_selected_companies(
+    selector: CompanySelector,
+    plan: RulePlan,
+    db_session: AsyncSession,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Process every company matching a selector, yielding each company as it is processed.
+
+    In database mode the companies are processed and committed by a single
+    statement first, their stored data is then streamed back. In Python mode
+    each chunk is committed before its companies are yielded, so what was
+    streamed is kept when the client disconnects before the end. The stored
+    data of the companies skipped because they are unchanged is yielded too.
+
+    Args:
+        selector: The filter the companies to process match.
+        plan: The compiled rules to process.
+        db_session: The database session.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
+
+    Yields:
+        The processed data of each company.
+    """
+    conditions = _selector_conditions(selector)
+    expressions = compile_rules_sql(plan) if mode == ProcessMode.database else None
+    if expressions is not None:
+        changed = [] if force else [~_unchanged_condition(plan.rules_hash)]
+        with STAGE_DURATION.labels(operation="process_companies", stage="evaluate_sql").time():
+            result = await _upsert_features(
+                [*conditions, *changed], expressions, plan.rules_hash, db_session
+            )
+        RULES_EVALUATED.labels(mode="database").inc(result.rowcount * len(expressions))
+        with STAGE_DURATION.labels(operation="process_companies", stage="commit").time():
+            await db_session.commit()
+        async for data in _stream_processed_data(conditions, db_session):
+            yield data
     else:
-        processed_company = ProcessedCompany(
-            company_id=company.id, data=company_processed_data, processed_at=datetime.datetime.now()
+        async for processed_data in _process_selected_chunks(
+            conditions, plan, db_session, skip_unchanged=not force
+        ):
+            for data in processed_data.values():
+                yield data
+
+
+async def _process_selected_chunks(
+    conditions: List[ColumnElement],
+    plan: RulePlan,
+    db_session: AsyncSession,
+    skip_unchanged: bool = False,
+) -> AsyncIterator[Dict[int, Dict[str, Any]]]:
+    """Process the companies matching conditions, `PROCESS_CHUNK_SIZE` at a time.
+
+    The companies are read a page at a time, in the order of their ids, so
+    memory stays bounded whatever the number of companies. Each chunk is
+    committed before it is yielded: an interrupted run keeps the chunks
+    processed so far, the next chunk is read after the last id rather than
+    through a cursor a commit would close.
+
+    Args:
+        conditions: The conditions the companies to process match.
+        plan: The compiled rules to process.
+        db_session: The database session.
+        skip_unchanged: Keep the stored data of the unchanged companies of each
+            chunk instead of processing them again.
+
+    Yields:
+        The processed company data of each chunk, by company id.
+    """
+    query = select(CompanyData).where(*conditions).order_by(CompanyData.id)
+    last_id: int | None = None
+    while True:
+        page = query if last_id is None else query.where(CompanyData.id > last_id)
+        chunk = (await db_session.exec(page.limit(settings.PROCESS_CHUNK_SIZE))).all()
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+
+        unchanged_data = await _unchanged_data(chunk, plan, db_session) if skip_unchanged else {}
+        processed_data = await _process_chunk(
+            [company for company in chunk if company.id not in unchanged_data], plan, db_session
         )
-        db_session.add(processed_company)
+        processed_data.update(unchanged_data)
+        processed_data = {company.id: processed_data[company.id] for company in chunk}
+        # Keep the session from holding on to every company processed so far
+        for company in chunk:
+            db_session.expunge(company)
+        with STAGE_DURATION.labels(operation="process_companies", stage="commit").time():
+            await db_session.commit()
+        yield processed_data
 
-    return processed_company
 
+async def _process_chunk(
+    companies: List[CompanyData], plan: RulePlan, db_session: AsyncSession
+) -> Dict[int, Dict[str, Any]]:
+    """Evaluate the rules on a chunk of companies and store the features with bulk upserts.
 
-async def get_processed_companies(db_session: AsyncSession) -> ProcessedCompaniesOutput:
-    """Get the processed companies.
+    The processed data and the feature store are both written.
 
     Args:
+        companies: The companies to process.
+        plan: The compiled rules to process.
         db_session: The database session.
 
     Returns:
-        A list of processed companies.
+        The processed company data, by company id.
     """
-    processed_companies = await db_session.exec(select(ProcessedCompany))
-    processed_data = [
+    now = datetime.datetime.now()
+    with STAGE_DURATION.labels(operation="process_companies", stage="evaluate").time():
+        features = {
+            company.id: company_features
+            for company, company_features in zip(companies, plan.evaluate_batch(companies))
+        }
+    RULES_EVALUATED.labels(mode="python").inc(len(companies) * len(plan.rules))
+    records = [
         {
-            **pd.data,
+            "ref_id": uuid.uuid4(),
+            "company_id": company.id,
+            "data": {"company_name": company.name, **features[company.id]},
+            "processed_at": now,
+            "rule_set_id": plan.rules_hash,
+            "source_fingerprint": company.fingerprint,
         }
-        for pd in processed_companies.all()
+        for company in companies
     ]
+    with STAGE_DURATION.labels(operation="process_companies", stage="write").time():
+        await bulk_upsert(db_session, ProcessedCompany, records, index_elements=["company_id"])
+        await store_features(db_session, plan.rules_hash, features)
+    return {record["company_id"]: record["data"] for record in records}
+
+
+async def _unchanged_data(
+    companies: Iterable[CompanyData], plan: RulePlan, db_session: AsyncSession
+) -> Dict[int, Dict[str, Any]]:
+    """Get the stored data of the companies already processed with the rules since their last change.
+
+    Companies without a fingerprint are never considered unchanged.
+
+    Args:
+        companies: The companies to check.
+        plan: The compiled rules to process.
+        db_session: The database session.
+
+    Returns:
+        The processed data of the unchanged companies, by company id.
+    """
+    fingerprints = {
+        company.id: company.fingerprint for company in companies if company.fingerprint is not None
+    }
+    if not fingerprints:
+        return {}
+
+    result = await db_session.exec(
+        select(
+            ProcessedCompany.company_id, ProcessedCompany.source_fingerprint, ProcessedCompany.data
+        ).where(
+            ProcessedCompany.rule_set_id == plan.rules_hash,
+            any_of(get_dialect_name(db_session), ProcessedCompany.company_id, list(fingerprints)),
+        )
+    )
+    return {
+        company_id: data
+        for company_id, source_fingerprint, data in result.all()
+        if source_fingerprint == fingerprints[company_id]
+    }
+
+
+def _unchanged_condition(rule_set_id: str) -> ColumnElement:
+    """Match the companies already processed with a rule set since their last change."""
+    return exists().where(
+        ProcessedCompany.company_id == CompanyData.id,
+        ProcessedCompany.rule_set_id == rule_set_id,
+        ProcessedCompany.source_fingerprint == CompanyData.fingerprint,
+    )
+
+
+def _selector_conditions(selector: CompanySelector) -> List[ColumnElement]:
+    """Translate a company selector into SQL conditions."""
+    conditions = []
+    if selector.industry is not None:
+        conditions.append(CompanyData.industry == selector.industry)
+    if selector.founded_year_from is not None:
+        conditions.append(CompanyData.founded_year >= selector.founded_year_from)
+    if selector.founded_year_to is not None:
+        conditions.append(CompanyData.founded_year <= selector.founded_year_to)
+    if selector.imported_since is not None:
+        conditions.append(CompanyData.imported_at >= selector.imported_since)
+    return conditions
+
+
+async def _process_companies_in_database(
+    urls: list[str],
+    expressions: Dict[str, ColumnElement],
+    rule_set_id: str,
+    db_session: AsyncSession,
+    force: bool = False,
+) -> Tuple[ProcessedCompaniesOutput, int]:
+    """Compute and store the features of the companies with a single INSERT ... SELECT.
+
+    Only the resulting feature values are sent back from the database.
+
+    Args:
+        urls: The URLs to process.
+        expressions: The SQL expression of each feature, by feature name.
+        rule_set_id: The rule set the features are computed with.
+        db_session: The database session.
+        force: Process every company, even the unchanged ones.
+
+    Returns:
+        A list of dictionaries containing the processed company data, and the
+        number of companies skipped.
+    """
+    dialect_name = get_dialect_name(db_session)
+    result = await db_session.exec(
+        select(CompanyData.url, CompanyData.id).where(any_of(dialect_name, CompanyData.url, urls))
+    )
+    company_ids = dict(result.all())
+    _check_companies_found(urls, company_ids)
+
+    processed_data: Dict[int, Dict[str, Any]] = {}
+    if not force:
+        result = await db_session.exec(
+            select(ProcessedCompany.company_id, ProcessedCompany.data)
+            .join(CompanyData)
+            .where(
+                any_of(dialect_name, CompanyData.id, list(company_ids.values())),
+                ProcessedCompany.rule_set_id == rule_set_id,
+                ProcessedCompany.source_fingerprint == CompanyData.fingerprint,
+            )
+        )
+        processed_data.update(result.all())
+    skipped_records = len(processed_data)
+
+    changed_ids = [id_ for id_ in company_ids.values() if id_ not in processed_data]
+    if changed_ids:
+        with STAGE_DURATION.labels(operation="process_companies", stage="evaluate_sql").time():
+            result = await _upsert_features(
+                [any_of(dialect_name, CompanyData.id, changed_ids)],
+                expressions,
+                rule_set_id,
+                db_session,
+                returning=[ProcessedCompany.company_id, ProcessedCompany.data],
+            )
+            processed_data.update(result.all())
+        RULES_EVALUATED.labels(mode="database").inc(len(changed_ids) * len(expressions))
+    with STAGE_DURATION.labels(operation="process_companies", stage="commit").time():
+        await db_session.commit()
+
+    output = ProcessedCompaniesOutput(root=[processed_data[company_ids[url]] for url in urls])
+    return output, skipped_records
+
+
+async def _upsert_features(
+    conditions: List[ColumnElement],
+    expressions: Dict[str, ColumnElement],
+    rule_set_id: str,
+    db_session: AsyncSession,
+    returning: List[ColumnElement] | None = None,
+) -> CursorResult:
+    """Compute and store the features of the companies matching conditions.
+
+    The processed data and the feature store are each written by a single
+    INSERT ... SELECT. Both are kept: the processed data is the latest result
+    of each company whatever its rule set, which `/get_companies` and the
+    exports return and the unchanged company checks compare against, while the
+    feature store keeps the values of every rule set for filtering and counting.
+
+    Args:
+        conditions: The conditions the companies to process match.
+        expressions: The SQL expression of each feature, by feature name.
+        rule_set_id: The rule set the features are computed with.
+        db_session: The database session.
+        returning: The `processed_companies` columns to return, if any.
+
+    Returns:
+        The result of the processed data INSERT ... SELECT.
+    """
+    dialect_name = get_dialect_name(db_session)
+    await store_features_from_select(db_session, rule_set_id, conditions, expressions)
+    return await upsert_from_select(
+        db_session,
+        ProcessedCompany,
+        ["ref_id", "company_id", "data", "processed_at", "rule_set_id", "source_fingerprint"],
+        select(
+            random_uuid(dialect_name),
+            CompanyData.id,
+            json_object(dialect_name, {"company_name": CompanyData.name, **expressions}),
+            literal(datetime.datetime.now(), DateTime),
+            literal(rule_set_id),
+            CompanyData.fingerprint,
+        ).where(*conditions),
+        index_elements=["company_id"],
+        returning=returning,
+    )
 
-    return ProcessedCompaniesOutput(root=processed_data)
+
+async def get_companies_by_url(urls: List[str], db_session: AsyncSession) -> Dict[str, CompanyData]:
+    """Get the companies by URL, with a single query.
+
+    Args:
+        urls: The URLs to get the companies by.
+        db_session: The database session.
+
+    Returns:
+        The company data, by URL.
+
+    Raises:
+        TelescopeValidationException: If some URLs are not found, all of them are reported.
+    """
+    result = await db_session.exec(
+        select(CompanyData).where(any_of(get_dialect_name(db_session), CompanyData.url, urls))
+    )
+    companies = {company.url: company for company in result.all()}
+    _check_companies_found(urls, companies)
+    return companies
+
+
+async def check_companies_found(urls: List[str], db_session: AsyncSession) -> None:
+    """Check that every URL has a company, with a single query.
+
+    Args:
+        urls: The URLs to check.
+        db_session: The database session.
+
+    Raises:
+        TelescopeValidationException: If some URLs are not found, all of them are reported.
+    """
+    result = await db_session.exec(
+        select(CompanyData.url).where(any_of(get_dialect_name(db_session), CompanyData.url, urls))
+    )
+    _check_companies_found(urls, dict.fromkeys(result.all()))
+
+
+async def iter_company_id_chunks(
+    db_session: AsyncSession,
+    urls: List[str] | None = None,
+    selector: CompanySelector | None = None,
+) -> AsyncIterator[List[int]]:
+    """Get the ids of the companies to process, `PROCESS_CHUNK_SIZE` at a time, in id order.
+
+    Args:
+        db_session: The database session.
+        urls: The URLs of the companies.
+        selector: The filter the companies match, when there are no URLs.
+
+    Yields:
+        The company ids of each chunk.
+
+    Raises:
+        TelescopeValidationException: If some URLs are not found, all of them are reported.
+    """
+    chunk_size = settings.PROCESS_CHUNK_SIZE
+    if urls is not None:
+        result = await db_session.exec(
+            select(CompanyData.url, CompanyData.id).where(
+                any_of(get_dialect_name(db_session), CompanyData.url, urls)
+            )
+        )
+        company_ids = dict(result.all())
+        _check_companies_found(urls, company_ids)
+        ids = sorted(set(company_ids.values()))
+        for start in range(0, len(ids), chunk_size):
+            yield ids[start : start + chunk_size]
+        return
+
+    result = await db_session.stream_scalars(
+        select(CompanyData.id)
+        .where(*_selector_conditions(selector or CompanySelector()))
+        .order_by(CompanyData.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for chunk in result.partitions():
+        yield list(chunk)
+
+
+def _check_companies_found(urls: List[str], found: Dict[str, Any]) -> None:
+    """Report the requested URLs that have no company."""
+    missing = list(dict.fromkeys(url for url in urls if url not in found))
+    if missing:
+        raise TelescopeValidationException(f"Companies not found: {', '.join(missing)}")
+
+
+async def get_processed_companies(
+    db_session: AsyncSession,
+    limit: int,
+    cursor: int | None = None,
+    filters: Dict[str, Any] | None = None,
+    rule_set_id: str | None = None,
+) -> ProcessedCompaniesPage:
+    """Get a page of processed companies.
+
+    Pages are keyed on the processed company id: a page starts right after the
+    cursor, so getting any page costs the same whatever its position. With a
+    rule set, the features computed with it are read from the feature store
+    instead, keyed on the company id.
+
+    Args:
+        db_session: The database session.
+        limit: The maximum number of processed companies in the page.
+        cursor: The cursor returned with the previous page, None for the first page.
+        filters: The feature values the processed companies must have, by feature name.
+        rule_set_id: The rule set to read the features of, None for the latest processed data.
+
+    Returns:
+        A page of processed companies and the cursor of the next page.
+    """
+    if rule_set_id is not None:
+        with STAGE_DURATION.labels(
+            operation="get_processed_companies", stage="feature_store"
+        ).time():
+            return await get_feature_page(db_session, rule_set_id, limit, cursor, filters)
+
+    statement = select(ProcessedCompany.id, ProcessedCompany.data).where(
+        *_processed_data_conditions(filters, db_session)
+    )
+    if cursor is not None:
+        statement = statement.where(ProcessedCompany.id > cursor)
+    with STAGE_DURATION.labels(operation="get_processed_companies", stage="query").time():
+        result = await db_session.exec(statement.order_by(ProcessedCompany.id).limit(limit + 1))
+        rows = result.all()
+
+    with STAGE_DURATION.labels(operation="get_processed_companies", stage="build").time():
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        page = ProcessedCompaniesPage(
+            data=[row.data for row in rows[:limit]], next_cursor=next_cursor
+        )
+    return page
+
+
+async def iter_processed_companies(
+    db_session: AsyncSession,
+    filters: Dict[str, Any] | None = None,
+    rule_set_id: str | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the processed companies, without loading all of them at once.
+
+    Args:
+        db_session: The database session.
+        filters: The feature values the processed companies must have, by feature name.
+        rule_set_id: The rule set to read the features of, None for the latest processed data.
+
+    Yields:
+        The data of each processed company.
+    """
+    if rule_set_id is not None:
+        async for data in iter_feature_store(db_session, rule_set_id, filters):
+            yield data
+        return
+
+    async for data in _stream_processed_data(
+        _processed_data_conditions(filters, db_session), db_session
+    ):
+        yield data
+
+
+def _processed_data_conditions(
+    filters: Dict[str, Any] | None, db_session: AsyncSession
+) -> List[ColumnElement]:
+    """Translate feature filters into SQL conditions on the processed data."""
+    if not filters:
+        return []
+    return [json_contains(get_dialect_name(db_session), ProcessedCompany.data, filters)]
+
+
+async def _stream_processed_data(
+    conditions: List[ColumnElement], db_session: AsyncSession
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the processed data of the companies matching conditions from a server-side cursor.
+
+    Args:
+        conditions: The conditions on the companies and their processed data.
+        db_session: The database session.
+
+    Yields:
+        The data of each processed company.
+    """
+    statement = select(ProcessedCompany.data).join(CompanyData).where(*conditions)
+    processed_data = await db_session.stream_scalars(
+        statement.order_by(ProcessedCompany.company_id).execution_options(
+            yield_per=settings.PROCESS_CHUNK_SIZE
+        )
+    )
+    async for data in processed_data:
+        yield data
@@ -0,0 +1,237 @@
+"""Company feature store"""
+
+from typing import Any, AsyncIterator, Dict, List
+
+from api.schema import FeatureCount, FeatureCountsOutput, ProcessedCompaniesPage
+from core.config import settings
+from core.exceptions import TelescopeValidationException
+from db.bulk import bulk_upsert, upsert_from_select
+from db.functions import any_of
+from db.session import get_dialect_name
+from models.companies import CompanyData, CompanyFeature
+from sqlalchemy import CursorResult, and_, exists, func, literal, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+# Columns a feature value is stored on
+_FEATURE_KEY = ["company_id", "rule_set_id", "feature_name"]
+
+
+async def store_features(
+    db_session: AsyncSession, rule_set_id: str, features: Dict[int, Dict[str, int]]
+) -> int:
+    """Store the feature values of many companies with one bulk upsert.
+
+    Args:
+        db_session: The database session.
+        rule_set_id: The rule set the features were computed with.
+        features: The feature values of each company, by company id.
+
+    Returns:
+        The number of feature values stored.
+    """
+    records = [
+        {"company_id": company_id, "rule_set_id": rule_set_id, "feature_name": name, "value": value}
+        for company_id, company_features in features.items()
+        for name, value in company_features.items()
+    ]
+    return await bulk_upsert(db_session, CompanyFeature, records, index_elements=_FEATURE_KEY)
+
+
+async def store_features_from_select(
+    db_session: AsyncSession,
+    rule_set_id: str,
+    conditions: List[ColumnElement],
+    expressions: Dict[str, ColumnElement],
+) -> CursorResult | None:
+    """Compute and store the feature values of the companies matching conditions, in one statement.
+
+    Args:
+        db_session: The database session.
+        rule_set_id: The rule set the features are computed with.
+        conditions: The conditions the companies to process match.
+        expressions: The SQL expression of each feature, by feature name.
+
+    Returns:
+        The result of the INSERT ... SELECT, None when there is no feature to store.
+    """
+    if not expressions:
+        return None
+
+    feature_rows = union_all(
+        *(
+            select(CompanyData.id, literal(rule_set_id), literal(name), expression).where(
+                *conditions
+            )
+            for name, expression in expressions.items()
+        )
+    ).subquery()
+    return await upsert_from_select(
+        db_session,
+        CompanyFeature,
+        [*_FEATURE_KEY, "value"],
+        select(*feature_rows.c),
+        index_elements=_FEATURE_KEY,
+    )
+
+
+async def get_feature_page(
+    db_session: AsyncSession,
+    rule_set_id: str,
+    limit: int,
+    cursor: int | None = None,
+    filters: Dict[str, Any] | None = None,
+) -> ProcessedCompaniesPage:
+    """Get a page of the companies processed with a rule set, from the feature store.
+
+    Pages are keyed on the company id, the same way as the processed data pages.
+
+    Args:
+        db_session: The database session.
+        rule_set_id: The rule set the features were computed with.
+        limit: The maximum number of companies in the page.
+        cursor: The cursor returned with the previous page, None for the first page.
+        filters: The feature values the companies must have, by feature name.
+
+    Returns:
+        A page of processed companies and the cursor of the next page.
+
+    Raises:
+        TelescopeValidationException: If a feature filter is not an integer.
+    """
+    statement = select(CompanyData.id, CompanyData.name).where(
+        *_feature_conditions(rule_set_id, filters)
+    )
+    if cursor is not None:
+        statement = statement.where(CompanyData.id > cursor)
+    result = await db_session.exec(statement.order_by(CompanyData.id).limit(limit + 1))
+    companies = result.all()
+
+    page = companies[:limit]
+    data: Dict[int, Dict[str, Any]] = {
+        company.id: {"company_name": company.name} for company in page
+    }
+    if data:
+        result = await db_session.exec(
+            select(CompanyFeature.company_id, CompanyFeature.feature_name, CompanyFeature.value)
+            .where(
+                CompanyFeature.rule_set_id == rule_set_id,
+                any_of(get_dialect_name(db_session), CompanyFeature.company_id, list(data)),
+            )
+            .order_by(CompanyFeature.company_id, CompanyFeature.feature_name)
+        )
+        for company_id, feature_name, value in result.all():
+            data[company_id][feature_name] = value
+
+    next_cursor = page[-1].id if len(companies) > limit else None
+    return ProcessedCompaniesPage(data=list(data.values()), next_cursor=next_cursor)
+
+
+async def iter_feature_store(
+    db_session: AsyncSession, rule_set_id: str, filters: Dict[str, Any] | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the companies processed with a rule set, `PROCESS_CHUNK_SIZE` at a time.
+
+    Args:
+        db_session: The database session.
+        rule_set_id: The rule set the features were computed with.
+        filters: The feature values the companies must have, by feature name.
+
+    Yields:
+        The data of each processed company.
+    """
+    cursor = None
+    while True:
+        page = await get_feature_page(
+            db_session, rule_set_id, settings.PROCESS_CHUNK_SIZE, cursor, filters
+        )
+        for data in page.data:
+            yield data
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+
+async def count_features(
+    db_session: AsyncSession,
+    rule_set_id: str,
+    group_by: str,
+    filters: Dict[str, Any] | None = None,
+) -> FeatureCountsOutput:
+    """Count the companies by value of a feature, e.g. the SaaS companies by `usa_based_feature`.
+
+    The count is a single aggregate over the feature store index, every filter
+    being a join on the same index.
+
+    Args:
+        db_session: The database session.
+        rule_set_id: The rule set the features were computed with.
+        group_by: The feature to group the companies by.
+        filters: The feature values the counted companies must have, by feature name.
+
+    Returns:
+        The number of companies for each value of the feature, by increasing value.
+
+    Raises:
+        TelescopeValidationException: If a feature filter is not an integer.
+    """
+    grouped = aliased(CompanyFeature)
+    statement = select(grouped.value, func.count()).where(
+        grouped.rule_set_id == rule_set_id, grouped.feature_name == group_by
+    )
+    for name, value in _integer_filters(filters).items():
+        feature = aliased(CompanyFeature)
+        statement = statement.join(
+            feature,
+            and_(
+                feature.company_id == grouped.company_id,
+                feature.rule_set_id == grouped.rule_set_id,
+                feature.feature_name == name,
+                feature.value == value,
+            ),
+        )
+    result = await db_session.exec(statement.group_by(grouped.value).order_by(grouped.value))
+    return FeatureCountsOutput(
+        root=[FeatureCount(value=value, companies=companies) for value, companies in result.all()]
+    )
+
+
+def _feature_conditions(rule_set_id: str, filters: Dict[str, Any] | None) -> List[ColumnElement]:
+    """Translate feature filters into SQL conditions on the companies.
+
+    The company name is matched on the company itself, every other filter on a
+    feature value. Companies without any feature of the rule set never match.
+    """
+    filters = dict(filters or {})
+    conditions = []
+    if "company_name" in filters:
+        conditions.append(CompanyData.name == filters.pop("company_name"))
+
+    in_rule_set = (
+        CompanyFeature.company_id == CompanyData.id,
+        CompanyFeature.rule_set_id == rule_set_id,
+    )
+    feature_filters = _integer_filters(filters)
+    if not feature_filters:
+        conditions.append(exists().where(*in_rule_set))
+    for name, value in feature_filters.items():
+        conditions.append(
+            exists().where(
+                *in_rule_set, CompanyFeature.feature_name == name, CompanyFeature.value == value
+            )
+        )
+    return conditions
+
+
+def _integer_filters(filters: Dict[str, Any] | None) -> Dict[str, int]:
+    """Check that feature filters are integers, the only values the feature store holds."""
+    integer_filters = {}
+    for name, value in (filters or {}).items():
+        # Booleans are integers to Python, `?feature=true` would match the value 1
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TelescopeValidationException(f"Feature filter {name} must be an integer")
+        integer_filters[name] = int(value)
+    return integer_filters
@@ -0,0 +1,381 @@
+"""Background company import jobs."""
+
+import asyncio
+import contextvars
+import datetime
+import os
+import uuid
+from typing import AsyncIterator, Dict, Set
+
+import aiofiles
+from api.schema import FailedRecord, ImportCompanyOutput, ImportJobOutput, ImportMode
+from core.config import settings
+from core.exceptions import ObjectNotFound
+from core.logging import get_logger
+from db.session import get_session_maker
+from fastapi import UploadFile
+from models.import_jobs import ImportJob, ImportJobStatus
+from service.companies import import_company_stream, resolve_import_format
+from sqlalchemy import and_, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+logger = get_logger(__name__)
+
+# Import jobs running in this process, by job id
+_running_jobs: Dict[int, asyncio.Task] = {}
+# Jobs of this process cancelled through the API, any other cancellation is a shutdown
+_cancelled_jobs: Set[int] = set()
+
+
+class _ImportJobCancelled(Exception):
+    """Raised from a progress checkpoint when the job was cancelled elsewhere."""
+
+
+async def create_import_job(
+    file: UploadFile, mode: ImportMode, db_session: AsyncSession
+) -> ImportJobOutput:
+    """Spool an upload to disk and start importing it in the background.
+
+    Args:
+        file: The file to import.
+        mode: Whether to insert or upsert the companies.
+        db_session: The database session.
+
+    Returns:
+        The created import job.
+    """
+    content_type, content_encoding = resolve_import_format(
+        file.content_type, file.filename, file.headers.get("content-encoding")
+    )
+
+    # Compressed uploads are spooled as they are and decompressed by the import
+    os.makedirs(settings.IMPORT_SPOOL_DIR, exist_ok=True)
+    file_path = os.path.join(settings.IMPORT_SPOOL_DIR, f"{uuid.uuid4()}.upload")
+    async with aiofiles.open(file_path, "wb") as spool:
+        while chunk := await file.read(settings.IMPORT_CHUNK_SIZE):
+            await spool.write(chunk)
+
+    job = ImportJob(
+        status=ImportJobStatus.pending,
+        mode=mode.value,
+        content_type=content_type,
+        content_encoding=content_encoding,
+        filename=file.filename,
+        file_path=file_path,
+        failed_records=[],
+        created_at=datetime.datetime.now(),
+    )
+    db_session.add(job)
+    await db_session.commit()
+
+    _start_import_job(job.id)
+    return _job_output(job)
+
+
+async def get_import_job(job_id: uuid.UUID, db_session: AsyncSession) -> ImportJobOutput:
+    """Get the progress of an import job.
+
+    Args:
+        job_id: The public id of the job.
+        db_session: The database session.
+
+    Returns:
+        The import job.
+    """
+    return _job_output(await _get_job(job_id, db_session))
+
+
+async def cancel_import_job(job_id: uuid.UUID, db_session: AsyncSession) -> ImportJobOutput:
+    """Cancel a pending or running import job.
+
+    Jobs running in this process are interrupted right away, jobs running in
+    another process stop at their next progress checkpoint.
+
+    Args:
+        job_id: The public id of the job.
+        db_session: The database session.
+
+    Returns:
+        The import job.
+    """
+    job = await _get_job(job_id, db_session)
+    if job.status in (ImportJobStatus.pending, ImportJobStatus.running):
+        job.status = ImportJobStatus.cancelled
+        job.finished_at = datetime.datetime.now()
+        await db_session.commit()
+
+        task = _running_jobs.get(job.id)
+        if task is not None:
+            _cancelled_jobs.add(job.id)
+            task.cancel()
+
+    return _job_output(job)
+
+
+async def run_import_job(job_id: int) -> None:
+    """Run an import job, checkpointing its progress after every batch.
+
+    The job keeps the errors of its first `IMPORT_JOB_MAX_FAILED_RECORDS` failed
+    rows, the others are only counted. Its final status is only set while it is
+    still running, a cancellation committed meanwhile by another process stands.
+
+    A job stopped by a shutdown rather than cancelled through the API is marked
+    interrupted, its spooled upload is kept for `resume_import_jobs` and the
+    cancellation is raised again.
+
+    Args:
+        job_id: The id of the job.
+    """
+    session_maker = get_session_maker()
+    async with session_maker() as job_session, session_maker() as import_session:
+        # Claimed with a conditional update, another process may be resuming the same job
+        claimed = await job_session.exec(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == ImportJobStatus.pending)
+            .values(
+                status=ImportJobStatus.running,
+                started_at=datetime.datetime.now(),
+                checkpoint_at=None,
+            )
+            .returning(ImportJob.id)
+        )
+        if claimed.first() is None:
+            await job_session.commit()
+            return
+        await job_session.commit()
+        job = await job_session.get(ImportJob, job_id)
+
+        async def checkpoint(rows_parsed: int, result: ImportCompanyOutput) -> None:
+            await job_session.refresh(job, ["status"])
+            if job.status == ImportJobStatus.cancelled:
+                raise _ImportJobCancelled()
+            _update_progress(job, rows_parsed, result)
+            await job_session.commit()
+
+        # Left empty when the job was cancelled, its status is set already
+        final_values = {}
+        try:
+            await import_company_stream(
+                _read_spool(job.file_path),
+                job.content_type,
+                import_session,
+                ImportMode(job.mode),
+                on_progress=checkpoint,
+                content_encoding=job.content_encoding,
+                max_failed_records=settings.IMPORT_JOB_MAX_FAILED_RECORDS,
+            )
+            final_values = {"status": ImportJobStatus.completed}
+        except asyncio.CancelledError:
+            if job_id not in _cancelled_jobs:
+                logger.warning(f"Import job {job.ref_id} interrupted at row {job.rows_parsed}")
+                try:
+                    await _finish_job(job_session, job_id, status=ImportJobStatus.interrupted)
+                except Exception as e:
+                    # Left running, the job is resumed once it is stale
+                    logger.error(f"Marking import job {job.ref_id} interrupted failed: {e}")
+                raise
+            logger.info(f"Import job {job.ref_id} cancelled")
+        except _ImportJobCancelled:
+            logger.info(f"Import job {job.ref_id} cancelled")
+        except Exception as e:
+            logger.error(f"Import job {job.ref_id} failed: {e}")
+            final_values = {"status": ImportJobStatus.failed, "error": str(e)}
+
+        _remove_spool(job.file_path)
+        if final_values and not await _finish_job(
+            job_session, job_id, finished_at=datetime.datetime.now(), **final_values
+        ):
+            logger.info(f"Import job {job.ref_id} cancelled")
+
+
+async def resume_import_jobs() -> int:
+    """Resume or fail the import jobs left behind by stopped processes.
+
+    These are the interrupted jobs, and the pending or running jobs without a
+    checkpoint for `IMPORT_JOB_STALE_AFTER` seconds, left by a process that
+    crashed. Upserts are imported again from their spooled upload, which only
+    rewrites the rows that changed. Inserts are failed, the rows inserted before
+    the stop would fail as duplicates, and so are jobs whose spool is gone.
+
+    Returns:
+        The number of jobs resumed.
+    """
+    now = datetime.datetime.now()
+    stale = or_(
+        ImportJob.status == ImportJobStatus.interrupted,
+        and_(
+            ImportJob.status.in_([ImportJobStatus.pending, ImportJobStatus.running]),
+            func.coalesce(ImportJob.checkpoint_at, ImportJob.started_at, ImportJob.created_at)
+            < now - datetime.timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER),
+        ),
+    )
+
+    resumed = []
+    async with get_session_maker()() as db_session:
+        result = await db_session.exec(select(ImportJob).where(stale))
+        for job in result.all():
+            if job.id in _running_jobs:
+                continue
+            resume = job.mode == ImportMode.upsert and os.path.exists(job.file_path)
+            if resume:
+                # Checkpointed now, so that the job is not stale again until it gets to run
+                values = {
+                    "status": ImportJobStatus.pending,
+                    "rows_parsed": 0,
+                    "rows_imported": 0,
+                    "rows_unchanged": 0,
+                    "rows_failed": 0,
+                    "failed_records": [],
+                    "started_at": None,
+                    "checkpoint_at": now,
+                }
+            else:
+                values = {
+                    "status": ImportJobStatus.failed,
+                    "error": "Interrupted by a stop of the app, import the file again",
+                    "finished_at": now,
+                }
+            # Conditional, another process may be resuming the same jobs
+            claimed = await db_session.exec(
+                update(ImportJob)
+                .where(ImportJob.id == job.id, stale)
+                .values(**values)
+                .returning(ImportJob.id)
+            )
+            if claimed.first() is None:
+                continue
+            await db_session.commit()
+
+            if resume:
+                logger.info(f"Resuming import job {job.ref_id}")
+                resumed.append(job.id)
+            else:
+                logger.warning(f"Import job {job.ref_id} left {job.status}, marked failed")
+                _remove_spool(job.file_path)
+        await db_session.commit()
+
+    for job_id in resumed:
+        _start_import_job(job_id)
+    return len(resumed)
+
+
+async def watch_import_jobs() -> None:
+    """Resume the import jobs left behind, every `IMPORT_JOB_STALE_AFTER` seconds until cancelled."""
+    while True:
+        try:
+            await resume_import_jobs()
+        except Exception as e:
+            logger.error(f"Resuming import jobs failed: {e}")
+        await asyncio.sleep(settings.IMPORT_JOB_STALE_AFTER)
+
+
+async def stop_import_jobs() -> None:
+    """Interrupt the import jobs running in this process, on shutdown."""
+    tasks = list(_running_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _start_import_job(job_id: int) -> None:
+    """Run an import job in a background task of this process."""
+    # The task is not tied to the request, so the import outlives client disconnects. It
+    # runs in a context of its own, its queries are not counted in the request's
+    task = asyncio.create_task(run_import_job(job_id), context=contextvars.Context())
+    _running_jobs[job_id] = task
+
+    def forget(_: asyncio.Task) -> None:
+        _running_jobs.pop(job_id, None)
+        _cancelled_jobs.discard(job_id)
+
+    task.add_done_callback(forget)
+
+
+def _remove_spool(file_path: str) -> None:
+    """Delete a spooled upload, once its job is over."""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+async def _finish_job(db_session: AsyncSession, job_id: int, **values) -> bool:
+    """Set the final values of a running job, unless it was cancelled meanwhile.
+
+    Args:
+        db_session: The database session.
+        job_id: The id of the job.
+        values: The column values to set.
+
+    Returns:
+        True when the job was still running and is updated.
+    """
+    updated = await db_session.exec(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.status == ImportJobStatus.running)
+        .values(**values)
+        .returning(ImportJob.id)
+    )
+    finished = updated.first() is not None
+    await db_session.commit()
+    return finished
+
+
+def _update_progress(job: ImportJob, rows_parsed: int, result: ImportCompanyOutput) -> None:
+    """Copy the import progress onto the job.
+
+    The failed records are capped, only those failed since the last checkpoint are
+    added and the list is not written again when there are none.
+    """
+    job.rows_parsed = rows_parsed
+    job.rows_imported = result.imported_records
+    job.rows_unchanged = result.unchanged_records
+    job.rows_failed = result.failed_count
+    failed_records = job.failed_records or []
+    if len(result.failed_records) > len(failed_records):
+        job.failed_records = failed_records + [
+            record.model_dump() for record in result.failed_records[len(failed_records) :]
+        ]
+    job.checkpoint_at = datetime.datetime.now()
+
+
+async def _read_spool(file_path: str) -> AsyncIterator[bytes]:
+    """Read a spooled upload in chunks of `IMPORT_CHUNK_SIZE` bytes."""
+    async with aiofiles.open(file_path, "rb") as spool:
+        while chunk := await spool.read(settings.IMPORT_CHUNK_SIZE):
+            yield chunk
+
+
+async def _get_job(job_id: uuid.UUID, db_session: AsyncSession) -> ImportJob:
+    """Get an import job by its public id."""
+    result = await db_session.exec(select(ImportJob).where(ImportJob.ref_id == job_id))
+    job = result.one_or_none()
+    if job is None:
+        raise ObjectNotFound(f"Import job not found: {job_id}")
+    return job
+
+
+def _job_output(job: ImportJob) -> ImportJobOutput:
+    """Build the API representation of an import job."""
+    rows_per_second = None
+    if job.started_at is not None and job.checkpoint_at is not None:
+        elapsed = (job.checkpoint_at - job.started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = job.rows_parsed / elapsed
+
+    return ImportJobOutput(
+        job_id=job.ref_id,
+        status=job.status,
+        rows_parsed=job.rows_parsed,
+        rows_imported=job.rows_imported,
+        rows_unchanged=job.rows_unchanged,
+        rows_failed=job.rows_failed,
+        rows_per_second=rows_per_second,
+        failed_records=[FailedRecord(**record) for record in job.failed_records or []],
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
@@ -0,0 +1,330 @@
+"""Queued processing jobs, drained by standalone workers.
+
+A job is split into chunks of company ids stored in `processing_chunks`. Workers
+claim one chunk at a time with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number
+of them can drain the queue concurrently without ever claiming the same chunk.
+A claimed chunk is leased for `PROCESSING_CHUNK_LEASE` seconds: the chunk of a
+worker that crashed is claimed again once its lease expires.
+"""
+
+import asyncio
+import datetime
+import uuid
+from typing import Any, Dict, List
+
+from api.schema import (
+    CompanySelector,
+    ProcessCompaniesSummary,
+    ProcessingJobOutput,
+    ProcessMode,
+    Rule,
+)
+from core.config import settings
+from core.exceptions import ObjectNotFound
+from core.logging import get_logger
+from db.bulk import bulk_insert
+from db.session import get_session_maker
+from models.processing_jobs import ProcessingChunk, ProcessingJob, ProcessingStatus
+from service.companies import iter_company_id_chunks, process_company_ids
+from service.rule_sets import get_rule_set_plan
+from service.rules import RulePlan, compile_rules
+from sqlalchemy import and_, or_, update
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+logger = get_logger(__name__)
+
+
+async def create_processing_job(
+    plan: RulePlan,
+    db_session: AsyncSession,
+    rules: List[Rule] | None = None,
+    rule_set_id: uuid.UUID | None = None,
+    urls: List[str] | None = None,
+    selector: CompanySelector | None = None,
+    mode: ProcessMode = ProcessMode.python,
+    force: bool = False,
+) -> ProcessingJobOutput:
+    """Queue the processing of companies, split into chunks of `PROCESS_CHUNK_SIZE` companies.
+
+    Args:
+        plan: The compiled rules to process.
+        db_session: The database session.
+        rules: The rules to process, None when they are a registered rule set.
+        rule_set_id: The registered rule set version to process, None for inline rules.
+        urls: The URLs of the companies to process.
+        selector: The filter the companies to process match, when there are no URLs.
+        mode: Whether to evaluate the rules in Python or in the database.
+        force: Process every company, even the unchanged ones.
+
+    Returns:
+        The queued processing job.
+    """
+    now = datetime.datetime.now()
+    job = ProcessingJob(
+        status=ProcessingStatus.pending,
+        rule_set_id=plan.rules_hash,
+        rules=None if rules is None else [rule.model_dump(mode="json") for rule in rules],
+        rule_set_ref_id=rule_set_id,
+        mode=mode.value,
+        force=force,
+        created_at=now,
+    )
+    db_session.add(job)
+    await db_session.flush()
+
+    async for company_ids in iter_company_id_chunks(db_session, urls, selector):
+        job.chunks_total += await bulk_insert(
+            db_session,
+            ProcessingChunk,
+            [
+                {
+                    "job_id": job.id,
+                    "company_ids": company_ids,
+                    "status": ProcessingStatus.pending.value,
+                    "attempts": 0,
+                }
+            ],
+        )
+    if job.chunks_total == 0:
+        job.status = ProcessingStatus.completed
+        job.finished_at = now
+    await db_session.commit()
+
+    return _job_output(job)
+
+
+async def get_processing_job(job_id: uuid.UUID, db_session: AsyncSession) -> ProcessingJobOutput:
+    """Get the progress of a processing job.
+
+    Args:
+        job_id: The public id of the job.
+        db_session: The database session.
+
+    Returns:
+        The processing job.
+    """
+    result = await db_session.exec(select(ProcessingJob).where(ProcessingJob.ref_id == job_id))
+    job = result.one_or_none()
+    if job is None:
+        raise ObjectNotFound(f"Processing job not found: {job_id}")
+    return _job_output(job)
+
+
+async def run_worker(worker_id: str, drain: bool = False) -> int:
+    """Claim and process queued chunks, one at a time, until cancelled.
+
+    Args:
+        worker_id: The name of the worker, recorded on the chunks it claims.
+        drain: Return as soon as there is no chunk to claim, instead of waiting
+            `PROCESSING_POLL_INTERVAL` seconds and looking again.
+
+    Returns:
+        The number of chunks processed.
+    """
+    session_maker = get_session_maker()
+    chunks_processed = 0
+    while True:
+        async with session_maker() as db_session:
+            chunk = await claim_chunk(worker_id, db_session)
+            if chunk is not None:
+                await run_chunk(chunk, db_session)
+                chunks_processed += 1
+                continue
+        if drain:
+            return chunks_processed
+        await asyncio.sleep(settings.PROCESSING_POLL_INTERVAL)
+
+
+async def claim_chunk(worker_id: str, db_session: AsyncSession) -> ProcessingChunk | None:
+    """Claim the oldest pending chunk, or a running chunk whose lease expired.
+
+    Chunks locked by another worker's claim are skipped rather than waited for.
+    A chunk claimed `PROCESSING_MAX_ATTEMPTS` times already is given up.
+
+    Args:
+        worker_id: The name of the claiming worker.
+        db_session: The database session.
+
+    Returns:
+        The claimed chunk, None when there is nothing to claim.
+    """
+    while True:
+        now = datetime.datetime.now()
+        result = await db_session.exec(
+            select(ProcessingChunk)
+            .where(
+                or_(
+                    ProcessingChunk.status == ProcessingStatus.pending,
+                    and_(
+                        ProcessingChunk.status == ProcessingStatus.running,
+                        ProcessingChunk.lease_expires_at < now,
+                    ),
+                )
+            )
+            .order_by(ProcessingChunk.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        chunk = result.first()
+        if chunk is None:
+            await db_session.commit()
+            return None
+
+        if chunk.attempts >= settings.PROCESSING_MAX_ATTEMPTS:
+            error = f"Lease expired after {chunk.attempts} attempts, last by {chunk.worker_id}"
+            await _finish_chunk(
+                _claim_conditions(chunk), chunk.job_id, ProcessingStatus.failed, db_session, error
+            )
+            await db_session.commit()
+            continue
+
+        chunk.status = ProcessingStatus.running
+        chunk.attempts += 1
+        chunk.worker_id = worker_id
+        chunk.lease_expires_at = now + datetime.timedelta(seconds=settings.PROCESSING_CHUNK_LEASE)
+        await db_session.exec(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == chunk.job_id,
+                ProcessingJob.status == ProcessingStatus.pending,
+            )
+            .values(status=ProcessingStatus.running, started_at=now)
+        )
+        await db_session.commit()
+        return chunk
+
+
+async def run_chunk(chunk: ProcessingChunk, db_session: AsyncSession) -> None:
+    """Process the companies of a claimed chunk with the existing rule engine.
+
+    A failing chunk is queued again, until it has been claimed
+    `PROCESSING_MAX_ATTEMPTS` times. Processing again a chunk whose processing
+    was committed is harmless: the writes are upserts and the unchanged
+    companies are skipped.
+
+    Args:
+        chunk: The claimed chunk.
+        db_session: The database session.
+    """
+    # The rollback of a failure expires the instances, keep what is needed afterwards
+    chunk_id, job_id, attempts = chunk.id, chunk.job_id, chunk.attempts
+    claim = _claim_conditions(chunk)
+
+    job = await db_session.get(ProcessingJob, job_id)
+    try:
+        plan = await _job_plan(job, db_session)
+        summary = await process_company_ids(
+            chunk.company_ids, plan, db_session, ProcessMode(job.mode), job.force
+        )
+    except Exception as e:
+        await db_session.rollback()
+        logger.error(f"Processing chunk {chunk_id} of job {job_id} failed: {e}")
+        if attempts >= settings.PROCESSING_MAX_ATTEMPTS:
+            await _finish_chunk(claim, job_id, ProcessingStatus.failed, db_session, str(e))
+        else:
+            await db_session.exec(
+                update(ProcessingChunk)
+                .where(*claim)
+                .values(status=ProcessingStatus.pending, lease_expires_at=None, error=str(e))
+            )
+        await db_session.commit()
+        return
+
+    await _finish_chunk(claim, job_id, ProcessingStatus.completed, db_session, summary=summary)
+    await db_session.commit()
+
+
+async def _job_plan(job: ProcessingJob, db_session: AsyncSession) -> RulePlan:
+    """Get the compiled rules of a job, inline or registered."""
+    if job.rules is None:
+        return await get_rule_set_plan(job.rule_set_ref_id, db_session)
+    return compile_rules([Rule.model_validate(rule) for rule in job.rules])
+
+
+async def _finish_chunk(
+    claim: List[ColumnElement],
+    job_id: int,
+    status: ProcessingStatus,
+    db_session: AsyncSession,
+    error: str | None = None,
+    summary: ProcessCompaniesSummary | None = None,
+) -> None:
+    """Mark a chunk as finished and count it on its job, finishing the job with its last chunk.
+
+    Nothing is written when the claim was lost, i.e. the chunk's lease expired
+    and another worker claimed it since. Nothing is committed.
+
+    Args:
+        claim: The conditions matching the chunk while it is held by the claim.
+        job_id: The id of the chunk's job.
+        status: Whether the chunk completed or failed.
+        db_session: The database session.
+        error: Why the chunk failed.
+        summary: The number of companies the chunk processed and skipped, once completed.
+    """
+    now = datetime.datetime.now()
+    result = await db_session.exec(
+        update(ProcessingChunk)
+        .where(*claim)
+        .values(status=status, error=error, finished_at=now)
+        .returning(ProcessingChunk.id)
+    )
+    if result.first() is None:
+        logger.warning(f"A chunk of processing job {job_id} was claimed by another worker")
+        return
+
+    counters: Dict[str, Any] = {}
+    if status == ProcessingStatus.completed:
+        counters["chunks_completed"] = ProcessingJob.chunks_completed + 1
+        counters["processed_records"] = ProcessingJob.processed_records + summary.processed_records
+        counters["skipped_records"] = ProcessingJob.skipped_records + summary.skipped_records
+    else:
+        counters["chunks_failed"] = ProcessingJob.chunks_failed + 1
+    result = await db_session.exec(
+        update(ProcessingJob)
+        .where(ProcessingJob.id == job_id)
+        .values(**counters)
+        .returning(
+            ProcessingJob.chunks_total, ProcessingJob.chunks_completed, ProcessingJob.chunks_failed
+        )
+    )
+    chunks_total, chunks_completed, chunks_failed = result.one()
+    if chunks_completed + chunks_failed >= chunks_total:
+        await db_session.exec(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == job_id)
+            .values(
+                status=ProcessingStatus.failed if chunks_failed else ProcessingStatus.completed,
+                finished_at=now,
+            )
+        )
+
+
+def _claim_conditions(chunk: ProcessingChunk) -> List[ColumnElement]:
+    """Match a chunk only while it is still held by the claim the worker made."""
+    return [
+        ProcessingChunk.id == chunk.id,
+        ProcessingChunk.status == ProcessingStatus.running,
+        ProcessingChunk.worker_id == chunk.worker_id,
+        ProcessingChunk.attempts == chunk.attempts,
+    ]
+
+
+def _job_output(job: ProcessingJob) -> ProcessingJobOutput:
+    """Build the API representation of a processing job."""
+    return ProcessingJobOutput(
+        job_id=job.ref_id,
+        status=job.status,
+        rule_set_id=job.rule_set_id,
+        chunks_total=job.chunks_total,
+        chunks_completed=job.chunks_completed,
+        chunks_failed=job.chunks_failed,
+        processed_records=job.processed_records,
+        skipped_records=job.skipped_records,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
@@ -0,0 +1,139 @@
+"""Registered rule sets"""
+
+import collections
+import datetime
+import uuid
+from typing import OrderedDict
+
+from api.schema import Rule, RuleSetOutput, RuleSetRequest
+from core.config import settings
+from core.exceptions import ObjectNotFound
+from models.rule_sets import RuleSet
+from service.rules import RulePlan, compile_rules
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+# Times a registration is retried when another one takes the same version first
+_REGISTER_ATTEMPTS = 3
+
+# Compiled plans of registered rule sets, by rule set id, least recently used first
+_plans: OrderedDict[uuid.UUID, RulePlan] = collections.OrderedDict()
+
+
+async def register_rule_set(request: RuleSetRequest, db_session: AsyncSession) -> RuleSetOutput:
+    """Register the rules as the next version of a named rule set.
+
+    Registering rules the rule set already has returns the existing version.
+    The same rules registered under another name make a version of their own,
+    with its own id, their features are stored under the same rules hash.
+
+    Args:
+        request: The name of the rule set and its rules.
+        db_session: The database session.
+
+    Returns:
+        The registered rule set version.
+    """
+    plan = compile_rules(request.rules)
+    for attempt in range(_REGISTER_ATTEMPTS):
+        result = await db_session.exec(
+            select(RuleSet).where(
+                RuleSet.name == request.name, RuleSet.rules_hash == plan.rules_hash
+            )
+        )
+        rule_set = result.first()
+        if rule_set is not None:
+            break
+
+        result = await db_session.exec(
+            select(func.max(RuleSet.version)).where(RuleSet.name == request.name)
+        )
+        rule_set = RuleSet(
+            name=request.name,
+            version=(result.one() or 0) + 1,
+            rules_hash=plan.rules_hash,
+            rules=[rule.model_dump(mode="json") for rule in request.rules],
+            created_at=datetime.datetime.now(),
+        )
+        db_session.add(rule_set)
+        try:
+            await db_session.commit()
+            break
+        except IntegrityError:
+            # Registered concurrently with the same version or the same rules
+            await db_session.rollback()
+            if attempt == _REGISTER_ATTEMPTS - 1:
+                raise
+
+    _cache_plan(rule_set.ref_id, plan)
+    return _rule_set_output(rule_set)
+
+
+async def get_rule_set(rule_set_id: uuid.UUID, db_session: AsyncSession) -> RuleSetOutput:
+    """Get a registered rule set version.
+
+    Args:
+        rule_set_id: The id of the rule set version.
+        db_session: The database session.
+
+    Returns:
+        The rule set version.
+    """
+    return _rule_set_output(await _get_rule_set(rule_set_id, db_session))
+
+
+async def get_rule_set_plan(rule_set_id: uuid.UUID, db_session: AsyncSession) -> RulePlan:
+    """Get the compiled plan of a registered rule set.
+
+    Rule set versions never change, so their plans are kept in a least recently
+    used cache of `RULE_SET_CACHE_SIZE` plans and the database is only read on
+    a cache miss.
+
+    Args:
+        rule_set_id: The id of the rule set version.
+        db_session: The database session.
+
+    Returns:
+        The evaluation plan of the rule set.
+    """
+    plan = _plans.get(rule_set_id)
+    if plan is not None:
+        _plans.move_to_end(rule_set_id)
+        return plan
+
+    rule_set = await _get_rule_set(rule_set_id, db_session)
+    plan = compile_rules([Rule.model_validate(rule) for rule in rule_set.rules])
+    _cache_plan(rule_set_id, plan)
+    return plan
+
+
+async def _get_rule_set(rule_set_id: uuid.UUID, db_session: AsyncSession) -> RuleSet:
+    """Get a rule set version by its id."""
+    result = await db_session.exec(select(RuleSet).where(RuleSet.ref_id == rule_set_id))
+    rule_set = result.first()
+    if rule_set is None:
+        raise ObjectNotFound(f"Rule set not found: {rule_set_id}")
+    return rule_set
+
+
+def _cache_plan(rule_set_id: uuid.UUID, plan: RulePlan) -> None:
+    """Keep a plan in the cache, evicting the least recently used ones past its size."""
+    _plans[rule_set_id] = plan
+    _plans.move_to_end(rule_set_id)
+    while len(_plans) > settings.RULE_SET_CACHE_SIZE:
+        _plans.popitem(last=False)
+
+
+def _rule_set_output(rule_set: RuleSet) -> RuleSetOutput:
+    """Build the API representation of a rule set version."""
+    return RuleSetOutput(
+        rule_set_id=rule_set.ref_id,
+        rules_hash=rule_set.rules_hash,
+        name=rule_set.name,
+        version=rule_set.version,
+        rules=rule_set.rules,
+        created_at=rule_set.created_at,
+    )
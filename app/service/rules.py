@@ -1,11 +1,38 @@
 """Rules processing service"""
 
-from typing import Any
+import hashlib
+import json
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
 
-from api.schema import Rule
+import numpy as np
+from api.schema import Rule, RuleOperation
 from models.companies import CompanyData
+from sqlalchemy import Boolean, Integer, String, case, cast, literal
+from sqlalchemy.sql.elements import ColumnElement
 
 
+_comparisons = {
+    "greater_than": operator.gt,
+    "less_than": operator.lt,
+    "equal": operator.eq,
+}
+
+# Array kinds compared the same way by NumPy and Python: booleans, integers and floats
+_NUMERIC_KINDS = "biuf"
+
+# SQL types of the extras computed on import, rules on other extras are not translated to SQL
+_EXTRAS_SQL_TYPES = {
+    "company_age": Integer,
+    "is_usa_based": Boolean,
+    "is_saas": Boolean,
+}
+
+# Largest integer operand bound as a 64 bits SQL integer
+_MAX_SQL_INTEGER = 2**63 - 1
+
 _operations = {
     "greater_than": lambda actual, value, match, default: match if actual > value else default,
     "less_than": lambda actual, value, match, default: match if actual < value else default,
@@ -47,3 +74,280 @@ def get_feature_value(company: CompanyData, rule: Rule) -> dict[str, Any]:
     operation = _operations[operation_name](actual, operation_value, rule.match, rule.default)
 
     return {rule.feature_name: operation}
+
+
+class CompiledRule(NamedTuple):
+    """A rule with its operator, operand and input accessor resolved"""
+
+    feature_name: str
+    input: str
+    # Whether the input is read from the company's extras rather than a column
+    from_extras: bool
+    operation: str
+    value: Any
+    match: Any
+    default: Any
+    # Returns the feature value of a single company
+    evaluate: Callable[[CompanyData], Any]
+
+
+class RulePlan:
+    """Rules resolved once into plain callables, ready to be evaluated on many companies."""
+
+    __slots__ = ("rules_hash", "rules")
+
+    def __init__(self, rules_hash: str, rules: List[CompiledRule]):
+        self.rules_hash = rules_hash
+        self.rules = rules
+
+    def evaluate(self, company: CompanyData) -> Dict[str, Any]:
+        """Get the feature values of a company.
+
+        Args:
+            company: The company to get the feature values for.
+
+        Returns:
+            The feature values, by feature name.
+        """
+        return {rule.feature_name: rule.evaluate(company) for rule in self.rules}
+
+    def evaluate_batch(self, companies: Sequence[CompanyData]) -> List[Dict[str, Any]]:
+        """Get the feature values of many companies, one rule at a time.
+
+        Every input the rules reference is loaded once into a NumPy array and each
+        rule becomes a single vectorized comparison. The result is the same as
+        calling `evaluate` on each company.
+
+        Args:
+            companies: The companies to get the feature values for.
+
+        Returns:
+            The feature values of each company, by feature name, in the same order.
+        """
+        if not self.rules:
+            return [{} for _ in companies]
+
+        columns = _CompanyColumns(companies)
+        inputs: Dict[str, Tuple[List[Any], np.ndarray | None]] = {}
+        feature_columns: Dict[str, List[Any]] = {}
+        for rule in self.rules:
+            if rule.input not in inputs:
+                values = _input_values(rule, columns)
+                inputs[rule.input] = (values, _numeric_array(values))
+            feature_columns[rule.feature_name] = _evaluate_column(rule, *inputs[rule.input])
+
+        feature_names = list(feature_columns)
+        return [dict(zip(feature_names, values)) for values in zip(*feature_columns.values())]
+
+
+def compile_rules(rules: List[Rule]) -> RulePlan:
+    """Compile the rules into an evaluation plan.
+
+    Plans are cached by the content of the rule list, so a rule set sent again
+    is not compiled again.
+
+    Args:
+        rules: The rules to compile.
+
+    Returns:
+        The evaluation plan of the rules.
+    """
+    rules_json = json.dumps([rule.model_dump(mode="json") for rule in rules], sort_keys=True)
+    return _compile_rules_json(rules_json)
+
+
+def compile_rules_sql(plan: RulePlan) -> Dict[str, ColumnElement] | None:
+    """Translate an evaluation plan into SQL expressions over the `companies` table.
+
+    Each rule becomes a `CASE WHEN` on a column or on an `extras` path. Rules are
+    only translated when the database gives the same result as the Python
+    evaluation, i.e. numeric inputs compared to a number and text columns
+    compared for equality to a string.
+
+    Args:
+        plan: The evaluation plan to translate.
+
+    Returns:
+        The expression of each feature, by feature name, or None when some rule
+        can only be evaluated in Python.
+    """
+    expressions = {}
+    for rule in plan.rules:
+        expression = _rule_expression(rule)
+        if expression is None:
+            return None
+        expressions[rule.feature_name] = expression
+    return expressions
+
+
+@lru_cache(maxsize=128)
+def _compile_rules_json(rules_json: str) -> RulePlan:
+    """Compile rules serialized as JSON, see `compile_rules`."""
+    rules = [Rule.model_validate(rule) for rule in json.loads(rules_json)]
+    rules_hash = hashlib.sha256(rules_json.encode("utf-8")).hexdigest()
+    return RulePlan(rules_hash, [_compile_rule(rule) for rule in rules])
+
+
+def _compile_rule(rule: Rule) -> CompiledRule:
+    """Resolve the operator, operand and input accessor of a rule once.
+
+    Args:
+        rule: The rule to compile.
+
+    Returns:
+        The compiled rule.
+    """
+    operation_name = next(
+        (name for name in RuleOperation.model_fields if getattr(rule.operation, name) is not None),
+        None,
+    )
+    if operation_name is None:
+        raise ValueError("No operation specified in rule")
+
+    compare = _comparisons[operation_name]
+    operation_value = getattr(rule.operation, operation_name)
+    match = rule.match
+    default = rule.default
+    input_name = rule.input
+
+    from_extras = input_name not in CompanyData.model_fields
+
+    if not from_extras:
+        get_column = operator.attrgetter(input_name)
+
+        def evaluate_column(company: CompanyData) -> Any:
+            return match if compare(get_column(company), operation_value) else default
+
+        evaluate = evaluate_column
+    else:
+
+        def evaluate_extra(company: CompanyData) -> Any:
+            try:
+                actual = company.extras[input_name]
+            except KeyError:
+                raise ValueError(f"Input {input_name} not found in company or extras")
+            return match if compare(actual, operation_value) else default
+
+        evaluate = evaluate_extra
+
+    return CompiledRule(
+        feature_name=rule.feature_name,
+        input=input_name,
+        from_extras=from_extras,
+        operation=operation_name,
+        value=operation_value,
+        match=match,
+        default=default,
+        evaluate=evaluate,
+    )
+
+
+def _rule_expression(rule: CompiledRule) -> ColumnElement | None:
+    """Translate a compiled rule into a SQL `CASE WHEN`, see `compile_rules_sql`."""
+    actual = _input_expression(rule)
+    if actual is None:
+        return None
+
+    value = rule.value
+    if isinstance(actual.type, String):
+        if rule.operation != "equal" or not isinstance(value, str):
+            return None
+    elif isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, int):
+        if abs(value) > _MAX_SQL_INTEGER:
+            return None
+    elif not isinstance(value, float) or not math.isfinite(value):
+        return None
+
+    condition = _comparisons[rule.operation](actual, literal(value))
+    return case((condition, rule.match), else_=rule.default)
+
+
+def _input_expression(rule: CompiledRule) -> ColumnElement | None:
+    """Get the SQL expression of a rule's input, if it can be compared in SQL.
+
+    Boolean extras are compared as 0 and 1, the way Python compares booleans to numbers.
+    """
+    table = CompanyData.__table__
+    if rule.from_extras:
+        sql_type = _EXTRAS_SQL_TYPES.get(rule.input)
+        if sql_type is None:
+            return None
+        element = table.c.extras[rule.input]
+        return cast(element.as_boolean(), Integer) if sql_type is Boolean else element.as_integer()
+
+    column = table.c[rule.input]
+    if isinstance(column.type, String):
+        return column
+    # Python fails to compare a missing number, where SQL would fall back to the default
+    if isinstance(column.type, Integer) and not column.nullable:
+        return column
+    return None
+
+
+class _CompanyColumns:
+    """Column values of a batch of companies, each read once.
+
+    Values are read from the instances' loaded state rather than through the ORM
+    attributes, which is several times faster on large batches. Attributes that
+    are not loaded yet go through the ORM as usual.
+    """
+
+    def __init__(self, companies: Sequence[CompanyData]):
+        self.companies = companies
+        self._states = [company.__dict__ for company in companies]
+        self._columns: Dict[str, List[Any]] = {}
+
+    def get(self, name: str) -> List[Any]:
+        """Get the values of a column, in the order of the companies."""
+        if name not in self._columns:
+            self._columns[name] = [
+                state[name] if name in state else getattr(company, name)
+                for company, state in zip(self.companies, self._states)
+            ]
+        return self._columns[name]
+
+
+def _input_values(rule: CompiledRule, columns: _CompanyColumns) -> List[Any]:
+    """Get the input of a rule for every company."""
+    if not rule.from_extras:
+        return columns.get(rule.input)
+    try:
+        return [extras[rule.input] for extras in columns.get("extras")]
+    except KeyError:
+        raise ValueError(f"Input {rule.input} not found in company or extras")
+
+
+def _numeric_array(values: List[Any]) -> np.ndarray | None:
+    """Load input values into an array, if NumPy holds them as numbers.
+
+    Returns:
+        The array, or None when some values are not numbers, such as strings or missing values.
+    """
+    try:
+        array = np.array(values)
+    except (ValueError, OverflowError):
+        return None
+    return array if array.ndim == 1 and array.dtype.kind in _NUMERIC_KINDS else None
+
+
+def _evaluate_column(rule: CompiledRule, values: List[Any], array: np.ndarray | None) -> List[Any]:
+    """Evaluate a rule on the input values of every company.
+
+    Numeric inputs compared to a number are evaluated with a single vectorized
+    comparison. Anything else is compared value by value, so that Python's
+    comparison semantics and errors are kept.
+
+    Returns:
+        The feature value of each company, as the rule's own match and default objects.
+    """
+    compare = _comparisons[rule.operation]
+    if array is None or not isinstance(rule.value, (bool, int, float)):
+        return [rule.match if compare(actual, rule.value) else rule.default for actual in values]
+
+    matches = compare(array, rule.value)
+    # Picking from an object array keeps the match and default values untouched
+    choices = np.empty(2, dtype=object)
+    choices[0], choices[1] = rule.default, rule.match
+    return choices[matches.astype(np.intp)].tolist()
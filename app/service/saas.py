@@ -0,0 +1,150 @@
+"""SaaS company classification"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Tuple
+
+from core.config import settings
+
+
+class SaasMatch(NamedTuple):
+    """Result of classifying a company description"""
+
+    # Distinct keywords found, in the order they are configured
+    keywords: Tuple[str, ...]
+    is_saas: bool
+
+    @property
+    def count(self) -> int:
+        return len(self.keywords)
+
+
+class SaasClassifier:
+    """Classify company descriptions by the keywords they contain.
+
+    The keywords are compiled once into a trie shaped regex, which scans a
+    description in a single pass whatever the number of keywords. A keyword
+    matches anywhere in the lowercased description, without word boundaries,
+    like the substring check the classifier replaces: "tier" also matches
+    "frontier" and "cloud-based" also counts as "cloud", so imported companies
+    keep the classification they had.
+    """
+
+    def __init__(self, keywords: Iterable[str], min_matches: int = 1):
+        self.keywords = tuple(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+        self.min_matches = min_matches
+        # Matches the longest keyword at the leftmost position where one starts
+        self._pattern = re.compile(_trie_pattern(self.keywords))
+        # The keywords found in each keyword, a match stands for all of them
+        self._contained = {
+            keyword: [index for index, other in enumerate(self.keywords) if other in keyword]
+            for keyword in self.keywords
+        }
+        # The keywords whose end can start another keyword, which the scan resumes after
+        # and misses: "saas" and "subscription" in "saasubscription" are found by checking
+        # for the text "saasubscription" once "saas" is found
+        self._bridges: Dict[str, List[Tuple[str, str]]] = {}
+        for keyword in self.keywords:
+            for start in range(1, len(keyword)):
+                for other in self.keywords:
+                    if len(other) > len(keyword) - start and other.startswith(keyword[start:]):
+                        self._bridges.setdefault(keyword, []).append(
+                            (keyword[:start] + other, other)
+                        )
+        # The result for each set of matched keywords, descriptions share a few of them
+        self._results: Dict[FrozenSet[str], SaasMatch] = {}
+
+    def classify(self, description: str | None) -> SaasMatch:
+        """Classify a single description.
+
+        Args:
+            description: The company's description.
+
+        Returns:
+            The keywords found and whether there are at least `min_matches` of them.
+        """
+        if not description or not self.keywords:
+            return SaasMatch((), False)
+
+        lowered = description.lower()
+        matches = frozenset(self._pattern.findall(lowered))
+        if not matches.isdisjoint(self._bridges):
+            matches = self._bridged(lowered, matches)
+        result = self._results.get(matches)
+        if result is None:
+            contained = self._contained
+            found = {index for keyword in matches for index in contained[keyword]}
+            keywords = tuple([self.keywords[index] for index in sorted(found)])
+            result = self._results[matches] = SaasMatch(keywords, len(keywords) >= self.min_matches)
+        return result
+
+    def _bridged(self, lowered: str, matches: FrozenSet[str]) -> FrozenSet[str]:
+        """Add the keywords starting inside a match and ending after it."""
+        bridges = self._bridges
+        found = set(matches)
+        pending = [keyword for keyword in found if keyword in bridges]
+        while pending:
+            for text, other in bridges[pending.pop()]:
+                if other not in found and text in lowered:
+                    found.add(other)
+                    if other in bridges:
+                        pending.append(other)
+        return frozenset(found)
+
+    def classify_many(self, descriptions: Iterable[str | None]) -> List[SaasMatch]:
+        """Classify a batch of descriptions.
+
+        Args:
+            descriptions: The company descriptions.
+
+        Returns:
+            The classification of each description, in the same order.
+        """
+        classify = self.classify
+        return [classify(description) for description in descriptions]
+
+    def is_saas(self, description: str | None) -> bool:
+        """Tell whether a description is SaaS, stopping at the first keyword when one is enough.
+
+        Args:
+            description: The company's description.
+
+        Returns:
+            True if the description has at least `min_matches` keywords.
+        """
+        if self.min_matches != 1:
+            return self.classify(description).is_saas
+        if not description or not self.keywords:
+            return False
+        return self._pattern.search(description.lower()) is not None
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Build a regex matching any of the keywords.
+
+    Keywords sharing a prefix share a branch, so the regex engine never retries
+    the same prefix at a position.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def branches(node: Dict[str, Any]) -> str:
+        alternatives = [
+            re.escape(char) + branches(child) for char, child in sorted(node.items()) if char
+        ]
+        if not alternatives:
+            return ""
+        pattern = "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return branches(trie)
+
+
+@lru_cache
+def get_saas_classifier() -> SaasClassifier:
+    """Get the classifier built from the configured keywords."""
+    return SaasClassifier(settings.SAAS_KEYWORDS, settings.SAAS_MIN_KEYWORD_MATCHES)
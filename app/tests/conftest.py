@@ -1,14 +1,46 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, NamedTuple
+
 import pytest
 from api.companies import router as companies_router
 from api.health import router as health_router
+from api.rule_sets import router as rule_sets_router
 from fastapi.testclient import TestClient
 from main import app
 
 
+class ImportedDataset(NamedTuple):
+    """The rows of the CSV test dataset once imported, their URLs and the test rules"""
+
+    rows: List[Dict[str, str]]
+    urls: List[str]
+    rules: List[Dict[str, Any]]
+
+
 @pytest.fixture(scope="session")
-def client() -> TestClient:
+def client() -> Iterator[TestClient]:
     # Include routers
     app.include_router(companies_router, prefix="/companies")
     app.include_router(health_router)
+    app.include_router(rule_sets_router)
+
+    # Keep a single event loop for the session so background tasks can outlive requests
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def rules() -> List[Dict[str, Any]]:
+    with open("tests/rules.json", "r") as f:
+        return json.load(f)["rules"]
+
 
-    return TestClient(app)
+@pytest.fixture
+def imported_dataset(client: TestClient, rules: List[Dict[str, Any]]) -> ImportedDataset:
+    with open("tests/csv-dataset.csv", "rb") as f:
+        content = f.read()
+    client.post("/companies/import_company_data", files={"file": ("test.csv", content, "text/csv")})
+    rows = list(csv.DictReader(io.StringIO(content.decode())))
+    return ImportedDataset(rows, [row["url"] for row in rows], rules)
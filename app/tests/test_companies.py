@@ -1,6 +1,17 @@
+import csv
+import gzip
+import io
 import json
+import time
 
+from api.schema import CompanySelector, Rule
+from core.config import settings
+from db.session import get_session_maker
 from fastapi.testclient import TestClient
+from models.companies import CompanyData, ProcessedCompany
+from service.companies import iter_companies, iter_selected_companies
+from service.rules import compile_rules
+from sqlmodel import delete, func, select
 
 
 def test_import_company_csv(client: TestClient):
@@ -34,6 +45,166 @@ def test_import_company_json(client: TestClient):
     assert data["imported_records"] == 10
 
 
+def test_import_company_gzip_ndjson(client: TestClient):
+    """Test importing company from gzip compressed NDJSON."""
+    with open("tests/json-dataset.json", "r") as f:
+        companies = json.load(f)
+    content = gzip.compress("\n".join(json.dumps(company) for company in companies).encode())
+    files = {"file": ("test.ndjson.gz", content, "application/x-ndjson")}
+
+    response = client.post("/companies/import_company_data", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert data["failed_records"] == []
+
+
+def test_import_company_ndjson_reports_invalid_lines(client: TestClient):
+    """Test that a line that is not valid JSON is reported as a failed row."""
+    with open("tests/json-dataset.json", "r") as f:
+        lines = [json.dumps(company) for company in json.load(f)]
+    lines.insert(1, '{"company_name": ')
+    files = {"file": ("test.ndjson", "\n".join(lines).encode(), "application/x-ndjson")}
+
+    response = client.post("/companies/import_company_data", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert len(data["failed_records"]) == 1
+    assert data["failed_records"][0]["row"] == 2
+    assert data["failed_records"][0]["error"].startswith("Invalid JSON line")
+
+
+def test_import_company_reports_failed_rows(client: TestClient):
+    """Test that rows which cannot be imported are reported and the rest are kept."""
+    with open("tests/csv-dataset.csv", "r") as f:
+        lines = f.read().splitlines()
+    # Break the founded_year of the second data row
+    lines[2] = lines[2].replace(",2020,", ",not-a-year,", 1)
+    files = {"file": ("test.csv", "\n".join(lines).encode(), "text/csv")}
+
+    response = client.post(
+        "/companies/import_company_data", files=files, headers={"accept": "application/json"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 9
+    assert len(data["failed_records"]) == 1
+    assert data["failed_records"][0]["row"] == 2
+
+
+def test_import_company_csv_stray_quote(client: TestClient, monkeypatch):
+    """Test that a quote inside an unquoted field is kept as is, like the csv module does."""
+    with open("tests/csv-dataset.csv", "r") as f:
+        lines = f.read().splitlines()
+    lines[1] = lines[1].replace("CloudLogic Labs", 'CloudLogic 5" Labs', 1)
+    files = {"file": ("test.csv", "\n".join(lines).encode(), "text/csv")}
+    # Small chunks, so that rows and quoted fields span several of them
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 64)
+
+    response = client.post("/companies/import_company_data", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert data["failed_records"] == []
+
+
+def test_import_company_upsert_skips_unchanged(client: TestClient):
+    """Test that re-importing the same file updates nothing and duplicates nothing."""
+    with open("tests/csv-dataset.csv", "rb") as f:
+        files = {"file": ("test.csv", f.read(), "text/csv")}
+
+    client.post("/companies/import_company_data", files=files)
+    response = client.post("/companies/import_company_data", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert data["unchanged_records"] == 10
+
+    response = client.post("/companies/import_company_data?mode=insert", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 0
+    assert len(data["failed_records"]) == 10
+
+
+def test_import_company_reports_duplicate_urls(client: TestClient):
+    """Test that a URL repeated in a batch is written once and its other rows are failed."""
+    with open("tests/csv-dataset.csv", "r") as f:
+        lines = f.read().replace("https://www.", "https://duplicates.").splitlines()
+    # The first company again, with another description
+    lines.append(lines[1].replace("Project management platform", "Updated platform", 1))
+    files = {"file": ("test.csv", "\n".join(lines).encode(), "text/csv")}
+
+    response = client.post("/companies/import_company_data", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert data["unchanged_records"] == 0
+    assert data["failed_records"] == [{"row": 1, "error": "Duplicate URL, replaced by row 11"}]
+
+    async def description():
+        async with get_session_maker()() as db_session:
+            result = await db_session.exec(
+                select(CompanyData.description).where(
+                    CompanyData.url == "https://duplicates.cloudlogiclabs.com"
+                )
+            )
+            return result.one()
+
+    assert client.portal.call(description).startswith("Updated platform")
+
+    lines = [line.replace("https://duplicates.", "https://duplicates-insert.") for line in lines]
+    files = {"file": ("test.csv", "\n".join(lines).encode(), "text/csv")}
+
+    response = client.post("/companies/import_company_data?mode=insert", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported_records"] == 10
+    assert data["failed_records"] == [{"row": 11, "error": "Duplicate URL of row 1"}]
+
+    async def delete_companies():
+        # Copies of the dataset under other URLs, the other tests process every company
+        async with get_session_maker()() as db_session:
+            await db_session.exec(
+                delete(CompanyData).where(CompanyData.url.startswith("https://duplicates"))
+            )
+            await db_session.commit()
+
+    client.portal.call(delete_companies)
+
+
+def test_import_company_background_job(client: TestClient):
+    """Test importing company data in a background job."""
+    with open("tests/csv-dataset.csv", "rb") as f:
+        files = {"file": ("test.csv", f.read(), "text/csv")}
+
+    response = client.post("/companies/import_company_data?background=true", files=files)
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ("pending", "running", "completed")
+
+    for _ in range(50):
+        job = client.get(f"/companies/import_jobs/{job['job_id']}").json()
+        if job["status"] not in ("pending", "running"):
+            break
+        time.sleep(0.1)
+
+    assert job["status"] == "completed"
+    assert job["rows_parsed"] == 10
+    assert job["rows_imported"] == 10
+    assert job["rows_failed"] == 0
+
+
 def test_process_company(client: TestClient):
     """Test processing company."""
     with open("tests/rules.json", "r") as f:
@@ -46,3 +217,252 @@ def test_process_company(client: TestClient):
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 12
+
+
+def test_process_company_in_database(client: TestClient, imported_dataset):
+    """Test that rules evaluated in SQL give the same features as in Python."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+
+    python_response = client.post(
+        "/companies/process_company", json={"urls": urls, "rules": rules, "mode": "python"}
+    )
+    database_response = client.post(
+        "/companies/process_company", json={"urls": urls, "rules": rules, "mode": "database"}
+    )
+
+    assert database_response.status_code == 200
+    assert database_response.json() == python_response.json()
+    assert len(database_response.json()) == 10
+
+
+def test_process_company_reports_every_missing_url(client: TestClient, rules):
+    """Test that all the unknown URLs of a request are reported at once."""
+    urls = ["https://www.missing-one.com", "https://www.missing-two.com"]
+
+    response = client.post("/companies/process_company", json={"urls": urls, "rules": rules})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Companies not found: {', '.join(urls)}"
+
+
+def test_process_company_by_selector(client: TestClient, imported_dataset, monkeypatch):
+    """Test processing the companies matching a selector, a chunk at a time."""
+    monkeypatch.setattr(settings, "PROCESS_CHUNK_SIZE", 3)
+    rows, rules = imported_dataset.rows, imported_dataset.rules
+    selector = {"founded_year_from": 2015, "founded_year_to": 2020}
+    expected = sum(1 for row in rows if 2015 <= int(row["founded_year"]) <= 2020)
+
+    for mode in ("python", "database"):
+        response = client.post(
+            "/companies/process_company",
+            json={"selector": selector, "rules": rules, "mode": mode, "force": True},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "processed_records": expected,
+            "skipped_records": 0,
+            "rule_set_id": response.headers["x-rule-set-id"],
+        }
+
+
+def test_streamed_selector_run_keeps_the_chunks_streamed(
+    client: TestClient, imported_dataset, monkeypatch
+):
+    """Test that the chunks streamed before a client disconnects stay processed."""
+    monkeypatch.setattr(settings, "PROCESS_CHUNK_SIZE", 3)
+    rules = [Rule.model_validate(rule) for rule in imported_dataset.rules]
+    # Rules of their own, so that only this run's processed companies are counted
+    rules[0].feature_name = "interrupted_stream_feature"
+    plan = compile_rules(rules)
+
+    async def disconnect_after_first_chunk():
+        async with get_session_maker()() as db_session:
+            stream = iter_selected_companies(CompanySelector(), plan, db_session, force=True)
+            for _ in range(3):
+                await stream.__anext__()
+            await stream.aclose()
+        async with get_session_maker()() as db_session:
+            result = await db_session.exec(
+                select(func.count())
+                .select_from(ProcessedCompany)
+                .where(ProcessedCompany.rule_set_id == plan.rules_hash)
+            )
+            return result.one()
+
+    assert client.portal.call(disconnect_after_first_chunk) == 3
+
+
+def test_streamed_urls_keep_the_chunks_streamed(client: TestClient, imported_dataset, monkeypatch):
+    """Test that URLs are streamed a chunk at a time, the chunks streamed staying processed."""
+    monkeypatch.setattr(settings, "PROCESS_CHUNK_SIZE", 3)
+    rules = [Rule.model_validate(rule) for rule in imported_dataset.rules]
+    rules[0].feature_name = "interrupted_url_stream_feature"
+    plan = compile_rules(rules)
+
+    async def disconnect_after_first_chunk():
+        async with get_session_maker()() as db_session:
+            stream = iter_companies(imported_dataset.urls, plan, db_session, force=True)
+            for _ in range(3):
+                await stream.__anext__()
+            await stream.aclose()
+        async with get_session_maker()() as db_session:
+            result = await db_session.exec(
+                select(func.count())
+                .select_from(ProcessedCompany)
+                .where(ProcessedCompany.rule_set_id == plan.rules_hash)
+            )
+            return result.one()
+
+    assert client.portal.call(disconnect_after_first_chunk) == 3
+
+    response = client.post(
+        "/companies/process_company",
+        json={
+            "urls": [*imported_dataset.urls, "https://missing.example"],
+            "rules": imported_dataset.rules,
+        },
+        headers={"accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 400
+
+
+def test_process_company_requires_urls_or_selector(client: TestClient, rules):
+    """Test that a request gives either URLs or a selector."""
+    response = client.post(
+        "/companies/process_company", json={"urls": [], "selector": {}, "rules": rules}
+    )
+
+    assert response.status_code == 400
+
+
+def test_process_and_get_companies_as_ndjson(client: TestClient, imported_dataset, monkeypatch):
+    """Test streaming processed companies one JSON object per line."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    # URLs are streamed a chunk at a time, in their order
+    monkeypatch.setattr(settings, "PROCESS_CHUNK_SIZE", 3)
+    ndjson = {"accept": "application/x-ndjson"}
+
+    expected = client.post("/companies/process_company", json={"urls": urls, "rules": rules}).json()
+    by_urls = client.post(
+        "/companies/process_company", json={"urls": urls, "rules": rules}, headers=ndjson
+    )
+    by_selector = client.post(
+        "/companies/process_company", json={"selector": {}, "rules": rules}, headers=ndjson
+    )
+    exported = client.get("/companies/get_companies", headers=ndjson)
+
+    assert by_urls.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in by_urls.text.splitlines()] == expected
+    for response in (by_selector, exported):
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert all(data in lines for data in expected)
+
+
+def test_get_companies_pages_and_filters(client: TestClient, imported_dataset):
+    """Test paginating the processed companies and filtering them on a feature."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    processed = client.post(
+        "/companies/process_company", json={"urls": urls, "rules": rules}
+    ).json()
+
+    pages = []
+    params = {"limit": 4}
+    while True:
+        page = client.get("/companies/get_companies", params=params).json()
+        pages.append(page["data"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+    companies = [data for page in pages for data in page]
+
+    assert all(len(page) <= 4 for page in pages)
+    assert len(companies) == len({json.dumps(data, sort_keys=True) for data in companies})
+    assert all(data in companies for data in processed)
+
+    usa_based = client.get(
+        "/companies/get_companies", params={"usa_based_feature": 1, "limit": 1000}
+    ).json()
+    assert usa_based["next_cursor"] is None
+    assert usa_based["data"] == [data for data in companies if data["usa_based_feature"] == 1]
+
+
+def test_feature_store_pages_and_counts(client: TestClient, imported_dataset):
+    """Test reading the features of a rule set from the feature store and counting them."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+
+    for mode in ("python", "database"):
+        response = client.post(
+            "/companies/process_company", json={"urls": urls, "rules": rules, "mode": mode}
+        )
+        processed = response.json()
+        rule_set_id = response.headers["x-rule-set-id"]
+
+        stored = client.get(
+            "/companies/get_companies", params={"rule_set_id": rule_set_id, "limit": 1000}
+        ).json()
+        assert all(data in stored["data"] for data in processed)
+
+        counts = client.get(
+            "/companies/feature_counts",
+            params={
+                "rule_set_id": rule_set_id,
+                "group_by": "usa_based_feature",
+                "is_saas_feature": 1,
+            },
+        ).json()
+        saas = [data for data in stored["data"] if data["is_saas_feature"] == 1]
+        assert counts == [
+            {"value": value, "companies": sum(1 for d in saas if d["usa_based_feature"] == value)}
+            for value in sorted({data["usa_based_feature"] for data in saas})
+        ]
+
+    response = client.get(
+        "/companies/feature_counts",
+        params={"rule_set_id": rule_set_id, "group_by": "usa_based_feature", "is_saas": "yes"},
+    )
+    assert response.status_code == 400
+    # Booleans are not feature values, even though Python counts them as integers
+    response = client.get(
+        "/companies/feature_counts",
+        params={"rule_set_id": rule_set_id, "group_by": "usa_based_feature", "is_saas": "true"},
+    )
+    assert response.status_code == 400
+
+
+def test_process_company_skips_unchanged_companies(client: TestClient, imported_dataset):
+    """Test that only the companies changed since they were last processed are processed again."""
+    rows, urls, rules = imported_dataset
+    selector = {"founded_year_from": 1900}
+
+    for mode in ("python", "database"):
+        request = {"selector": selector, "rules": rules, "mode": mode}
+        client.post("/companies/process_company", json={**request, "force": True})
+        unchanged = client.post("/companies/process_company", json=request).json()
+        assert unchanged["processed_records"] == 0
+        assert unchanged["skipped_records"] == len(rows)
+
+        # Re-importing a changed company makes it processed again
+        rows[0]["total_employees"] = str(int(rows[0]["total_employees"]) + 1)
+        changed = io.StringIO()
+        writer = csv.DictWriter(changed, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        client.post(
+            "/companies/import_company_data",
+            files={"file": ("test.csv", changed.getvalue().encode(), "text/csv")},
+        )
+        delta = client.post("/companies/process_company", json=request).json()
+        assert delta["processed_records"] == 1
+        assert delta["skipped_records"] == len(rows) - 1
+
+        expected = client.post(
+            "/companies/process_company",
+            json={"urls": urls, "rules": rules, "mode": mode, "force": True},
+        )
+        by_urls = client.post(
+            "/companies/process_company", json={"urls": urls, "rules": rules, "mode": mode}
+        )
+        assert expected.headers["x-skipped-records"] == "0"
+        assert by_urls.headers["x-skipped-records"] == str(len(urls))
+        assert by_urls.json() == expected.json()
@@ -0,0 +1,21 @@
+from db.functions import json_contains
+from models.companies import ProcessedCompany
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def test_json_contains_is_a_jsonb_containment_on_postgres():
+    """Test that filters on processed data compile to `@>`, the operator of its GIN index."""
+    condition = json_contains("postgresql", ProcessedCompany.data, {"is_saas": 1})
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+
+    # ix_processed_companies_data uses jsonb_path_ops, which only supports `@>`
+    assert sql == "CAST(processed_companies.data AS JSONB) @> %(param_1)s::JSONB"
+
+
+def test_json_contains_compares_extracted_values_elsewhere():
+    """Test that other dialects compare each value extracted from the JSON object."""
+    condition = json_contains("sqlite", ProcessedCompany.data, {"is_saas": 1, "size": 2})
+    sql = str(condition.compile(dialect=sqlite.dialect()))
+
+    assert sql.count("json_extract(processed_companies.data") == 2
+    assert "@>" not in sql
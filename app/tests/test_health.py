@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+from prometheus_client import CONTENT_TYPE_LATEST
 
 
 def test_health(client: TestClient):
@@ -7,3 +8,31 @@ def test_health(client: TestClient):
     data = response.json()
     assert data["status"] == "ok"
     assert "version" in data
+
+
+def test_db_pool(client: TestClient):
+    client.get("/health")
+    client.get("/health")
+
+    response = client.get("/health/db_pool")
+
+    assert response.status_code == 200
+    pool = response.json()
+    # Requests share the process-wide pool and give their connection back
+    assert pool["checked_out"] == 0
+    assert pool["checked_in"] >= 1
+
+
+def test_metrics(client: TestClient):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE_LATEST
+    # Labelled by the route template, so a route is one series whatever its path parameters
+    assert (
+        'telescope_http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+        in response.text
+    )
+    assert 'telescope_db_pool_connections{pool="primary",state="checked_out"}' in response.text
@@ -0,0 +1,147 @@
+import asyncio
+import csv
+import datetime
+import os
+import shutil
+import time
+import uuid
+
+from core.config import settings
+from db.session import get_session_maker
+from fastapi.testclient import TestClient
+from models.import_jobs import ImportJob, ImportJobStatus
+from service import import_jobs
+from sqlalchemy import update
+
+
+def _create_job(status: ImportJobStatus, mode: str = "upsert", **fields) -> ImportJob:
+    """Spool the test dataset for an import job in the given status."""
+    os.makedirs(settings.IMPORT_SPOOL_DIR, exist_ok=True)
+    file_path = os.path.join(settings.IMPORT_SPOOL_DIR, f"{uuid.uuid4()}.upload")
+    shutil.copy("tests/csv-dataset.csv", file_path)
+    return ImportJob(
+        status=status,
+        mode=mode,
+        content_type="text/csv",
+        file_path=file_path,
+        failed_records=[],
+        created_at=datetime.datetime.now(),
+        **fields,
+    )
+
+
+async def _add_job(job: ImportJob) -> ImportJob:
+    async with get_session_maker()() as db_session:
+        db_session.add(job)
+        await db_session.commit()
+    return job
+
+
+async def _get_job(job_id: int) -> ImportJob:
+    async with get_session_maker()() as db_session:
+        return await db_session.get(ImportJob, job_id)
+
+
+def test_import_job_interrupted_by_shutdown(client: TestClient, monkeypatch):
+    """Test that a shutdown marks a running job interrupted and keeps its spool."""
+    started = asyncio.Event()
+
+    async def hang(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(import_jobs, "import_company_stream", hang)
+
+    async def interrupt():
+        job = await _add_job(_create_job(ImportJobStatus.pending))
+        import_jobs._start_import_job(job.id)
+        task = import_jobs._running_jobs[job.id]
+        await started.wait()
+        await import_jobs.stop_import_jobs()
+        return job, task
+
+    job, task = client.portal.call(interrupt)
+
+    assert task.cancelled()
+    assert client.portal.call(_get_job, job.id).status == ImportJobStatus.interrupted
+    assert os.path.exists(job.file_path)
+    os.remove(job.file_path)
+
+
+def test_import_jobs_left_behind_are_resumed_or_failed(client: TestClient):
+    """Test that interrupted and stale jobs are imported again, or failed when they are inserts."""
+    stale = datetime.datetime.now() - datetime.timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    interrupted = client.portal.call(_add_job, _create_job(ImportJobStatus.interrupted))
+    crashed = client.portal.call(
+        _add_job, _create_job(ImportJobStatus.running, started_at=stale, checkpoint_at=stale)
+    )
+    crashed_insert = client.portal.call(
+        _add_job, _create_job(ImportJobStatus.running, mode="insert", started_at=stale)
+    )
+    running = client.portal.call(
+        _add_job, _create_job(ImportJobStatus.running, started_at=datetime.datetime.now())
+    )
+
+    assert client.portal.call(import_jobs.resume_import_jobs) == 2
+    # Claimed already, a second process resuming jobs finds none
+    assert client.portal.call(import_jobs.resume_import_jobs) == 0
+
+    for job in (interrupted, crashed):
+        for _ in range(50):
+            resumed = client.get(f"/companies/import_jobs/{job.ref_id}").json()
+            if resumed["status"] not in ("pending", "running"):
+                break
+            time.sleep(0.1)
+        assert resumed["status"] == "completed"
+        assert resumed["rows_parsed"] == 10
+        assert resumed["rows_failed"] == 0
+        assert not os.path.exists(job.file_path)
+
+    failed = client.get(f"/companies/import_jobs/{crashed_insert.ref_id}").json()
+    assert failed["status"] == "failed"
+    assert not os.path.exists(crashed_insert.file_path)
+    assert client.get(f"/companies/import_jobs/{running.ref_id}").json()["status"] == "running"
+    os.remove(running.file_path)
+
+
+def test_import_job_keeps_first_failed_records(client: TestClient, monkeypatch):
+    """Test that a job counts every failed row and keeps the errors of the first ones."""
+    job = _create_job(ImportJobStatus.pending)
+    with open("tests/csv-dataset.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    with open(job.file_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows({**row, "founded_year": "not-a-year"} for row in rows)
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "IMPORT_JOB_MAX_FAILED_RECORDS", 3)
+
+    job = client.portal.call(_add_job, job)
+    client.portal.call(import_jobs.run_import_job, job.id)
+
+    job = client.portal.call(_get_job, job.id)
+    assert job.status == ImportJobStatus.completed
+    assert job.rows_parsed == 10
+    assert job.rows_failed == 10
+    assert [record["row"] for record in job.failed_records] == [1, 2, 3]
+
+
+def test_import_job_cancelled_elsewhere_stays_cancelled(client: TestClient, monkeypatch):
+    """Test that a job cancelled by another process after its last checkpoint is not completed."""
+
+    async def cancel_elsewhere(*args, **kwargs):
+        async with get_session_maker()() as db_session:
+            await db_session.exec(
+                update(ImportJob)
+                .where(ImportJob.id == job.id)
+                .values(status=ImportJobStatus.cancelled)
+            )
+            await db_session.commit()
+
+    monkeypatch.setattr(import_jobs, "import_company_stream", cancel_elsewhere)
+
+    job = client.portal.call(_add_job, _create_job(ImportJobStatus.pending))
+    client.portal.call(import_jobs.run_import_job, job.id)
+
+    assert client.portal.call(_get_job, job.id).status == ImportJobStatus.cancelled
+    assert not os.path.exists(job.file_path)
@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+
+
+def test_load_test_processes_in_the_mode_asked_for():
+    """Test a small load test run, processing in the database."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--rows",
+            "30",
+            "--import-files",
+            "2",
+            "--process-batch",
+            "10",
+            "--process-mode",
+            "database",
+            "--scenarios",
+            "import",
+            "process",
+            "--in-process",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    scenarios = json.loads(result.stdout)["scenarios"]
+
+    assert scenarios["import"]["rows"] == 30
+    assert scenarios["process"]["errors"] == 0
+    assert scenarios["process"]["rules_evaluated"]["database"] > 0
+    assert not scenarios["process"]["rules_evaluated"].get("python")
@@ -0,0 +1,81 @@
+import io
+import json
+import logging
+import sys
+
+from core.config import settings
+from core.logging import JSONFormatter, RateLimitFilter, configure_logging, stop_logging
+
+
+def _record(name: str = "service.companies", level: int = logging.ERROR, msg: str = "Bad row"):
+    return logging.makeLogRecord({"name": name, "levelno": level, "msg": msg})
+
+
+def test_rate_limit_filter():
+    rate_limit = RateLimitFilter(rate=2, interval=60)
+
+    assert [rate_limit.filter(_record()) for _ in range(4)] == [True, True, False, False]
+    # Limited per logger and level
+    assert rate_limit.filter(_record(level=logging.WARNING))
+    assert rate_limit.filter(_record(name="service.import_jobs"))
+    assert rate_limit.filter(_record(level=logging.CRITICAL))
+    assert all(rate_limit.filter(_record(level=logging.INFO)) for _ in range(4))
+
+    # The next interval reports how many records were dropped
+    rate_limit.interval = 0
+    record = _record()
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "Bad row (2 similar messages suppressed)"
+
+
+def test_json_formatter():
+    record = logging.makeLogRecord(
+        {"name": "service.companies", "levelname": "ERROR", "msg": "Row %d failed", "args": (3,)}
+    )
+    record.row = 3
+
+    entry = json.loads(JSONFormatter().format(record))
+
+    assert entry["logger"] == "service.companies"
+    assert entry["level"] == "ERROR"
+    assert entry["message"] == "Row 3 failed"
+    assert entry["row"] == 3
+
+
+def test_configure_logging_writes_from_a_thread(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    try:
+        configure_logging()
+        logging.getLogger("service.companies").error("Error importing company at row 1")
+        # Stopping the listener writes the queued records
+        stop_logging()
+    finally:
+        monkeypatch.undo()
+        configure_logging()
+
+    messages = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+    assert "Error importing company at row 1" in messages
+
+
+def test_configure_logging_limits_import_errors_only(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    monkeypatch.setattr(settings, "LOG_RATE_LIMIT", 2)
+    monkeypatch.setattr(settings, "LOG_RATE_LIMIT_INTERVAL", 60)
+    try:
+        configure_logging()
+        for row in range(4):
+            logging.getLogger("service.companies").error(f"Error importing company at row {row}")
+            logging.getLogger("uvicorn.access").info(f"GET /companies/get_companies {row}")
+        stop_logging()
+    finally:
+        monkeypatch.undo()
+        configure_logging()
+
+    output = stream.getvalue()
+    assert output.count("Error importing company at row") == 2
+    assert output.count("GET /companies/get_companies") == 4
+    # Configured again, each logger has a single filter
+    assert len(logging.getLogger("service.companies").filters) == 1
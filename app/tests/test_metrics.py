@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, multiprocess
+
+
+def test_metrics_of_every_process(tmp_path):
+    """Test that in multiprocess mode the metrics of every process are reported together."""
+    record = (
+        "from core.metrics import IMPORT_ROWS, STAGE_DURATION\n"
+        "IMPORT_ROWS.labels(result='written').inc(3)\n"
+        "STAGE_DURATION.labels(operation='import_company', stage='parse').observe(0.2)\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    labels = {"operation": "import_company", "stage": "parse"}
+
+    assert registry.get_sample_value("telescope_import_rows_total", {"result": "written"}) == 6
+    assert registry.get_sample_value("telescope_stage_duration_seconds_count", labels) == 2
+
+
+def test_import_company_stages(client: TestClient, imported_dataset):
+    metrics = client.get("/metrics").text
+
+    for stage in ("parse", "build", "classify", "write", "commit"):
+        assert (
+            f'telescope_stage_duration_seconds_count{{operation="import_company",stage="{stage}"}}'
+            in metrics
+        )
+    assert 'telescope_import_rows_total{result="written"}' in metrics
+    assert 'telescope_db_pool_connections{pool="primary",state="checked_out"}' in metrics
@@ -0,0 +1,52 @@
+import logging
+import os
+import pstats
+import re
+
+from core.config import settings
+from fastapi.testclient import TestClient
+
+
+def test_server_timing_counts_queries(client: TestClient):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    timing = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries", total;dur=[\d.]+', response.headers["server-timing"]
+    )
+    assert timing is not None
+    assert int(timing.group(1)) == 1
+
+
+def test_slow_request_warning(client: TestClient, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_DB_TIME", 1e-9)
+
+    with caplog.at_level(logging.WARNING, logger="api.middleware"):
+        client.get("/health")
+
+    assert "GET /health ran 1 queries" in caplog.text
+
+
+def test_profile_request(client: TestClient, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+
+    response = client.get("/health", headers={"X-Profile-Token": "wrong"})
+    assert "x-profile-file" not in response.headers
+
+    response = client.get("/health", headers={"X-Profile-Token": "secret"})
+    profile = os.path.join(tmp_path, response.headers["x-profile-file"])
+    assert pstats.Stats(profile).total_calls > 0
+
+
+def test_profile_request_with_non_ascii_token(client: TestClient, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "sécret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+
+    response = client.get("/health", headers={"X-Profile-Token": "mauvais-sécret".encode()})
+    assert response.status_code == 200
+    assert "x-profile-file" not in response.headers
+
+    response = client.get("/health", headers={"X-Profile-Token": "sécret".encode()})
+    assert response.status_code == 200
+    assert "x-profile-file" in response.headers
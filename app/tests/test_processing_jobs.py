@@ -0,0 +1,88 @@
+import datetime
+import uuid
+
+from core.config import settings
+from db.session import get_session_maker
+from fastapi.testclient import TestClient
+from models.processing_jobs import ProcessingChunk
+from service import processing_jobs, rule_sets
+from sqlmodel import select
+
+
+def test_processing_job_drained_by_worker(client: TestClient, imported_dataset, monkeypatch):
+    """Test queueing a processing job and draining its chunks with a worker."""
+    monkeypatch.setattr(settings, "PROCESS_CHUNK_SIZE", 3)
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    request = {"urls": urls, "rules": rules, "force": True}
+
+    response = client.post("/companies/process_company?background=true", json=request)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["chunks_total"] == 4
+
+    assert client.portal.call(processing_jobs.run_worker, "test-worker", True) == 4
+
+    job = client.get(f"/companies/processing_jobs/{job['job_id']}").json()
+    assert job["status"] == "completed"
+    assert job["chunks_completed"] == 4
+    assert job["processed_records"] + job["skipped_records"] == len(urls)
+    assert (
+        client.get("/companies/processing_jobs/0d5ad4e2-7a9b-4d0a-9a39-4d1c1b1b1b1b").status_code
+        == 404
+    )
+
+
+def test_processing_job_with_registered_rule_set(client: TestClient, imported_dataset):
+    """Test that a job queued with a registered rule set is processed with its version."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    rule_set = client.post("/rule_sets", json={"name": "queued", "rules": rules}).json()
+    rule_sets._plans.clear()
+
+    job = client.post(
+        "/companies/process_company?background=true",
+        json={"urls": urls, "rule_set_id": rule_set["rule_set_id"], "force": True},
+    ).json()
+    assert job["rule_set_id"] == rule_set["rules_hash"]
+
+    client.portal.call(processing_jobs.run_worker, "test-worker", True)
+
+    job = client.get(f"/companies/processing_jobs/{job['job_id']}").json()
+    assert job["status"] == "completed"
+    assert job["processed_records"] == len(urls)
+    assert uuid.UUID(rule_set["rule_set_id"]) in rule_sets._plans
+
+
+def test_processing_chunk_of_crashed_worker_is_claimed_again(client: TestClient, imported_dataset):
+    """Test that a chunk whose lease expired is claimed again, and given up after too many claims."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    job = client.post(
+        "/companies/process_company?background=true", json={"urls": urls, "rules": rules}
+    ).json()
+
+    async def expire_lease(db_session, chunk):
+        chunk.lease_expires_at = datetime.datetime.now() - datetime.timedelta(seconds=1)
+        await db_session.commit()
+
+    async def crash_workers():
+        async with get_session_maker()() as db_session:
+            chunk = await processing_jobs.claim_chunk("crashed-worker", db_session)
+            assert await processing_jobs.claim_chunk("other-worker", db_session) is None
+
+            await expire_lease(db_session, chunk)
+            reclaimed = await processing_jobs.claim_chunk("other-worker", db_session)
+            assert (reclaimed.id, reclaimed.attempts) == (chunk.id, 2)
+
+            reclaimed.attempts = settings.PROCESSING_MAX_ATTEMPTS
+            await expire_lease(db_session, reclaimed)
+            assert await processing_jobs.claim_chunk("last-worker", db_session) is None
+
+            result = await db_session.exec(
+                select(ProcessingChunk).where(ProcessingChunk.id == chunk.id)
+            )
+            return result.one()
+
+    chunk = client.portal.call(crash_workers)
+
+    assert chunk.status == "failed"
+    assert client.get(f"/companies/processing_jobs/{job['job_id']}").json()["status"] == "failed"
@@ -0,0 +1,85 @@
+import uuid
+
+from api.schema import Rule
+from core.config import settings
+from fastapi.testclient import TestClient
+from service import rule_sets
+from service.rules import compile_rules
+
+
+def test_register_rule_set_versions(client: TestClient, rules):
+    """Test that new rules make a new version and the same rules the same version."""
+    first = client.post("/rule_sets", json={"name": "versions", "rules": rules})
+    second = client.post("/rule_sets", json={"name": "versions", "rules": rules[:2]})
+    again = client.post("/rule_sets", json={"name": "versions", "rules": rules})
+
+    assert first.status_code == 201
+    assert [first.json()["version"], second.json()["version"]] == [1, 2]
+    assert again.json() == first.json()
+    assert first.json()["rules_hash"] == compile_rules([Rule(**rule) for rule in rules]).rules_hash
+    assert client.get(f"/rule_sets/{second.json()['rule_set_id']}").json() == second.json()
+    assert client.get(f"/rule_sets/{uuid.uuid4()}").status_code == 404
+
+
+def test_same_rules_under_two_names_are_two_rule_sets(client: TestClient, rules):
+    """Test that the same rules registered under two names get an id each."""
+    alpha = client.post("/rule_sets", json={"name": "alpha", "rules": rules}).json()
+    beta = client.post("/rule_sets", json={"name": "beta", "rules": rules}).json()
+
+    assert alpha["rule_set_id"] != beta["rule_set_id"]
+    # Their features are the same, stored under the same rules hash
+    assert alpha["rules_hash"] == beta["rules_hash"]
+    assert client.get(f"/rule_sets/{alpha['rule_set_id']}").json()["name"] == "alpha"
+    assert client.get(f"/rule_sets/{beta['rule_set_id']}").json()["name"] == "beta"
+
+
+def test_process_company_by_rule_set_id(client: TestClient, imported_dataset):
+    """Test that processing with a registered rule set gives the same features as inline rules."""
+    urls, rules = imported_dataset.urls, imported_dataset.rules
+    rule_set = client.post("/rule_sets", json={"name": "scoring", "rules": rules}).json()
+    rule_set_id = rule_set["rule_set_id"]
+    rule_sets._plans.clear()
+
+    inline = client.post("/companies/process_company", json={"urls": urls, "rules": rules})
+    registered = client.post(
+        "/companies/process_company", json={"urls": urls, "rule_set_id": rule_set_id}
+    )
+
+    assert registered.status_code == 200
+    assert registered.json() == inline.json()
+    assert registered.headers["x-rule-set-id"] == rule_set["rules_hash"]
+    assert uuid.UUID(rule_set_id) in rule_sets._plans
+
+    missing = client.post(
+        "/companies/process_company", json={"urls": urls, "rule_set_id": str(uuid.uuid4())}
+    )
+    assert missing.status_code == 404
+
+
+def test_rule_set_plan_cache_evicts_least_recently_used(monkeypatch):
+    """Test that the plan cache keeps the most recently used plans only."""
+    monkeypatch.setattr(settings, "RULE_SET_CACHE_SIZE", 2)
+    monkeypatch.setattr(rule_sets, "_plans", type(rule_sets._plans)())
+    plans = [
+        compile_rules(
+            [
+                Rule(
+                    input="founded_year",
+                    feature_name=f"f{i}",
+                    operation={"equal": i},
+                    match=1,
+                    default=0,
+                )
+            ]
+        )
+        for i in range(3)
+    ]
+
+    rule_set_ids = [uuid.uuid4() for _ in plans]
+
+    rule_sets._cache_plan(rule_set_ids[0], plans[0])
+    rule_sets._cache_plan(rule_set_ids[1], plans[1])
+    rule_sets._plans.move_to_end(rule_set_ids[0])
+    rule_sets._cache_plan(rule_set_ids[2], plans[2])
+
+    assert list(rule_sets._plans) == [rule_set_ids[0], rule_set_ids[2]]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from api.schema import Rule
+from models.companies import CompanyData
+from service.rules import compile_rules, compile_rules_sql, get_feature_value
+
+
+def _companies() -> list[CompanyData]:
+    return [
+        CompanyData(
+            name=f"Company {index}",
+            url=f"https://www.company{index}.com",
+            founded_year=2000 + index,
+            total_employees=index * 20,
+            headquarters_city="Boston (USA)" if index % 2 else "Berlin (Germany)",
+            extras={
+                "company_age": 25 - index,
+                "is_usa_based": bool(index % 2),
+                "is_saas": index > 4,
+            },
+        )
+        for index in range(10)
+    ]
+
+
+def _rules() -> list[Rule]:
+    with open("tests/rules.json", "r") as f:
+        return [Rule.model_validate(rule) for rule in json.load(f)["rules"]]
+
+
+def test_compiled_rules_match_reference_evaluation():
+    rules = _rules()
+    plan = compile_rules(rules)
+
+    for company in _companies():
+        expected = {}
+        for rule in rules:
+            expected.update(get_feature_value(company, rule))
+        assert plan.evaluate(company) == expected
+
+
+def test_compiled_rules_are_cached_by_content():
+    assert compile_rules(_rules()) is compile_rules(_rules())
+
+
+def test_compiled_rule_with_unknown_input():
+    rule = Rule(input="unknown", feature_name="f", operation={"equal": 1}, match=1, default=0)
+    plan = compile_rules([rule])
+
+    with pytest.raises(ValueError):
+        plan.evaluate(_companies()[0])
+
+
+def test_batch_evaluation_matches_per_company_evaluation():
+    plan = compile_rules(_rules())
+    companies = _companies()
+
+    assert plan.evaluate_batch(companies) == [plan.evaluate(company) for company in companies]
+
+
+def test_batch_evaluation_with_non_numeric_inputs():
+    rules = [
+        Rule(input="name", feature_name="named", operation={"equal": 1}, match=1, default=0),
+        Rule(
+            input="founded_year",
+            feature_name="old",
+            operation={"less_than": 2004},
+            match=1,
+            default=0,
+        ),
+        Rule(input="tier", feature_name="top_tier", operation={"equal": 1}, match=1, default=0),
+    ]
+    plan = compile_rules(rules)
+    companies = _companies()
+    for index, company in enumerate(companies):
+        company.extras["tier"] = "1" if index % 2 else 1
+
+    assert plan.evaluate_batch(companies) == [plan.evaluate(company) for company in companies]
+
+    companies[3].founded_year = None
+    with pytest.raises(TypeError):
+        plan.evaluate_batch(companies)
+
+
+def test_batch_evaluation_with_unknown_input():
+    rule = Rule(input="unknown", feature_name="f", operation={"equal": 1}, match=1, default=0)
+
+    with pytest.raises(ValueError):
+        compile_rules([rule]).evaluate_batch(_companies())
+
+
+def test_rules_translated_to_sql():
+    assert compile_rules_sql(compile_rules(_rules())).keys() == {
+        "head_count_feature",
+        "age_feature",
+        "usa_based_feature",
+        "is_saas_feature",
+    }
+
+    # Unknown extras and strings compared to numbers are only evaluated in Python
+    unknown_extra = Rule(input="tier", feature_name="f", operation={"equal": 1}, match=1, default=0)
+    string_order = Rule(
+        input="name", feature_name="f", operation={"less_than": 1}, match=1, default=0
+    )
+    assert compile_rules_sql(compile_rules([unknown_extra])) is None
+    assert compile_rules_sql(compile_rules([string_order])) is None
@@ -0,0 +1,56 @@
+import random
+
+from service.saas import SaasClassifier
+
+
+def test_classify_returns_matched_keywords():
+    classifier = SaasClassifier(["subscription", "cloud", "cloud-based", "tier", "tiered"])
+
+    match = classifier.classify("Cloud-based CRM, Subscription pricing with tiered plans")
+
+    assert match.is_saas
+    assert match.keywords == ("subscription", "cloud", "cloud-based", "tier", "tiered")
+    assert match.count == 5
+
+
+def test_classify_matches_keywords_anywhere():
+    classifier = SaasClassifier(["tier"])
+
+    assert classifier.classify("Pricing tiers").is_saas
+    assert classifier.classify("Frontier markets hardware").is_saas
+    assert not classifier.classify("Hardware").is_saas
+    assert not classifier.classify(None).is_saas
+
+
+def test_min_matches_threshold():
+    classifier = SaasClassifier(["subscription", "monthly"], min_matches=2)
+
+    assert not classifier.is_saas("Monthly billing")
+    assert classifier.is_saas("Monthly subscription")
+    assert [
+        match.is_saas
+        for match in classifier.classify_many(["monthly", None, "monthly subscription"])
+    ] == [False, False, True]
+
+
+def test_classify_finds_overlapping_keywords():
+    classifier = SaasClassifier(["saas", "subscription", "cloud", "cloud-based", "based"])
+
+    match = classifier.classify("Saasubscription, cloud-based")
+
+    assert match.keywords == ("saas", "subscription", "cloud", "cloud-based", "based")
+
+
+def test_classify_agrees_with_substring_checks():
+    rng = random.Random(0)
+    keywords = list(
+        dict.fromkeys("".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(30))
+    )
+    descriptions = ["".join(rng.choices("abcABCxyz", k=20)) for _ in range(500)]
+    classifier = SaasClassifier(keywords, min_matches=3)
+
+    for description in descriptions:
+        expected = tuple(keyword for keyword in keywords if keyword in description.lower())
+        assert classifier.classify(description).keywords == expected
+        assert classifier.is_saas(description) == (len(expected) >= 3)
+        assert SaasClassifier(keywords).is_saas(description) == bool(expected)
@@ -0,0 +1,61 @@
+import asyncio
+
+from core.config import settings
+from db import session
+
+
+def test_read_sessions_fall_back_to_primary(monkeypatch):
+    """Test that reads go to the replica unless it lags too much."""
+
+    async def check() -> None:
+        # Both URLs point to the same local database
+        read_engine = session.create_engine(settings.POSTGRES_URL)
+        read_session_maker = session._create_session_maker(read_engine)
+        monkeypatch.setattr(session, "_read_engine", read_engine)
+        monkeypatch.setattr(session, "_read_session_maker", read_session_maker)
+        monkeypatch.setattr(session, "_replica_status", {"checked_at": None, "usable": False})
+        monkeypatch.setattr(settings, "READ_REPLICA_CHECK_INTERVAL", 0)
+
+        assert await session.get_read_session_maker() is read_session_maker
+
+        monkeypatch.setattr(settings, "READ_REPLICA_MAX_LAG", -1)
+        assert await session.get_read_session_maker() is session.get_session_maker()
+
+        await read_engine.dispose()
+
+    asyncio.run(check())
+
+
+def test_replica_check_runs_once_and_times_out(monkeypatch):
+    """Test that one request checks the replica at a time, within the check timeout."""
+    probes = []
+
+    async def hang() -> float:
+        probes.append(None)
+        await asyncio.sleep(10)
+        return 0.0
+
+    async def check() -> None:
+        read_engine = session.create_engine(settings.POSTGRES_URL)
+        read_session_maker = session._create_session_maker(read_engine)
+        monkeypatch.setattr(session, "_read_engine", read_engine)
+        monkeypatch.setattr(session, "_read_session_maker", read_session_maker)
+        monkeypatch.setattr(session, "_replica_status", {"checked_at": None, "usable": True})
+        monkeypatch.setattr(session, "_replica_check_lock", asyncio.Lock())
+        monkeypatch.setattr(session, "_get_replica_lag", hang)
+        monkeypatch.setattr(settings, "READ_REPLICA_CHECK_INTERVAL", 0)
+        monkeypatch.setattr(settings, "READ_REPLICA_CHECK_TIMEOUT", 0.1)
+
+        checking = asyncio.create_task(session.get_read_session_maker())
+        await asyncio.sleep(0)
+        # Requests during the check keep the last decision rather than waiting
+        assert await session.get_read_session_maker() is read_session_maker
+
+        # The check gives up on the replica once the timeout is over
+        assert await asyncio.wait_for(checking, 1) is session.get_session_maker()
+        assert len(probes) == 1
+        assert session._replica_status["usable"] is False
+
+        await read_engine.dispose()
+
+    asyncio.run(check())
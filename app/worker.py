@@ -0,0 +1,71 @@
+"""Processing job worker.
+
+Drains the processing job queue shared through the database, run as many
+workers as needed on any host reaching it. From the app directory:
+
+    python -m worker [--processes 4] [--drain]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+
+from core.logging import configure_logging, get_logger, stop_logging
+from core.metrics import mark_process_dead
+from db.session import dispose_engine, init_engine
+from service.processing_jobs import run_worker
+
+
+logger = get_logger(__name__)
+
+
+async def work(worker_id: str, drain: bool) -> None:
+    """Run a worker with its own engine, until cancelled or, when draining, until the queue is empty."""
+    init_engine()
+    try:
+        chunks_processed = await run_worker(worker_id, drain)
+        logger.info(f"Worker {worker_id} processed {chunks_processed} chunks")
+    finally:
+        await dispose_engine()
+
+
+def run_process(worker_id: str, drain: bool) -> None:
+    configure_logging()
+    try:
+        asyncio.run(work(worker_id, drain))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mark_process_dead()
+        stop_logging()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to run")
+    parser.add_argument(
+        "--drain", action="store_true", help="exit once there is no chunk left to claim"
+    )
+    args = parser.parse_args()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if args.processes == 1:
+        run_process(worker_id, args.drain)
+        return
+
+    # Rules are evaluated in Python, a process per core uses every core
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_process, args=(f"{worker_id}/{index}", args.drain))
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,24 +10,35 @@ def get_companies(filters: Optional[Dict[str, Any]] = None) -> None:
     """
     Get companies from the /get_companies endpoint with optional filters.
 
+    Follows the `next_cursor` of each page until every matching company is fetched.
+
     Args:
         filters: Optional dictionary of filters to apply to the query
     """
     # API endpoint
     url = "http://localhost:8000/get_companies"
 
+    # Filter values are sent as JSON, so that e.g. true and 1 keep their type
+    params = {name: json.dumps(value) for name, value in (filters or {}).items()}
+    params["limit"] = 1000
+
     try:
-        # Make the GET request
-        response = requests.get(url, params=filters)
+        companies = []
+        while True:
+            # Make the GET request
+            response = requests.get(url, params=params)
 
-        # Check if the request was successful
-        response.raise_for_status()
+            # Check if the request was successful
+            response.raise_for_status()
 
-        # Print the response
-        result = response.json()
+            page = response.json()
+            companies.extend(page["data"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
 
         # Pretty print the JSON response
-        print(json.dumps(result, indent=2))
+        print(json.dumps(companies, indent=2))
 
     except requests.exceptions.RequestException as e:
         print(f"Error making request: {e}")
@@ -6,12 +6,23 @@ from pathlib import Path
 import requests
 
 
+CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".jsonl": "application/x-ndjson",
+}
+
+
 def import_companies(csv_path: str) -> None:
     """
-    Import companies from CSV file using the /import_company_data endpoint.
+    Import companies from a file using the /import_company_data endpoint.
+
+    CSV, JSON and NDJSON files are supported, gzip compressed files (`.gz`) are
+    uploaded as they are with a `Content-Encoding: gzip` header.
 
     Args:
-        csv_path: Path to the CSV file containing company data
+        csv_path: Path to the file containing company data
     """
     # Get the absolute path of the CSV file
     csv_file = Path(csv_path).resolve()
@@ -23,7 +34,13 @@ def import_companies(csv_path: str) -> None:
     url = "http://localhost:8000/import_company_data"
 
     # Prepare the file for upload
-    files = {"file": ("company-dataset.csv", open(csv_file, "rb"), "text/csv")}
+    headers = {}
+    name = csv_file.name
+    if name.endswith(".gz"):
+        headers["Content-Encoding"] = "gzip"
+        name = name[: -len(".gz")]
+    content_type = CONTENT_TYPES.get(Path(name).suffix, "text/csv")
+    files = {"file": (csv_file.name, open(csv_file, "rb"), content_type, headers)}
 
     try:
         # Make the POST request